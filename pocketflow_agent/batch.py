@@ -0,0 +1,222 @@
+"""
+Exécution du flow complet sur plusieurs dépôts, dans un pool de processus
+"""
+
+import os
+import json
+import time
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, List, Optional
+
+from .config import get_setting
+from . import git
+from . import ratelimit
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Lit un manifeste de dépôts : fichier JSON (liste de chemins ou d'objets
+    {"path", "name", "options"}, éventuellement sous une clé "repos") ou
+    fichier texte (un chemin par ligne, "#" pour les commentaires). Les
+    chemins relatifs le sont au répertoire du manifeste.
+
+    Returns:
+        List[Dict[str, Any]]: {"name", "path", "options"} par dépôt
+
+    Raises:
+        ValueError: Si une entrée est invalide ou si deux dépôts ont le même nom
+    """
+    with open(path, 'r', encoding='utf8') as f:
+        content = f.read()
+    if path.endswith(".json"):
+        entries = json.loads(content)
+        if isinstance(entries, dict):
+            entries = entries.get("repos", [])
+    else:
+        entries = [line.strip() for line in content.splitlines()]
+        entries = [line for line in entries if line and not line.startswith("#")]
+
+    base = os.path.dirname(os.path.abspath(path))
+    repos, names = [], set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if not isinstance(entry, dict) or not entry.get("path"):
+            raise ValueError(f"Entrée de manifeste invalide: {entry!r}")
+        repo_path = os.path.normpath(os.path.join(base, os.path.expanduser(entry["path"])))
+        name = entry.get("name") or os.path.basename(repo_path)
+        if name in names:
+            raise ValueError(f"Dépôt en double dans le manifeste: {name}")
+        names.add(name)
+        repos.append({"name": name, "path": repo_path, "options": dict(entry.get("options") or {})})
+    return repos
+
+
+def _init_worker(buckets: Dict[str, Any]) -> None:
+    """
+    Initialise un processus du pool : ses limiteurs de débit utilisent les seaux partagés.
+    """
+    ratelimit.install_shared_buckets(buckets)
+
+
+def _counters(flow: Any) -> Dict[str, float]:
+    client = flow.llm_client
+    if client is None:
+        return {}
+    counters = {key: value for key, value in client.retry_stats().items() if isinstance(value, (int, float))}
+    if client.rate_limiter:
+        limiter = client.rate_limiter.stats()
+        counters["ratelimit_waits"] = limiter["waits"]
+        counters["ratelimit_wait_seconds"] = limiter["wait_seconds"]
+    return counters
+
+
+def run_repo(repo: Dict[str, Any], options: Dict[str, Any] = None, time_budget: Optional[float] = None,
+             log_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Exécute le flow complet sur un dépôt (dans un processus du pool). Les
+    erreurs sont rapportées dans le résultat, sans exception.
+
+    Args:
+        repo (Dict[str, Any]): Dépôt du manifeste (voir load_manifest)
+        options (Dict[str, Any], optional): Arguments de create_full_update_flow,
+                                            complétés par les options du dépôt
+        time_budget (float, optional): Durée maximale du run
+        log_dir (str, optional): Répertoire des progressions (<nom>.jsonl) ; sans, le run est silencieux
+
+    Returns:
+        Dict[str, Any]: {"name", "path", "status", "elapsed", "nodes": {statut: nombre},
+                         "errors": [...], "llm": {compteurs du run}}
+    """
+    # Importés dans le processus du pool : le processus principal n'a pas besoin du client LLM
+    from .flow_definition import create_full_update_flow
+    from .reporting import JSONLReporter, SilentReporter
+
+    start = time.monotonic()
+    result = {"name": repo["name"], "path": repo["path"], "status": "error", "elapsed": 0.0,
+              "nodes": {}, "errors": [], "llm": {}}
+    try:
+        # Les nodes lisent et écrivent aussi des chemins relatifs au dépôt
+        os.chdir(repo["path"])
+        flow = create_full_update_flow(repo_dir=repo["path"], **{**(options or {}), **repo["options"]})
+        if log_dir:
+            flow.reporter = JSONLReporter(path=os.path.join(log_dir, f"{repo['name']}.jsonl"))
+        else:
+            flow.reporter = SilentReporter()
+        before = _counters(flow)
+        context = flow.run({}, time_budget=time_budget)
+        after = _counters(flow)
+        result["status"] = context["flow"]["status"]
+        for node in context["flow"]["completed_nodes"]:
+            result["nodes"][node["status"]] = result["nodes"].get(node["status"], 0) + 1
+            if node["status"] == "error":
+                result["errors"].append(f"{node['name']}: {node.get('error', 'Erreur inconnue')}")
+        result["llm"] = {key: after[key] - before.get(key, 0) for key in after}
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+    finally:
+        git.close_all()
+        result["elapsed"] = time.monotonic() - start
+    return result
+
+
+class BatchRunner:
+    """
+    Exécute le flow complet sur les dépôts d'un manifeste, jusqu'à
+    max_workers dépôts à la fois dans des processus séparés. Les limites
+    de débit LLM ("llm.rateLimits") sont communes à tous les processus
+    (voir ratelimit.SharedTokenBucket). L'échec d'un dépôt n'arrête pas
+    les autres ; les résultats sont regroupés dans un seul rapport. Si un
+    processus meurt (BrokenProcessPool), les dépôts inachevés sont relancés
+    dans un nouveau pool.
+    """
+
+    def __init__(self, max_workers: int = 4, options: Dict[str, Any] = None, time_budget: Optional[float] = None,
+                 log_dir: Optional[str] = None, max_restarts: int = 2):
+        """
+        Args:
+            max_workers (int, optional): Nombre de dépôts traités en parallèle
+            options (Dict[str, Any], optional): Arguments de create_full_update_flow pour tous les dépôts
+            time_budget (float, optional): Durée maximale du run de chaque dépôt
+            log_dir (str, optional): Répertoire des progressions par dépôt (voir run_repo)
+            max_restarts (int, optional): Nombre de relances d'un dépôt interrompu par la mort
+                                          d'un processus, avant de le rapporter en erreur
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_restarts = max(0, max_restarts)
+        self.options = options or {}
+        self.time_budget = time_budget
+        self.log_dir = os.path.abspath(log_dir) if log_dir else None
+
+    @classmethod
+    def from_config(cls, **kwargs: Any) -> "BatchRunner":
+        """
+        Crée le runner à partir de la section "batch" de la configuration.
+        """
+        kwargs.setdefault("max_workers", get_setting("batch.maxWorkers", 4))
+        kwargs.setdefault("max_restarts", get_setting("batch.maxRestarts", 2))
+        return cls(**kwargs)
+
+    def run(self, repos: List[Dict[str, Any]],
+            on_result: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Exécute le flow sur chaque dépôt.
+
+        Args:
+            repos (List[Dict[str, Any]]): Dépôts (voir load_manifest)
+            on_result (Callable, optional): Appelé dans l'ordre de fin avec le résultat de chaque dépôt
+
+        Returns:
+            Dict[str, Any]: {"started", "elapsed", "workers", "restarts": nombre de relances,
+                             "repos": [résultats dans l'ordre du manifeste],
+                             "summary": {statut: nombre, "repo_seconds", "speedup"}}
+        """
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+        started = datetime.now().isoformat(timespec="seconds")
+        start = time.monotonic()
+        # "spawn" : les processus ne partagent ni les threads ni les connexions du processus principal
+        context = multiprocessing.get_context("spawn")
+        buckets = ratelimit.create_shared_buckets(context)
+        results: Dict[str, Dict[str, Any]] = {}
+        workers = min(self.max_workers, len(repos)) or 1
+        interruptions: Dict[str, int] = {}
+        restarts = 0
+        pending = list(repos)
+        while pending:
+            interrupted = []
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(buckets,)) as pool:
+                futures = {pool.submit(run_repo, repo, self.options, self.time_budget, self.log_dir): repo
+                           for repo in pending}
+                for future in as_completed(futures):
+                    repo = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # Un processus est mort : tous les dépôts inachevés du pool échouent avec lui
+                        interruptions[repo["name"]] = interruptions.get(repo["name"], 0) + 1
+                        if interruptions[repo["name"]] <= self.max_restarts:
+                            interrupted.append(repo)
+                            restarts += 1
+                            continue
+                        result = {"name": repo["name"], "path": repo["path"], "status": "error", "elapsed": 0.0,
+                                  "nodes": {}, "errors": [f"Processus interrompu: {e}"], "llm": {}}
+                    results[repo["name"]] = result
+                    if on_result:
+                        on_result(result)
+            # Nouveau pool pour les dépôts interrompus, dans l'ordre du manifeste
+            pending = [repo for repo in repos if repo in interrupted]
+
+        elapsed = time.monotonic() - start
+        ordered = [results[repo["name"]] for repo in repos]
+        summary: Dict[str, Any] = {}
+        for result in ordered:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        summary["repo_seconds"] = sum(result["elapsed"] for result in ordered)
+        summary["speedup"] = summary["repo_seconds"] / elapsed if elapsed > 0 else 0.0
+        return {"started": started, "elapsed": elapsed, "workers": workers, "restarts": restarts,
+                "repos": ordered, "summary": summary}
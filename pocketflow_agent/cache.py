@@ -0,0 +1,183 @@
+"""
+Cache disque des réponses LLM, adressé par contenu (SQLite, éviction LRU)
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+from .config import get_setting
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pocketflow", "llm-cache.sqlite")
+
+# Réglages par défaut (surchargés par "llm.cache" dans config/default.json)
+DEFAULT_CACHE_SETTINGS = {
+    "enabled": True,
+    "path": DEFAULT_CACHE_PATH,
+    "maxBytes": 64 * 1024 * 1024,
+    "maxAgeDays": 30
+}
+
+
+def cache_key(provider: str, model_id: str, temperature: float, prompt: str) -> str:
+    """
+    Calcule la clé de cache d'une requête.
+
+    Args:
+        provider (str): Fournisseur du LLM
+        model_id (str): ID du modèle
+        temperature (float): Température d'échantillonnage
+        prompt (str): Prompt envoyé
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    material = json.dumps([provider, model_id, float(temperature), prompt], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Cache des réponses LLM stocké dans une base SQLite.
+
+    Les réponses sont compressées (zlib). L'éviction supprime d'abord les
+    entrées plus vieilles que max_age, puis les moins récemment utilisées
+    tant que la taille totale dépasse max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_SETTINGS["maxBytes"],
+                 max_age_days: float = DEFAULT_CACHE_SETTINGS["maxAgeDays"]):
+        """
+        Initialise le cache.
+
+        Args:
+            path (str, optional): Chemin de la base SQLite (":memory:" accepté)
+            max_bytes (int, optional): Taille maximale des réponses compressées
+            max_age_days (float, optional): Âge maximal d'une entrée en jours
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @classmethod
+    def from_config(cls) -> Optional["LLMCache"]:
+        """
+        Crée le cache à partir de la section "llm.cache" de la configuration.
+
+        Returns:
+            Optional[LLMCache]: Le cache, ou None s'il est désactivé
+        """
+        settings = dict(DEFAULT_CACHE_SETTINGS)
+        settings.update(get_setting("llm.cache", {}) or {})
+        if not settings["enabled"] or os.getenv("POCKETFLOW_NO_CACHE"):
+            return None
+        return cls(
+            path=os.path.expanduser(settings["path"]),
+            max_bytes=settings["maxBytes"],
+            max_age_days=settings["maxAgeDays"]
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retourne la réponse en cache pour une clé.
+
+        Args:
+            key (str): Clé calculée par cache_key
+
+        Returns:
+            Optional[str]: Réponse, ou None si absente ou expirée
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf8")
+
+    def put(self, key: str, response: str) -> None:
+        """
+        Enregistre une réponse puis applique l'éviction.
+
+        Args:
+            key (str): Clé calculée par cache_key
+            response (str): Réponse du LLM
+        """
+        data = zlib.compress(response.encode("utf8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, data, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        cursor = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+        self.evictions += cursor.rowcount
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs du cache.
+
+        Returns:
+            Dict[str, Any]: Succès, échecs, évictions, nombre d'entrées et taille
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size
+        }
+
+    def close(self) -> None:
+        """
+        Ferme la connexion SQLite.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,63 @@
+"""
+Chargement de la configuration PocketFlow depuis config/default.json
+"""
+
+import os
+import json
+from typing import Dict, Any, Optional
+
+# Fichier de configuration partagé avec l'outillage Node.js du projet
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config",
+    "default.json"
+)
+
+_config_cache: Optional[Dict[str, Any]] = None
+
+
+def load_config(path: str = None, reload: bool = False) -> Dict[str, Any]:
+    """
+    Charge la section "pocketflow" du fichier de configuration.
+
+    Args:
+        path (str, optional): Chemin du fichier. Par défaut POCKETFLOW_CONFIG ou config/default.json
+        reload (bool, optional): Si True, ignore le cache et relit le fichier
+
+    Returns:
+        Dict[str, Any]: Section "pocketflow" de la configuration (vide si absente)
+    """
+    global _config_cache
+
+    if _config_cache is not None and path is None and not reload:
+        return _config_cache
+
+    config_path = path or os.getenv("POCKETFLOW_CONFIG") or DEFAULT_CONFIG_PATH
+    try:
+        with open(config_path, 'r', encoding='utf8') as f:
+            config = json.load(f).get("pocketflow", {})
+    except (OSError, ValueError):
+        config = {}
+
+    if path is None:
+        _config_cache = config
+    return config
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """
+    Récupère une valeur de configuration à partir d'une clé pointée (ex: "llm.pool").
+
+    Args:
+        key (str): Clé pointée dans la section "pocketflow"
+        default (Any, optional): Valeur par défaut si la clé est absente
+
+    Returns:
+        Any: Valeur de configuration
+    """
+    value: Any = load_config()
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
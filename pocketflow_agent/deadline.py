@@ -0,0 +1,111 @@
+"""
+Échéances (deadlines) propagées aux appels LLM via une variable de contexte
+"""
+
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
+
+# Instant limite (time.monotonic) de l'opération en cours, ou None
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("pocketflow_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Le budget de temps de l'opération en cours est épuisé.
+    """
+
+
+def current() -> Optional[float]:
+    """
+    Retourne l'échéance courante (time.monotonic), ou None s'il n'y en a pas.
+    """
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    Retourne le temps restant en secondes (négatif si dépassé), ou None sans échéance.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """
+    Indique si l'échéance courante est dépassée.
+    """
+    budget = remaining()
+    return budget is not None and budget <= 0
+
+
+def check(what: str = "opération") -> None:
+    """
+    Lève DeadlineExceeded si l'échéance courante est dépassée.
+    """
+    if expired():
+        raise DeadlineExceeded(f"Budget de temps épuisé ({what})")
+
+
+@contextmanager
+def scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Restreint l'échéance courante à `seconds` secondes à partir de maintenant.
+    Une échéance englobante plus proche reste prioritaire. Sans durée, rien ne change.
+
+    Le contexte est propagé aux tâches asyncio et à asyncio.to_thread, mais
+    pas aux threads d'un ThreadPoolExecutor (utiliser contextvars.copy_context).
+
+    Yields:
+        Optional[float]: L'échéance effective
+    """
+    if seconds is None:
+        yield _deadline.get()
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def is_deadline_error(error: BaseException) -> bool:
+    """
+    Indique si une erreur (ou l'une de ses causes) est un dépassement de délai.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, (TimeoutError, httpx.TimeoutException)):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def http_timeout(default: float, connect: float = 10.0) -> httpx.Timeout:
+    """
+    Calcule les délais httpx d'une requête à partir du temps restant.
+
+    Args:
+        default (float): Délai de lecture sans échéance
+        connect (float, optional): Délai de connexion maximal
+
+    Returns:
+        httpx.Timeout: Délais bornés par le temps restant
+
+    Raises:
+        DeadlineExceeded: Si l'échéance est déjà dépassée
+    """
+    budget = remaining()
+    if budget is None:
+        return httpx.Timeout(default, connect=min(connect, default))
+    if budget <= 0:
+        raise DeadlineExceeded("Budget de temps épuisé avant l'appel")
+    return httpx.Timeout(min(default, budget), connect=min(connect, default, budget))
@@ -0,0 +1,287 @@
+"""
+Stockage du journal DM-Log en segments datés, avec un index des entrées
+"""
+
+import os
+import re
+import json
+import hashlib
+import datetime
+import threading
+from typing import Dict, Any, List, Optional
+
+from . import tracing
+from .documents import content_hash, write_document
+from .markdown import parse_sections
+from .state import write_json_atomic
+
+RESULTS_MARKER = "## Résultats des étapes"
+
+DEFAULT_VIEW = f"""# Decision/Meeting Log
+
+{RESULTS_MARKER}
+"""
+
+
+class DMLogStore:
+    """
+    Entrées du DM-Log rangées dans des segments mensuels (segments/AAAA-MM.md)
+    et un index JSON lines (une ligne par entrée : seq, date, tâche, segment,
+    position, longueur, empreinte), dans le répertoire <vue sans .md>.d/.
+
+    Ajouter une entrée ne fait qu'écrire à la fin d'un segment et de l'index.
+    Le document lisible (la vue, ex: docs/dm-log.md) n'est mis à jour que par
+    render(), appelé à la demande ou toutes les N entrées (voir
+    DMLogUpdateNode) : il insère les entrées en attente après "## Résultats
+    des étapes" sans toucher au reste du document (modifications manuelles
+    comprises). Son coût dépend de la taille de la vue.
+
+    À la création, les entrées "###" déjà présentes dans la vue sont importées
+    (et considérées comme affichées).
+    """
+
+    INDEX = "index.jsonl"
+    VIEW_STATE = "view.json"
+    SUMMARY = "summary.json"
+
+    def __init__(self, view_path: str, directory: str = None):
+        """
+        Args:
+            view_path (str): Chemin du document lisible (ex: docs/dm-log.md)
+            directory (str, optional): Répertoire du stockage (par défaut docs/dm-log.d)
+        """
+        self.view_path = view_path
+        self.directory = directory or os.path.splitext(view_path)[0] + ".d"
+        self.index_path = os.path.join(self.directory, self.INDEX)
+        self._lock = threading.RLock()
+        self._last: Optional[Dict[str, Any]] = None
+        self._ready = False
+
+    def _ensure(self) -> None:
+        """
+        Crée le stockage au premier accès, en important les entrées de la vue existante.
+        """
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if not os.path.exists(self.index_path):
+                os.makedirs(os.path.join(self.directory, "segments"), exist_ok=True)
+                imported = 0
+                if os.path.exists(self.view_path):
+                    with open(self.view_path, 'r', encoding='utf8') as f:
+                        entries = self._view_entries(f.read())
+                    # La vue affiche les entrées les plus récentes en premier
+                    for entry in reversed(entries):
+                        self._append(entry)
+                    imported = len(entries)
+                # Index créé même vide : il marque le stockage comme initialisé
+                open(self.index_path, 'a', encoding='utf8').close()
+                self._save_view_state(imported)
+            tail = self._tail(1)
+            self._last = tail[-1] if tail else None
+            self._ready = True
+
+    @staticmethod
+    def _view_entries(content: str) -> List[str]:
+        """
+        Entrées "###" de la section des résultats d'une vue, dans l'ordre du document.
+        """
+        entries, inside = [], False
+        for section in parse_sections(content):
+            if section.level <= 2:
+                inside = section.heading.strip() == RESULTS_MARKER
+            elif inside and section.level == 3:
+                entries.append(section.text.strip("\n") + "\n")
+        return entries
+
+    @staticmethod
+    def _describe(text: str) -> Dict[str, str]:
+        """
+        Date et tâche d'une entrée ("### AAAA-MM-JJ - tâche").
+        """
+        match = re.match(r"#+\s*(\d{4}-\d{2}-\d{2})\s*[-–]\s*(.*)", text.strip())
+        if match:
+            return {"date": match.group(1), "task": match.group(2).strip()}
+        return {"date": datetime.date.today().isoformat(), "task": text.strip().splitlines()[0].lstrip("# ").strip()}
+
+    def _append(self, text: str) -> Dict[str, Any]:
+        info = self._describe(text)
+        segment = f"{info['date'][:7]}.md"
+        data = text.encode("utf8")
+        with open(os.path.join(self.directory, "segments", segment), 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+        entry = {
+            "seq": (self._last["seq"] if self._last else 0) + 1,
+            "date": info["date"],
+            "task": info["task"],
+            "segment": segment,
+            "offset": offset,
+            "length": len(data),
+            "hash": hashlib.sha256(data).hexdigest()
+        }
+        with open(self.index_path, 'a', encoding='utf8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._last = entry
+        return entry
+
+    def append(self, text: str) -> Dict[str, Any]:
+        """
+        Ajoute une entrée (Markdown, titre "### AAAA-MM-JJ - tâche"). Coût
+        constant : la vue n'est pas réécrite (voir render).
+
+        Returns:
+            Dict[str, Any]: Entrée d'index
+        """
+        self._ensure()
+        with self._lock, tracing.span("dmlog.append", "file", path=self.directory):
+            return self._append(text.strip("\n") + "\n")
+
+    def head(self) -> Optional[Dict[str, Any]]:
+        """
+        Dernière entrée d'index, ou None si le journal est vide.
+        """
+        self._ensure()
+        return self._last
+
+    def _tail(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Lit les n dernières lignes de l'index en partant de la fin du fichier.
+        """
+        if n <= 0 or not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            data = b""
+            position = end
+            while position > 0 and data.count(b"\n") <= n:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = [line for line in data.split(b"\n") if line.strip()]
+        if position > 0:
+            # La première ligne lue peut être incomplète
+            lines = lines[1:]
+        return [json.loads(line) for line in lines[-n:]]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Toutes les entrées d'index, de la plus ancienne à la plus récente.
+        """
+        self._ensure()
+        with open(self.index_path, 'r', encoding='utf8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def read(self, entry: Dict[str, Any]) -> str:
+        """
+        Lit le texte d'une entrée dans son segment.
+
+        Raises:
+            ValueError: Si le segment ne correspond plus à l'empreinte de l'index
+        """
+        with open(os.path.join(self.directory, "segments", entry["segment"]), 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        if hashlib.sha256(data).hexdigest() != entry["hash"]:
+            raise ValueError(f"Entrée DM-Log corrompue: {entry['segment']}@{entry['offset']}")
+        return data.decode("utf8")
+
+    def last(self, n: int) -> List[str]:
+        """
+        Retourne le texte des n dernières entrées, de la plus ancienne à la plus récente.
+        """
+        self._ensure()
+        with tracing.span("dmlog.read", "file", path=self.directory, entries=n):
+            return [self.read(entry) for entry in self._tail(n)]
+
+    def after(self, seq: int, upto: int = None) -> List[Dict[str, Any]]:
+        """
+        Entrées d'index de numéro supérieur à seq (et au plus upto), lues depuis
+        la fin de l'index.
+        """
+        head = self.head()
+        if head is None or head["seq"] <= seq:
+            return []
+        entries = self._tail(head["seq"] - seq)
+        return [entry for entry in entries if entry["seq"] > seq and (upto is None or entry["seq"] <= upto)]
+
+    def load_summary(self) -> Dict[str, Any]:
+        """
+        Résumé en cache de l'historique.
+
+        Returns:
+            Dict[str, Any]: {"upto": dernier numéro d'entrée résumé (0 sans résumé), "text": résumé}
+        """
+        self._ensure()
+        try:
+            with open(os.path.join(self.directory, self.SUMMARY), 'r', encoding='utf8') as f:
+                summary = json.load(f)
+            return {"upto": int(summary["upto"]), "text": str(summary["text"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {"upto": 0, "text": ""}
+
+    def save_summary(self, upto: int, text: str) -> None:
+        """
+        Enregistre le résumé des entrées jusqu'au numéro upto.
+        """
+        self._ensure()
+        write_json_atomic(os.path.join(self.directory, self.SUMMARY), {"upto": upto, "text": text})
+
+    def _view_state(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.directory, self.VIEW_STATE), 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"rendered": 0}
+
+    def _save_view_state(self, rendered: int) -> None:
+        write_json_atomic(os.path.join(self.directory, self.VIEW_STATE), {"rendered": rendered})
+
+    def pending(self) -> int:
+        """
+        Nombre d'entrées pas encore insérées dans la vue.
+        """
+        head = self.head()
+        return (head["seq"] if head else 0) - self._view_state().get("rendered", 0)
+
+    def render(self) -> bool:
+        """
+        Insère les entrées en attente dans la vue, les plus récentes en premier,
+        juste après "## Résultats des étapes" (ajoutée si absente).
+
+        Returns:
+            bool: True si la vue a été modifiée
+        """
+        self._ensure()
+        with self._lock:
+            count = self.pending()
+            if count <= 0 and os.path.exists(self.view_path):
+                return False
+            texts = self.last(count) if count > 0 else []
+            try:
+                with open(self.view_path, 'r', encoding='utf8') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = DEFAULT_VIEW
+            position = content.find(RESULTS_MARKER)
+            if position < 0:
+                content = content.rstrip("\n") + f"\n\n{RESULTS_MARKER}\n"
+                position = content.find(RESULTS_MARKER)
+            if texts:
+                position += len(RESULTS_MARKER)
+                rest = content[position:].lstrip("\n")
+                block = "\n\n".join(text.strip() for text in reversed(texts))
+                content = content[:position] + "\n\n" + block + ("\n\n" + rest if rest else "\n")
+            changed = write_document(self.view_path, content)
+            head = self.head()
+            self._save_view_state(head["seq"] if head else 0)
+            return changed
+
+    def view_hash(self) -> Optional[str]:
+        """
+        Empreinte de la vue (voir documents.content_hash).
+        """
+        return content_hash(self.view_path)
@@ -0,0 +1,108 @@
+"""
+Écriture atomique des documents, sans réécriture quand le contenu est inchangé
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+from typing import Optional, Tuple
+
+from . import tracing
+
+
+def content_hash(path: str) -> Optional[str]:
+    """
+    Retourne l'empreinte SHA-256 du contenu d'un fichier, ou None s'il n'existe pas.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def temp_file(path: str) -> Tuple[int, str]:
+    """
+    Crée un fichier temporaire à côté de path (même système de fichiers, pour os.replace).
+
+    Returns:
+        Tuple[int, str]: Descripteur et chemin du fichier temporaire
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+
+
+def sync_file(f) -> None:
+    """
+    Vide les tampons d'un fichier ouvert et force son écriture sur le disque,
+    avant qu'il ne remplace un autre fichier.
+    """
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def sync_directory(directory: str) -> None:
+    """
+    Force l'écriture sur le disque des entrées d'un répertoire (après os.replace).
+    Sans effet hors POSIX : Windows n'ouvre pas les répertoires.
+    """
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_if_changed(tmp_path: str, path: str) -> bool:
+    """
+    Remplace path par le fichier temporaire tmp_path s'ils diffèrent (en
+    conservant les droits de path), sinon supprime le fichier temporaire.
+    tmp_path doit avoir été écrit sur le disque (voir sync_file).
+
+    Returns:
+        bool: True si path a été remplacé
+    """
+    try:
+        current = content_hash(path)
+        if current is not None and current == content_hash(tmp_path):
+            return False
+        if current is not None:
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+        sync_directory(os.path.dirname(os.path.abspath(path)))
+        return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def write_document(path: str, content: str) -> bool:
+    """
+    Écrit un document atomiquement (fichier temporaire puis os.replace), sauf
+    si son contenu actuel est déjà identique.
+
+    Args:
+        path (str): Chemin du document
+        content (str): Nouveau contenu
+
+    Returns:
+        bool: True si le document a été modifié
+    """
+    data = content.encode("utf8")
+    with tracing.span("file.write", "file", path=path, bytes=len(data)) as span:
+        if content_hash(path) == hashlib.sha256(data).hexdigest():
+            if span:
+                span.set(changed=False)
+            return False
+        fd, tmp_path = temp_file(path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                sync_file(f)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return replace_if_changed(tmp_path, path)
@@ -3,18 +3,64 @@ Classe Flow pour orchestrer l'exécution des nodes
 """
 
 import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from .nodes.node import BaseNode
 from .prompts import DASHBOARD_PROMPT
 from .llm import LLMClient
+from .state import FlowState, RunCheckpoint, new_run_id, serializable_items
+from .runlock import RunLock
+from . import transport
+from . import deadline
+from . import tracing
+from .tracing import Tracer
+from .reporting import ProgressReporter, TTYReporter
 
 class Flow:
     """
     Classe Flow pour orchestrer l'exécution des nodes.
+    
+    Par défaut, les nodes s'exécutent l'un après l'autre dans l'ordre de la
+    liste. Si des dépendances sont déclarées, le flow forme un graphe (DAG) :
+    chaque node démarre dès que ses dépendances ont réussi, et jusqu'à
+    max_workers nodes indépendants s'exécutent en parallèle dans des threads.
+    Après une erreur, plus aucun node ne démarre ; ceux en cours se terminent.
+    
+    Avec un fichier d'état (state_path), un node dont l'empreinte (voir
+    BaseNode.fingerprint) n'a pas changé depuis le run précédent n'est pas
+    ré-exécuté : son résultat enregistré est réutilisé.
+    
+    Avec un répertoire de runs (checkpoint_dir), la partie sérialisable du
+    contexte est enregistrée après chaque node. run(resume=<run_id>) reprend
+    un run interrompu au premier node qui n'avait pas réussi.
+    
+    run(time_budget=...) fixe une échéance globale. Elle se propage, avec le
+    timeout de chaque node, aux délais des appels LLM. Quand elle est
+    dépassée, les nodes optionnels sont sautés et les autres échouent.
+    
+    Si le contexte contient un plan d'exécution (context["execution_plan"],
+    voir ChangeImpactNode), les nodes de sa liste "skip" sont sautés sans
+    être exécutés ; leurs dépendants démarrent normalement.
+    
+    Avec un verrou de dépôt (run_lock, voir RunLock), un run attend la fin
+    du run en cours sur le même dépôt ; si un autre run attend déjà, il est
+    regroupé avec lui et retourne aussitôt avec le statut "coalesced".
+    
+    L'affichage passe par un ProgressReporter (terminal par défaut). Le
+    dashboard final est calculé localement ; la version rédigée par le LLM
+    (llm_dashboard=True) est générée en arrière-plan, sans retarder le run.
     """
     
-    def __init__(self, nodes: List[BaseNode], name: str = "PocketFlow Update Flow", api_key: Optional[str] = None):
+    def __init__(self, nodes: List[BaseNode], name: str = "PocketFlow Update Flow", api_key: Optional[str] = None,
+                 llm_client: Optional[LLMClient] = None, close_transport: bool = False,
+                 dependencies: Optional[Dict[str, List[str]]] = None, max_workers: int = 1,
+                 state_path: Optional[str] = None, checkpoint_dir: Optional[str] = None,
+                 tracer: Optional[Tracer] = None, reporter: Optional[ProgressReporter] = None,
+                 llm_dashboard: bool = False, run_lock: Optional[RunLock] = None):
         """
         Initialise un nouveau flow.
         
@@ -22,28 +68,316 @@ class Flow:
             nodes (List[BaseNode]): Liste des nodes à exécuter dans l'ordre
             name (str, optional): Nom du flow. Par défaut "PocketFlow Update Flow"
             api_key (str, optional): Clé API pour le client LLM
+            llm_client (LLMClient, optional): Client LLM partagé avec les nodes
+            close_transport (bool, optional): Si True, ferme le pool HTTP partagé à la fin de run.
+                                              Désactivé par défaut : d'autres flows du processus peuvent
+                                              utiliser les mêmes connexions (le pool est fermé par le
+                                              point d'entrée, ou à la sortie du processus).
+            dependencies (Dict[str, List[str]], optional): Dépendances par nom de node. Un node absent
+                                                            du dictionnaire n'a pas de dépendance.
+                                                            Si None, chaque node dépend du précédent.
+            max_workers (int, optional): Nombre maximal de nodes exécutés en parallèle
+            state_path (str, optional): Fichier où conserver les empreintes des nodes entre deux runs.
+                                        Si None, tous les nodes sont toujours exécutés.
+            checkpoint_dir (str, optional): Répertoire des points de reprise des runs (ex: .pocketflow/runs)
+            tracer (Tracer, optional): Traceur qui reçoit un span par run, par node, par appel LLM,
+                                       par lecture/écriture de fichier et par commande git
+            reporter (ProgressReporter, optional): Affichage de la progression (par défaut TTYReporter)
+            llm_dashboard (bool, optional): Si True et qu'un client LLM est disponible, un dashboard
+                                            rédigé par le LLM est généré en arrière-plan à la fin
+                                            du run (voir dashboard_future)
+            run_lock (RunLock, optional): Verrou du dépôt : au plus un run en cours et un en attente
         """
         self.nodes = nodes
         self.name = name
         self.api_key = api_key
-        self.llm_client = None
-        if api_key:
+        self.llm_client = llm_client
+        self.close_transport = close_transport
+        self.dependencies = dependencies
+        self.max_workers = max(1, max_workers)
+        self.state_path = state_path
+        self._state: Optional[FlowState] = None
+        self.checkpoint_dir = checkpoint_dir
+        self._checkpoint: Optional[RunCheckpoint] = None
+        self._checkpoint_lock = threading.Lock()
+        self.tracer = tracer
+        self.reporter = reporter if reporter is not None else TTYReporter()
+        self.llm_dashboard = llm_dashboard
+        self.dashboard_future: Optional[Future] = None
+        self.run_lock = run_lock
+        self._requirements = self._resolve_dependencies(nodes, dependencies)
+        self._context_lock = threading.Lock()
+        if api_key and not llm_client:
             self.llm_client = LLMClient(api_key=api_key)
+    
+    @staticmethod
+    def _resolve_dependencies(nodes: List[BaseNode], dependencies: Optional[Dict[str, List[str]]]) -> List[Set[int]]:
+        """
+        Convertit les dépendances en indices de nodes et vérifie l'absence de cycle.
+        
+        Returns:
+            List[Set[int]]: Pour chaque node, les indices des nodes dont il dépend
+        """
+        if dependencies is None:
+            return [set() if i == 0 else {i - 1} for i in range(len(nodes))]
         
-    def run(self, initial_context: Dict[str, Any] = None) -> Dict[str, Any]:
+        indices = {node.name: i for i, node in enumerate(nodes)}
+        requirements = []
+        for node in nodes:
+            required = set()
+            for dependency in dependencies.get(node.name, []):
+                if dependency not in indices:
+                    raise ValueError(f"Dépendance inconnue pour le node {node.name}: {dependency}")
+                required.add(indices[dependency])
+            requirements.append(required)
+        unknown = set(dependencies) - set(indices)
+        if unknown:
+            raise ValueError(f"Dépendances déclarées pour des nodes inconnus: {', '.join(sorted(unknown))}")
+        
+        # Tri topologique pour détecter les cycles
+        resolved: Set[int] = set()
+        while len(resolved) < len(nodes):
+            ready = [i for i in range(len(nodes)) if i not in resolved and requirements[i] <= resolved]
+            if not ready:
+                cycle = [nodes[i].name for i in range(len(nodes)) if i not in resolved]
+                raise ValueError(f"Cycle de dépendances entre les nodes: {', '.join(cycle)}")
+            resolved.update(ready)
+        return requirements
+    
+    def _ready_nodes(self, succeeded: Set[int], started: Set[int]) -> List[int]:
+        """
+        Retourne, dans l'ordre de la liste, les nodes prêts à démarrer.
+        """
+        return [i for i in range(len(self.nodes)) if i not in started and self._requirements[i] <= succeeded]
+        
+    def run(self, initial_context: Dict[str, Any] = None, resume: Optional[str] = None,
+            time_budget: Optional[float] = None) -> Dict[str, Any]:
         """
         Exécute le flow avec le contexte initial donné.
         
         Args:
             initial_context (Dict[str, Any], optional): Contexte initial
+            resume (str, optional): Identifiant du run à reprendre ("last" pour le plus récent)
+            time_budget (float, optional): Durée maximale du run en secondes
             
         Returns:
             Dict[str, Any]: Contexte final après exécution de tous les nodes
         """
+        token = None
+        try:
+            if self.run_lock is not None:
+                token = self.run_lock.acquire(on_wait=self._waiting)
+                if token is None:
+                    return self._coalesced(initial_context)
+            with deadline.scope(time_budget), tracing.activate(self.tracer), tracing.span(self.name, "flow"):
+                return self._run(initial_context, resume)
+        finally:
+            if token is not None:
+                self.run_lock.release(token)
+            if self.close_transport:
+                if self.dashboard_future is None:
+                    transport.close_all()
+                else:
+                    # Le dashboard LLM utilise encore les connexions : fermeture à sa fin
+                    self.dashboard_future.add_done_callback(lambda _: transport.close_all())
+
+    def _run(self, initial_context: Dict[str, Any] = None, resume: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Boucle d'exécution des nodes (voir run).
+        """
         context = initial_context or {}
+        start_time = self._start(context, resume)
+        succeeded = self._resume(context, resume)
+        
+        if self.max_workers == 1:
+            self._run_inline(context, start_time, succeeded)
+        else:
+            self._run_parallel(context, start_time, succeeded)
+        
+        with tracing.span("dashboard", "flow"):
+            dashboard = self._generate_ascii_footer(context)
+        return self._finish(context, start_time, dashboard)
+    
+    def _run_inline(self, context: Dict[str, Any], start_time: float, succeeded: Set[int]) -> None:
+        """
+        Exécute les nodes un par un dans le thread courant.
+        """
+        started = set(succeeded)
+        while True:
+            ready = self._ready_nodes(succeeded, started)
+            if not ready:
+                return
+            index = ready[0]
+            started.add(index)
+            if not self._execute_node(context, self.nodes[index], len(started) - 1, start_time):
+                return
+            succeeded.add(index)
+    
+    def _run_parallel(self, context: Dict[str, Any], start_time: float, succeeded: Set[int]) -> None:
+        """
+        Exécute les nodes prêts en parallèle sur un pool de threads borné.
+        """
+        started = set(succeeded)
+        failed = False
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pocketflow") as executor:
+            running = {}
+            while True:
+                if not failed:
+                    for index in self._ready_nodes(succeeded, started):
+                        if len(running) >= self.max_workers:
+                            break
+                        started.add(index)
+                        # copy_context propage l'échéance du flow au thread
+                        future = executor.submit(contextvars.copy_context().run, self._execute_node,
+                                                 context, self.nodes[index], len(started) - 1, start_time)
+                        running[future] = index
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    if future.result():
+                        succeeded.add(index)
+                    else:
+                        failed = True
+    
+    def _execute_node(self, context: Dict[str, Any], node: BaseNode, index: int, start_time: float) -> bool:
+        """
+        Exécute un node et enregistre son résultat.
+        
+        Returns:
+            bool: True si le node a réussi
+        """
+        with tracing.span(node.name, "node", index=index + 1):
+            node_start_time = self._before_node(context, index, node, start_time)
+            if deadline.expired():
+                return self._record_failure(context, node, deadline.DeadlineExceeded("Budget de temps du flow épuisé"), node_start_time)
+            if self._prune(context, node, node_start_time):
+                return True
+            if self._reuse_result(context, node, node_start_time):
+                return True
+            try:
+                with deadline.scope(getattr(node, "timeout", None)):
+                    result = node.exec(context)
+            except Exception as e:
+                return self._record_failure(context, node, e, node_start_time)
+            self._record_success(context, node, result, time.time() - node_start_time)
+            self._remember_result(context, node, result)
+            return True
+    
+    def _record_failure(self, context: Dict[str, Any], node: BaseNode, error: Exception, node_start_time: float) -> bool:
+        """
+        Enregistre l'échec d'un node. Un node optionnel arrêté par son échéance est sauté.
+        
+        Returns:
+            bool: True si le flow peut continuer (node sauté)
+        """
+        node_elapsed = time.time() - node_start_time
+        if getattr(node, "optional", False) and deadline.is_deadline_error(error):
+            self._record_skipped(context, node, str(error), node_elapsed)
+            return True
+        self._record_error(context, node, error, node_elapsed)
+        return False
+    
+    def _prune(self, context: Dict[str, Any], node: BaseNode, node_start_time: float) -> bool:
+        """
+        Saute un node écarté par le plan d'exécution du contexte.
+        
+        Returns:
+            bool: True si le node a été sauté
+        """
+        plan = context.get("execution_plan") or {}
+        reason = plan.get("skip", {}).get(node.name)
+        if reason is None:
+            return False
+        self._record_skipped(context, node, reason, time.time() - node_start_time, pruned=True)
+        return True
+    
+    def _node_fingerprint(self, context: Dict[str, Any], node: BaseNode) -> Optional[str]:
+        """
+        Calcule l'empreinte d'un node. Une erreur de calcul force son exécution.
+        """
+        try:
+            return node.fingerprint(context)
+        except Exception as e:
+            self.reporter.message(f"⚠️ Empreinte du node {node.name} indisponible: {str(e)}")
+            return None
+    
+    def _reuse_result(self, context: Dict[str, Any], node: BaseNode, node_start_time: float) -> bool:
+        """
+        Réutilise le résultat du run précédent si l'empreinte du node n'a pas changé.
+        
+        Returns:
+            bool: True si le node a été sauté
+        """
+        if self._state is None:
+            return False
+        node_fingerprint = self._node_fingerprint(context, node)
+        entry = self._state.lookup(node.name, node_fingerprint) if node_fingerprint else None
+        if entry is None:
+            return False
+        node.restore(context, entry["result"])
+        tracing.annotate(status="success", reused=True)
+        self._complete_node(context, node, {
+            "name": node.name,
+            "status": "success",
+            "skipped": True,
+            "elapsed": time.time() - node_start_time
+        }, result=entry["result"])
+        return True
+    
+    def _remember_result(self, context: Dict[str, Any], node: BaseNode, result: Any) -> None:
+        """
+        Enregistre l'empreinte (calculée après exécution) et le résultat d'un node.
+        """
+        if self._state is None:
+            return
+        node_fingerprint = self._node_fingerprint(context, node)
+        if node_fingerprint is None or not self._state.record(node.name, node_fingerprint, result):
+            self._state.forget(node.name)
+    
+    def _waiting(self) -> None:
+        self.reporter.message("⏳ Un run est en cours sur ce dépôt : ce run démarrera à sa fin")
+    
+    def _coalesced(self, initial_context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Contexte d'un run regroupé avec le run déjà en attente sur le dépôt (voir run_lock).
+        """
+        self.dashboard_future = None
+        context = initial_context or {}
+        context["flow"] = {
+            "name": self.name,
+            "node_count": len(self.nodes),
+            "current_node": 0,
+            "completed_nodes": [],
+            "status": "coalesced",
+            "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_time": "00:00:00"
+        }
+        self.reporter.message("⏭ Un run attend déjà la fin du run en cours sur ce dépôt : ce run y est regroupé")
+        return context
+    
+    def _start(self, context: Dict[str, Any], resume: Optional[str] = None) -> float:
+        """
+        Initialise les informations du flow dans le contexte.
+        
+        Returns:
+            float: Heure de démarrage
+        """
         start_time = time.time()
+        self.dashboard_future = None
+        self._state = FlowState(self.state_path) if self.state_path else None
+        if resume:
+            if not self.checkpoint_dir:
+                raise ValueError("La reprise d'un run nécessite un répertoire de points de reprise (checkpoint_dir)")
+            self._checkpoint = RunCheckpoint.resolve(self.checkpoint_dir, resume)
+        elif self.checkpoint_dir:
+            self._checkpoint = RunCheckpoint(self.checkpoint_dir, new_run_id())
+        else:
+            self._checkpoint = None
         
         # Ajouter des informations sur le flow au contexte
+        tracing.annotate(nodes=len(self.nodes), max_workers=self.max_workers)
         context["flow"] = {
             "name": self.name,
             "node_count": len(self.nodes),
@@ -53,109 +387,167 @@ class Flow:
             "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "elapsed_time": "00:00:00"
         }
+        if self._checkpoint is not None:
+            context["flow"]["run_id"] = self._checkpoint.run_id
+            tracing.annotate(run_id=self._checkpoint.run_id)
         
-        print(self._generate_ascii_header())
+        self.reporter.flow_started(self, context)
+        return start_time
+    
+    def _resume(self, context: Dict[str, Any], resume: Optional[str]) -> Set[int]:
+        """
+        Restaure le contexte d'un run interrompu.
         
-        # Exécuter chaque node dans l'ordre
-        for i, node in enumerate(self.nodes):
-            node_start_time = time.time()
-            context["flow"]["current_node"] = i + 1
+        Returns:
+            Set[int]: Indices des nodes déjà réussis, qui ne seront pas ré-exécutés
+        """
+        if not resume:
+            return set()
+        saved = self._checkpoint.load()
+        context.update(saved["context"])
+        completed = set(saved["completed"])
+        succeeded = {i for i, node in enumerate(self.nodes) if node.name in completed}
+        for i in sorted(succeeded):
+            context["flow"]["completed_nodes"].append({
+                "name": self.nodes[i].name,
+                "status": "success",
+                "resumed": True,
+                "elapsed": 0.0
+            })
+        self.reporter.message(f"↪ Reprise du run {self._checkpoint.run_id}: {len(succeeded)} node(s) déjà terminé(s)")
+        return succeeded
+    
+    def _save_checkpoint(self, context: Dict[str, Any]) -> None:
+        """
+        Enregistre le point de reprise du run (nodes réussis et contexte sérialisable).
+        """
+        if self._checkpoint is None:
+            return
+        with self._checkpoint_lock:
+            with self._context_lock:
+                status = context["flow"]["status"]
+                completed = [node["name"] for node in context["flow"]["completed_nodes"] if node["status"] == "success"]
+                items = serializable_items(context)
+            try:
+                self._checkpoint.save(self.name, status, completed, items)
+            except OSError as e:
+                self.reporter.message(f"⚠️ Impossible d'enregistrer le point de reprise: {str(e)}")
+    
+    def _before_node(self, context: Dict[str, Any], index: int, node: BaseNode, start_time: float) -> float:
+        """
+        Met à jour la progression avant l'exécution d'un node.
+        
+        Returns:
+            float: Heure de démarrage du node
+        """
+        node_start_time = time.time()
+        with self._context_lock:
+            context["flow"]["current_node"] = index + 1
             context["flow"]["current_node_name"] = node.name
             
             # Mettre à jour le dashboard pendant l'exécution
             elapsed = time.time() - start_time
             context["flow"]["elapsed_time"] = str(timedelta(seconds=int(elapsed)))
-            print(self._generate_ascii_progress(context))
-            
-            print(f"[{i+1}/{len(self.nodes)}] Exécution du node: {node.name}")
-            
-            try:
-                result = node.exec(context)
-                node_elapsed = time.time() - node_start_time
-                context[f"result_{node.name}"] = result
-                context["flow"]["completed_nodes"].append({
-                    "name": node.name,
-                    "status": "success",
-                    "elapsed": node_elapsed
-                })
-                print(f"✅ Node {node.name} exécuté avec succès en {node_elapsed:.2f}s")
-            except Exception as e:
-                node_elapsed = time.time() - node_start_time
-                context["flow"]["completed_nodes"].append({
-                    "name": node.name,
-                    "status": "error",
-                    "error": str(e),
-                    "elapsed": node_elapsed
-                })
+        self.reporter.node_started(self, context, index, node)
+        return node_start_time
+    
+    def _complete_node(self, context: Dict[str, Any], node: BaseNode, entry: Dict[str, Any], **results: Any) -> None:
+        """
+        Ajoute l'entrée d'un node terminé (et son résultat éventuel) au contexte,
+        prévient l'afficheur et enregistre le point de reprise.
+        """
+        with self._context_lock:
+            if "result" in results:
+                context[f"result_{node.name}"] = results["result"]
+            context["flow"]["completed_nodes"].append(entry)
+            if entry["status"] == "error":
                 context["flow"]["status"] = "error"
-                print(f"❌ Erreur lors de l'exécution du node {node.name}: {str(e)}")
-                break
-        
-        # Finaliser le contexte
+        self.reporter.node_finished(self, context, node, entry)
+        self._save_checkpoint(context)
+    
+    def _record_success(self, context: Dict[str, Any], node: BaseNode, result: Any, node_elapsed: float) -> None:
+        tracing.annotate(status="success")
+        self._complete_node(context, node, {
+            "name": node.name,
+            "status": "success",
+            "elapsed": node_elapsed
+        }, result=result)
+    
+    def _record_skipped(self, context: Dict[str, Any], node: BaseNode, reason: str, node_elapsed: float,
+                        pruned: bool = False) -> None:
+        tracing.annotate(status="skipped", reason=reason)
+        entry = {
+            "name": node.name,
+            "status": "skipped",
+            "reason": reason,
+            "elapsed": node_elapsed
+        }
+        if pruned:
+            entry["pruned"] = True
+        self._complete_node(context, node, entry, result=None)
+    
+    def _record_error(self, context: Dict[str, Any], node: BaseNode, error: Exception, node_elapsed: float) -> None:
+        tracing.annotate(status="error", error=str(error))
+        self._complete_node(context, node, {
+            "name": node.name,
+            "status": "error",
+            "error": str(error),
+            "elapsed": node_elapsed
+        })
+    
+    def _finish(self, context: Dict[str, Any], start_time: float, dashboard: str) -> Dict[str, Any]:
+        """
+        Finalise le statut, le temps total et le dashboard du flow.
+        """
         if context["flow"]["status"] != "error":
             context["flow"]["status"] = "completed"
         
+        if self._state is not None:
+            try:
+                self._state.save()
+            except OSError as e:
+                self.reporter.message(f"⚠️ Impossible d'enregistrer l'état du flow: {str(e)}")
+        
+        self._save_checkpoint(context)
+        if self._checkpoint is not None:
+            self._checkpoint.prune()
+        
         # Calculer le temps total
         total_elapsed = time.time() - start_time
         context["flow"]["elapsed_time"] = str(timedelta(seconds=int(total_elapsed)))
         context["flow"]["total_elapsed_seconds"] = total_elapsed
         
-        # Générer le dashboard final
-        dashboard = self._generate_ascii_footer(context)
-        print(dashboard)
+        # Afficher le dashboard final
         context["flow"]["dashboard"] = dashboard
+        self.reporter.flow_finished(self, context, dashboard)
+        self._start_llm_dashboard(context)
         
         return context
     
-    def _generate_ascii_progress(self, context: Dict[str, Any]) -> str:
+    def _start_llm_dashboard(self, context: Dict[str, Any]) -> None:
         """
-        Génère une barre de progression ASCII pour le dashboard.
-        
-        Args:
-            context (Dict[str, Any]): Contexte d'exécution
-            
-        Returns:
-            str: Barre de progression ASCII
+        Lance la génération du dashboard par le LLM dans un thread d'arrière-plan,
+        si elle est demandée. Le résultat est disponible via self.dashboard_future
+        (None en cas d'échec) et copié dans context["flow"]["llm_dashboard"].
         """
-        current = context["flow"]["current_node"]
-        total = context["flow"]["node_count"]
-        current_node_name = context["flow"].get("current_node_name", "")
-        elapsed = context["flow"]["elapsed_time"]
+        if not (self.llm_dashboard and self.llm_client):
+            return
+        snapshot = {"flow": dict(context["flow"], completed_nodes=list(context["flow"]["completed_nodes"]))}
+        future: Future = Future()
         
-        # Calculer la progression
-        progress_width = 40
-        filled_width = int(progress_width * (current - 1) / total) if total > 0 else 0
-        remaining_width = progress_width - filled_width
-        
-        # Générer la barre de progression
-        progress_bar = "["
-        progress_bar += "=" * filled_width
-        progress_bar += ">" if current <= total else ""
-        progress_bar += " " * (remaining_width - (1 if current <= total else 0))
-        progress_bar += "]"
-        
-        # Générer le statut des nodes
-        node_status = ""
-        for i, node in enumerate(self.nodes):
-            if i + 1 < current:
-                node_status += f"✅ {node.name}\n"
-            elif i + 1 == current:
-                node_status += f"⏳ {node.name} (en cours)\n"
-            else:
-                node_status += f"⏲ {node.name}\n"
+        def generate() -> None:
+            try:
+                dashboard = self._generate_llm_dashboard(snapshot)
+            except Exception as e:
+                self.reporter.message(f"Erreur lors de la génération du dashboard via LLM: {str(e)}")
+                dashboard = None
+            if dashboard:
+                context["flow"]["llm_dashboard"] = dashboard
+            future.set_result(dashboard or None)
         
-        return f"""
-+-------------------------------------------------------+
-| {self.name} - Progression                       |
-+-------------------------------------------------------+
-| {progress_bar} {current}/{total} |
-| Temps écoulé: {elapsed}                                |
-| Node en cours: {current_node_name}                     |
-+-------------------------------------------------------+
-| Statut des nodes:                                     |
-{node_status}
-+-------------------------------------------------------+
-"""
+        threading.Thread(target=contextvars.copy_context().run, args=(generate,),
+                         name=f"{self.name} dashboard", daemon=True).start()
+        self.dashboard_future = future
     
     def _generate_ascii_header(self) -> str:
         """
@@ -172,9 +564,48 @@ class Flow:
 +-------------------------------------------------------+
 """
     
+    def _generate_llm_dashboard(self, context: Dict[str, Any]) -> str:
+        """
+        Génère un dashboard plus riche via le client LLM (voir llm_dashboard).
+        
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+            
+        Returns:
+            str: Dashboard rédigé par le LLM
+        """
+        # Préparer les données pour le prompt
+        flow_name = self.name
+        flow_status = context["flow"]["status"]
+        completed_nodes = len(context["flow"]["completed_nodes"])
+        total_nodes = context["flow"]["node_count"]
+        completed_node_names = ", ".join([node["name"] for node in context["flow"]["completed_nodes"]])
+        current_node = context["flow"].get("current_node_name", "Aucun")
+        elapsed_time = context["flow"]["elapsed_time"]
+        
+        # Récupérer les erreurs
+        errors = []
+        for node in context["flow"]["completed_nodes"]:
+            if node["status"] == "error":
+                errors.append(f"{node['name']}: {node.get('error', 'Erreur inconnue')}")
+        
+        # Générer le dashboard via LLM
+        prompt = DASHBOARD_PROMPT.format(
+            flow_name=flow_name,
+            flow_status=flow_status,
+            completed_nodes=completed_nodes,
+            total_nodes=total_nodes,
+            completed_node_names=completed_node_names,
+            current_node=current_node,
+            errors="\n".join(errors) if errors else "Aucune",
+            elapsed_time=elapsed_time
+        )
+        
+        return self.llm_client.generate_text(prompt)
+    
     def _generate_ascii_footer(self, context: Dict[str, Any]) -> str:
         """
-        Génère le pied de page ASCII pour le dashboard.
+        Génère le pied de page ASCII pour le dashboard, sans appel réseau.
         
         Args:
             context (Dict[str, Any]): Contexte d'exécution
@@ -182,43 +613,6 @@ class Flow:
         Returns:
             str: Pied de page ASCII
         """
-        # Si un client LLM est disponible, utiliser le prompt pour générer un dashboard plus riche
-        if self.llm_client:
-            try:
-                # Préparer les données pour le prompt
-                flow_name = self.name
-                flow_status = context["flow"]["status"]
-                completed_nodes = len(context["flow"]["completed_nodes"])
-                total_nodes = context["flow"]["node_count"]
-                completed_node_names = ", ".join([node["name"] for node in context["flow"]["completed_nodes"]])
-                current_node = context["flow"].get("current_node_name", "Aucun")
-                elapsed_time = context["flow"]["elapsed_time"]
-                
-                # Récupérer les erreurs
-                errors = []
-                for node in context["flow"]["completed_nodes"]:
-                    if node["status"] == "error":
-                        errors.append(f"{node['name']}: {node.get('error', 'Erreur inconnue')}")
-                
-                # Générer le dashboard via LLM
-                prompt = DASHBOARD_PROMPT.format(
-                    flow_name=flow_name,
-                    flow_status=flow_status,
-                    completed_nodes=completed_nodes,
-                    total_nodes=total_nodes,
-                    completed_node_names=completed_node_names,
-                    current_node=current_node,
-                    errors="\n".join(errors) if errors else "Aucune",
-                    elapsed_time=elapsed_time
-                )
-                
-                dashboard = self.llm_client.generate_text(prompt)
-                if dashboard:
-                    return dashboard
-            except Exception as e:
-                print(f"Erreur lors de la génération du dashboard via LLM: {str(e)}")
-        
-        # Fallback: générer un dashboard simple
         status_emoji = "✅" if context["flow"]["status"] == "completed" else "❌"
         status_text = "Terminé" if context["flow"]["status"] == "completed" else "Erreur"
         elapsed = context["flow"]["elapsed_time"]
@@ -269,3 +663,175 @@ class Flow:
 | Prochaine étape: Tests d'intégration & Amélioration LLM  |
 +-------------------------------------------------------+{error_section}
 """
+
+
+class AsyncFlow(Flow):
+    """
+    Flow exécuté sur une boucle asyncio.
+    
+    Les nodes sont exécutés via leur méthode aexec, dans le même ordre (ou le
+    même graphe de dépendances) que Flow : pendant qu'un node attend le LLM,
+    la boucle peut faire avancer les autres nodes prêts et d'autres flows
+    (voir run_flows_concurrently).
+    """
+    
+    def __init__(self, nodes: List[BaseNode], name: str = "PocketFlow Update Flow", api_key: Optional[str] = None,
+                 llm_client: Optional[LLMClient] = None, close_transport: bool = False,
+                 dependencies: Optional[Dict[str, List[str]]] = None, max_workers: int = 1,
+                 state_path: Optional[str] = None, checkpoint_dir: Optional[str] = None,
+                 tracer: Optional[Tracer] = None, reporter: Optional[ProgressReporter] = None,
+                 llm_dashboard: bool = False, run_lock: Optional[RunLock] = None):
+        """
+        Initialise un nouveau flow asynchrone.
+        
+        Args:
+            nodes (List[BaseNode]): Liste des nodes à exécuter dans l'ordre
+            name (str, optional): Nom du flow. Par défaut "PocketFlow Update Flow"
+            api_key (str, optional): Clé API pour le client LLM
+            llm_client (LLMClient, optional): Client LLM partagé avec les nodes
+            close_transport (bool, optional): Si True, ferme les clients HTTP asynchrones de la boucle à la fin
+                                              de arun. Désactivé par défaut : d'autres flows peuvent partager
+                                              la boucle. run ferme toujours ceux de la boucle qu'il a créée.
+            dependencies (Dict[str, List[str]], optional): Dépendances par nom de node (voir Flow)
+            max_workers (int, optional): Nombre maximal de nodes exécutés simultanément
+            state_path (str, optional): Fichier d'état des empreintes (voir Flow)
+            checkpoint_dir (str, optional): Répertoire des points de reprise des runs (voir Flow)
+            tracer (Tracer, optional): Traceur des spans du run (voir Flow)
+            reporter (ProgressReporter, optional): Affichage de la progression (voir Flow)
+            llm_dashboard (bool, optional): Dashboard rédigé par le LLM en arrière-plan (voir Flow)
+            run_lock (RunLock, optional): Verrou du dépôt (voir Flow)
+        """
+        super().__init__(nodes, name=name, api_key=api_key, llm_client=llm_client, close_transport=close_transport,
+                         dependencies=dependencies, max_workers=max_workers, state_path=state_path,
+                         checkpoint_dir=checkpoint_dir, tracer=tracer, reporter=reporter,
+                         llm_dashboard=llm_dashboard, run_lock=run_lock)
+    
+    def run(self, initial_context: Dict[str, Any] = None, resume: Optional[str] = None,
+            time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Exécute le flow dans une nouvelle boucle d'événements.
+        """
+        async def main() -> Dict[str, Any]:
+            try:
+                return await self.arun(initial_context, resume, time_budget)
+            finally:
+                # Les clients asynchrones sont liés à la boucle, qui ne survit pas au run
+                await transport.aclose_all()
+        
+        return asyncio.run(main())
+    
+    async def arun(self, initial_context: Dict[str, Any] = None, resume: Optional[str] = None,
+                   time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Exécute le flow de façon asynchrone avec le contexte initial donné.
+        
+        Args:
+            initial_context (Dict[str, Any], optional): Contexte initial
+            resume (str, optional): Identifiant du run à reprendre (voir Flow.run)
+            time_budget (float, optional): Durée maximale du run en secondes. Les nodes en cours
+                                           sont annulés quand elle est dépassée.
+            
+        Returns:
+            Dict[str, Any]: Contexte final après exécution de tous les nodes
+        """
+        token = None
+        try:
+            if self.run_lock is not None:
+                # L'attente du run en cours ne bloque pas la boucle d'événements
+                token = await asyncio.get_running_loop().run_in_executor(None, self.run_lock.acquire, self._waiting)
+                if token is None:
+                    return self._coalesced(initial_context)
+            with deadline.scope(time_budget), tracing.activate(self.tracer), tracing.span(self.name, "flow"):
+                return await self._arun(initial_context, resume)
+        finally:
+            if token is not None:
+                self.run_lock.release(token)
+            if self.close_transport:
+                await transport.aclose_all()
+    
+    async def _arun(self, initial_context: Dict[str, Any] = None, resume: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Boucle d'exécution asynchrone des nodes (voir arun).
+        """
+        context = initial_context or {}
+        start_time = self._start(context, resume)
+        
+        succeeded = self._resume(context, resume)
+        started = set(succeeded)
+        failed = False
+        running = {}
+        while True:
+            if not failed:
+                for index in self._ready_nodes(succeeded, started):
+                    if len(running) >= self.max_workers:
+                        break
+                    started.add(index)
+                    task = asyncio.ensure_future(self._aexecute_node(context, self.nodes[index], len(started) - 1, start_time))
+                    running[task] = index
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = running.pop(task)
+                if task.result():
+                    succeeded.add(index)
+                else:
+                    failed = True
+        
+        with tracing.span("dashboard", "flow"):
+            dashboard = self._generate_ascii_footer(context)
+        return self._finish(context, start_time, dashboard)
+    
+    async def _aexecute_node(self, context: Dict[str, Any], node: BaseNode, index: int, start_time: float) -> bool:
+        """
+        Exécute un node de façon asynchrone et enregistre son résultat.
+        """
+        with tracing.span(node.name, "node", index=index + 1):
+            node_start_time = self._before_node(context, index, node, start_time)
+            if deadline.expired():
+                return self._record_failure(context, node, deadline.DeadlineExceeded("Budget de temps du flow épuisé"), node_start_time)
+            if self._prune(context, node, node_start_time):
+                return True
+            if self._state is not None and await asyncio.to_thread(self._reuse_result, context, node, node_start_time):
+                return True
+            try:
+                with deadline.scope(getattr(node, "timeout", None)):
+                    # Contrairement aux threads, une coroutine peut être annulée à l'échéance
+                    try:
+                        result = await asyncio.wait_for(node.aexec(context), deadline.remaining())
+                    except asyncio.TimeoutError:
+                        raise deadline.DeadlineExceeded(f"Délai dépassé pour le node {node.name}")
+            except Exception as e:
+                return self._record_failure(context, node, e, node_start_time)
+            self._record_success(context, node, result, time.time() - node_start_time)
+            if self._state is not None:
+                await asyncio.to_thread(self._remember_result, context, node, result)
+            return True
+
+
+async def run_flows_concurrently(flows: List[AsyncFlow], contexts: List[Dict[str, Any]] = None,
+                                 max_concurrency: int = 10) -> List[Dict[str, Any]]:
+    """
+    Exécute plusieurs flows asynchrones en parallèle sur la boucle courante.
+    
+    Args:
+        flows (List[AsyncFlow]): Flows à exécuter (un par dépôt par exemple)
+        contexts (List[Dict[str, Any]], optional): Contexte initial de chaque flow
+        max_concurrency (int, optional): Nombre maximal de flows actifs simultanément
+        
+    Returns:
+        List[Dict[str, Any]]: Contexte final de chaque flow, dans le même ordre
+    """
+    contexts = contexts or [{} for _ in flows]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(flow: AsyncFlow, context: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await flow.arun(context)
+    
+    try:
+        for flow in flows:
+            flow.close_transport = False
+        return await asyncio.gather(*(run_one(flow, context) for flow, context in zip(flows, contexts)))
+    finally:
+        await transport.aclose_all()
@@ -5,22 +5,37 @@ Définition du flow PocketFlow pour la mise à jour automatique des documents
 import os
 from typing import Dict, Any, List
 
-from .flow import Flow
+from .flow import Flow, AsyncFlow
+from .llm import LLMClient
+from .cache import LLMCache
+from .config import get_setting
+from .tracing import Tracer
+from .state import CommitCursor
+from .runlock import RunLock
+from .dmlog import DMLogStore
 from .nodes.dm_log_nodes import (
     GitCommitNode,
     DMLogParserNode,
+    DMLogSummaryNode,
     DMLogLLMNode,
     DMLogUpdateNode,
     GitPushNode
 )
 from .nodes.doc_update_nodes import (
+    ProjectScanNode,
+    ChangeImpactNode,
+    DocumentUpdateNode,
     ModelConceptUpdateNode,
     ProjectStructureUpdateNode,
     TasksUpdateNode,
     RequirementsUpdateNode
 )
 
-def create_full_update_flow(api_key: str = None, provider: str = "deepseek", test_mode: bool = False) -> Flow:
+def create_full_update_flow(api_key: str = None, provider: str = "deepseek", test_mode: bool = False,
+                            repo_dir: str = None, async_flow: bool = False, use_cache: bool = True,
+                            stream: bool = False, max_workers: int = None, incremental: bool = True,
+                            tracer: Tracer = None, sections: bool = None, chunk_tokens: int = None,
+                            impact: bool = None, run_lock: bool = None) -> Flow:
     """
     Crée et configure le flow complet pour la mise à jour des documents.
 
@@ -29,40 +44,149 @@ def create_full_update_flow(api_key: str = None, provider: str = "deepseek", tes
                                  dans les variables d'environnement correspondantes au provider.
         provider (str, optional): Le fournisseur de l'API ('deepseek', 'openai', 'gemini').
         test_mode (bool, optional): Si True, active le mode test pour les appels LLM.
+        repo_dir (str, optional): Racine du dépôt à documenter (par défaut le répertoire courant).
+        async_flow (bool, optional): Si True, retourne un AsyncFlow (voir AsyncFlow.arun).
+        use_cache (bool, optional): Si False, désactive le cache disque des réponses LLM.
+        stream (bool, optional): Si True, les documents sont écrits au fil du streaming LLM.
+        max_workers (int, optional): Nombre de nodes exécutés en parallèle (par défaut "flow.maxWorkers").
+        incremental (bool, optional): Si True, les nodes dont les entrées n'ont pas changé depuis
+                                      le run précédent sont sautés (état dans .pocketflow/state.json).
+        tracer (Tracer, optional): Traceur qui collecte les spans du run (voir tracing).
+        sections (bool, optional): Si True, les documents ne sont mis à jour que dans les sections
+                                   concernées par les fichiers du dernier commit
+                                   (par défaut "flow.sectionUpdates").
+        chunk_tokens (int, optional): Taille (en tokens estimés) au-delà de laquelle un document réécrit
+                                      en entier est traité par morceaux en parallèle
+                                      (par défaut "flow.chunkTokens", 0 pour désactiver).
+        impact (bool, optional): Si True, seuls les documents concernés par les fichiers modifiés
+                                 sont mis à jour (voir ChangeImpactNode, par défaut "impact.enabled").
+        run_lock (bool, optional): Si True, au plus un run s'exécute à la fois sur le dépôt et un seul
+                                   attend ; les suivants lui sont regroupés (voir RunLock,
+                                   par défaut "flow.runLock").
+
+    Les points de reprise des runs sont enregistrés dans .pocketflow/runs (voir Flow.run(resume=...)).
+    Les fichiers du projet sont inventoriés une fois par run (cache dans .pocketflow/scan.json).
+    Le dernier commit documenté est enregistré dans .pocketflow/commits.json : le run suivant
+    traite en une fois tous les commits arrivés depuis.
 
     Returns:
         Flow: Le flow configuré.
     """
+    # Un seul client LLM (et donc un seul pool de connexions) pour tous les nodes
+    cache = LLMCache.from_config() if use_cache else None
+    llm_client = LLMClient(api_key=api_key, provider=provider, test_mode=test_mode, cache=cache)
+
+    if sections is None:
+        sections = get_setting("flow.sectionUpdates", True)
+    if chunk_tokens is None:
+        chunk_tokens = get_setting("flow.chunkTokens")
+    if impact is None:
+        impact = get_setting("impact.enabled", True)
+    if run_lock is None:
+        run_lock = get_setting("flow.runLock", True)
+
+    document_nodes = ["model_concept_update", "project_structure_update", "tasks_update", "requirements_update"]
+
+    def doc(name: str) -> str:
+        return os.path.join(repo_dir, "docs", name) if repo_dir else f"docs/{name}"
+
+    # Journal stocké en segments (docs/dm-log.d), docs/dm-log.md en est la vue lisible,
+    # régénérée toutes les "dmLog.renderEvery" entrées ou par --render-dm-log.
+    # Le prompt ne reçoit que les dernières entrées et le résumé des précédentes.
+    dm_log_store = DMLogStore(doc("dm-log.md"))
+    recent_entries = get_setting("dmLog.recentEntries", 5)
+    state_dir = os.path.join(repo_dir or ".", ".pocketflow")
+    # Commits arrivés depuis le dernier run : une seule entrée DM-Log pour tout un push
+    cursor = CommitCursor(os.path.join(state_dir, "commits.json"))
+
     nodes = [
         # 1. DM-Log
-        GitCommitNode(),
-        DMLogParserNode(path="docs/dm-log.md"),
-        DMLogLLMNode(api_key=api_key, provider=provider, test_mode=test_mode),
-        DMLogUpdateNode(path="docs/dm-log.md"),
+        GitCommitNode(cwd=repo_dir, cursor=cursor),
+        DMLogParserNode(path=doc("dm-log.md"), store=dm_log_store, recent_entries=recent_entries),
+        DMLogSummaryNode(dm_log_store, window=recent_entries, llm_client=llm_client),
+        DMLogLLMNode(llm_client=llm_client),
+        DMLogUpdateNode(path=doc("dm-log.md"), store=dm_log_store, cursor=cursor,
+                        render_every=get_setting("dmLog.renderEvery", 20)),
+
+        # Plan d'exécution : les documents que les commits ne concernent pas sont sautés
+        ChangeImpactNode(documents=document_nodes, cwd=repo_dir),
+
+        # Inventaire des fichiers du projet, partagé par les documents
+        ProjectScanNode(root=repo_dir, cache_path=os.path.join(state_dir, "scan.json"),
+                        max_files=get_setting("scanner.maxFiles", 400),
+                        max_workers=get_setting("scanner.maxWorkers", 8)),
 
         # 2. MCD & Garde-fous
-        ModelConceptUpdateNode(path="docs/mcd-guardrails.md", api_key=api_key, provider=provider),
+        ModelConceptUpdateNode(path=doc("mcd-guardrails.md"), llm_client=llm_client, stream=stream,
+                               sections=sections, chunk_tokens=chunk_tokens),
 
         # 3. Structure du projet
-        ProjectStructureUpdateNode(path="docs/project-structure.md", api_key=api_key, provider=provider),
+        ProjectStructureUpdateNode(path=doc("project-structure.md"), llm_client=llm_client, stream=stream,
+                                   sections=sections, chunk_tokens=chunk_tokens),
 
         # 4. Tâches
-        TasksUpdateNode(path="docs/tasks.md", api_key=api_key, provider=provider),
+        TasksUpdateNode(path=doc("tasks.md"), llm_client=llm_client, stream=stream,
+                        sections=sections, chunk_tokens=chunk_tokens),
 
         # 5. Exigences
-        RequirementsUpdateNode(path="docs/requirements.md", api_key=api_key, provider=provider),
+        RequirementsUpdateNode(path=doc("requirements.md"), llm_client=llm_client, stream=stream,
+                               sections=sections, chunk_tokens=chunk_tokens),
 
-        # 6. Git Push (tous les fichiers modifiés)
+        # 6. Git Push (tous les fichiers modifiés, relatifs au dépôt)
         GitPushNode(files=[
             "docs/dm-log.md",
+            "docs/dm-log.d",
             "docs/mcd-guardrails.md",
             "docs/project-structure.md",
             "docs/tasks.md",
             "docs/requirements.md"
-        ])
+        ], cwd=repo_dir, cursor=cursor)
     ]
 
-    return Flow(nodes)
+    # Les quatre documents sont indépendants : ils s'exécutent en parallèle,
+    # en même temps que la chaîne DM-Log. GitPushNode attend toutes les branches.
+    # Ils attendent l'inventaire des fichiers et, en mode sections, les fichiers
+    # modifiés lus par GitCommitNode ; avec le routage, le plan d'exécution.
+    dependencies = {
+        "dm_log_parser": ["git_commit"],
+        "dm_log_llm": ["dm_log_parser", "dm_log_summary"],
+        "dm_log_update": ["dm_log_llm"],
+        "git_push": [
+            "dm_log_update",
+            "model_concept_update",
+            "project_structure_update",
+            "tasks_update",
+            "requirements_update"
+        ]
+    }
+    dependencies["change_impact"] = ["git_commit"]
+    for name in document_nodes:
+        dependencies[name] = ["project_scan"]
+        if sections:
+            dependencies[name].append("git_commit")
+        if impact:
+            dependencies[name].append("change_impact")
+    if not impact:
+        nodes = [node for node in nodes if node.name != "change_impact"]
+        del dependencies["change_impact"]
+    if max_workers is None:
+        max_workers = get_setting("flow.maxWorkers", 4)
+
+    # Chaque node est borné par "flow.nodeTimeout". Les quatre documents sont
+    # optionnels : si le budget de temps du run est épuisé, ils sont sautés
+    # et GitPushNode committe ce qui a déjà été mis à jour.
+    node_timeout = get_setting("flow.nodeTimeout")
+    for node in nodes:
+        node.timeout = node_timeout
+        if isinstance(node, DocumentUpdateNode):
+            node.optional = True
+
+    state_path = os.path.join(state_dir, "state.json") if incremental else None
+
+    flow_class = AsyncFlow if async_flow else Flow
+    return flow_class(nodes, llm_client=llm_client, dependencies=dependencies, max_workers=max_workers,
+                      state_path=state_path, checkpoint_dir=os.path.join(state_dir, "runs"), tracer=tracer,
+                      run_lock=RunLock.for_repo(repo_dir or ".") if run_lock else None)
 
 def create_dm_log_update_flow() -> Flow:
     """
@@ -73,15 +197,21 @@ def create_dm_log_update_flow() -> Flow:
     """
     api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     
+    dm_log_store = DMLogStore("docs/dm-log.md")
+    recent_entries = get_setting("dmLog.recentEntries", 5)
+    cursor = CommitCursor(".pocketflow/commits.json")
+    
     nodes = [
-        GitCommitNode(),
-        DMLogParserNode(path="docs/dm-log.md"),
+        GitCommitNode(cursor=cursor),
+        DMLogParserNode(path="docs/dm-log.md", store=dm_log_store, recent_entries=recent_entries),
+        DMLogSummaryNode(dm_log_store, window=recent_entries, api_key=api_key, model_id="gemini-1.5-flash"),
         DMLogLLMNode(api_key=api_key, model_id="gemini-1.5-flash"),
-        DMLogUpdateNode(path="docs/dm-log.md"),
-        GitPushNode(files=["docs/dm-log.md"])
+        DMLogUpdateNode(path="docs/dm-log.md", store=dm_log_store, cursor=cursor,
+                        render_every=get_setting("dmLog.renderEvery", 20)),
+        GitPushNode(files=["docs/dm-log.md", "docs/dm-log.d"], cursor=cursor)
     ]
     
-    return Flow(nodes)
+    return Flow(nodes, run_lock=RunLock.for_repo(".") if get_setting("flow.runLock", True) else None)
 
 def create_mcd_update_flow() -> Flow:
     """
@@ -0,0 +1,193 @@
+"""
+Accès à Git : opérations groupées, lecture d'objets par un processus persistant, temps par opération
+"""
+
+import os
+import time
+import atexit
+import subprocess
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from . import tracing
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+@contextmanager
+def _timed(operation: str, **attributes: Any) -> Iterator[None]:
+    """
+    Mesure une opération Git (span "git <opération>" et cumul dans stats()).
+    """
+    start = time.perf_counter()
+    try:
+        with tracing.span(f"git {operation}", "git", **attributes):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _stats_lock:
+            entry = _stats.setdefault(operation, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += elapsed
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """
+    Nombre d'appels et durée cumulée de chaque opération Git depuis le début du processus.
+
+    Returns:
+        Dict[str, Dict[str, float]]: {"add": {"count": 1, "seconds": 0.02}, ...}
+    """
+    with _stats_lock:
+        return {operation: dict(entry) for operation, entry in _stats.items()}
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+class GitRepo:
+    """
+    Opérations Git sur un dépôt. Les fichiers sont indexés en un seul appel
+    ("git add -- f1 f2 ...") et les objets (arbres, commits) sont lus par un
+    unique processus "git cat-file --batch" démarré au premier besoin et
+    réutilisé jusqu'à close().
+    """
+
+    def __init__(self, cwd: str = None):
+        """
+        Args:
+            cwd (str, optional): Répertoire du dépôt (par défaut le répertoire courant)
+        """
+        self.cwd = cwd
+        self._batch: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def output(self, operation: str, *args: str) -> str:
+        """
+        Exécute "git <opération> <args>" et retourne sa sortie.
+
+        Raises:
+            subprocess.CalledProcessError: Si la commande échoue
+        """
+        with _timed(operation):
+            return subprocess.check_output(["git", operation, *args], text=True, cwd=self.cwd)
+
+    def add(self, files: List[str]) -> None:
+        """
+        Ajoute les fichiers à l'index en un seul appel.
+        """
+        if not files:
+            return
+        with _timed("add", files=len(files)):
+            subprocess.check_call(["git", "add", "--", *files], cwd=self.cwd)
+
+    def has_staged_changes(self, files: List[str]) -> bool:
+        """
+        Indique si l'index diffère de HEAD pour ces fichiers.
+        """
+        with _timed("diff"):
+            return subprocess.call(["git", "diff", "--cached", "--quiet", "--", *files], cwd=self.cwd) != 0
+
+    def commit(self, message: str) -> None:
+        with _timed("commit"):
+            subprocess.check_call(["git", "commit", "-m", message], cwd=self.cwd)
+
+    def push(self) -> None:
+        with _timed("push"):
+            subprocess.check_call(["git", "push"], cwd=self.cwd)
+
+    def read_object(self, spec: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Lit un objet par le processus "git cat-file --batch" du dépôt.
+
+        Args:
+            spec (str): Objet à lire (ex: "HEAD", "HEAD^{tree}", identifiant)
+
+        Returns:
+            Optional[Tuple[str, bytes]]: Type et contenu de l'objet, ou None s'il n'existe pas
+        """
+        with self._lock, _timed("cat-file"):
+            if self._batch is None or self._batch.poll() is not None:
+                self._batch = subprocess.Popen(["git", "cat-file", "--batch"], cwd=self.cwd, stdin=subprocess.PIPE,
+                                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            self._batch.stdin.write(spec.encode("utf8") + b"\n")
+            self._batch.stdin.flush()
+            header = self._batch.stdout.readline().decode("utf8").split()
+            if len(header) != 3:
+                if not header:
+                    # Processus terminé (pas un dépôt Git...)
+                    self._close()
+                return None
+            _, kind, size = header
+            data = self._batch.stdout.read(int(size))
+            self._batch.stdout.read(1)
+            return kind, data
+
+    def tree(self, spec: str = "HEAD") -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Entrées de premier niveau de l'arbre d'un commit, lues sans processus supplémentaire.
+
+        Returns:
+            Optional[List[Tuple[str, str, str]]]: (mode, nom, identifiant) par entrée, ou None
+                                                  si l'objet n'existe pas
+        """
+        found = self.read_object(f"{spec}^{{tree}}")
+        if found is None:
+            return None
+        _, data = found
+        entries, position = [], 0
+        while position < len(data):
+            space = data.index(b" ", position)
+            nul = data.index(b"\0", space)
+            mode = data[position:space].decode("ascii")
+            name = data[space + 1:nul].decode("utf8", errors="surrogateescape")
+            entries.append((mode, name, data[nul + 1:nul + 21].hex()))
+            position = nul + 21
+        return entries
+
+    def _close(self) -> None:
+        if self._batch is not None:
+            try:
+                self._batch.stdin.close()
+                self._batch.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._batch.kill()
+            self._batch = None
+
+    def close(self) -> None:
+        """
+        Arrête le processus "git cat-file --batch".
+        """
+        with self._lock:
+            self._close()
+
+
+_repos: Dict[str, GitRepo] = {}
+_repos_lock = threading.Lock()
+
+
+def repo(cwd: str = None) -> GitRepo:
+    """
+    Retourne le GitRepo partagé d'un répertoire (un seul processus cat-file par dépôt).
+    """
+    key = os.path.abspath(cwd or ".")
+    with _repos_lock:
+        if key not in _repos:
+            _repos[key] = GitRepo(cwd)
+        return _repos[key]
+
+
+@atexit.register
+def close_all() -> None:
+    """
+    Arrête les processus "git cat-file --batch" de tous les dépôts.
+    """
+    with _repos_lock:
+        repos = list(_repos.values())
+        _repos.clear()
+    for git_repo in repos:
+        git_repo.close()
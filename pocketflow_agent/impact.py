@@ -0,0 +1,107 @@
+"""
+Routage des mises à jour : quels documents sont concernés par les fichiers modifiés
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from .config import get_setting
+from .scanner import compile_glob
+
+# Statuts de "git diff --name-status" (R et C sont suivis d'un score de similarité)
+STATUSES = {"A": "added", "M": "modified", "D": "deleted", "R": "renamed", "C": "copied", "T": "modified"}
+
+
+def parse_name_status(output: str) -> List[Dict[str, str]]:
+    """
+    Lit la sortie de "git diff --name-status".
+
+    Returns:
+        List[Dict[str, str]]: {"status": "added"|"modified"|..., "path": ...} par fichier ;
+                              un renommage donne aussi "old_path"
+    """
+    changes = []
+    for line in output.splitlines():
+        fields = line.split("\t")
+        if len(fields) < 2 or not fields[0]:
+            continue
+        status = STATUSES.get(fields[0][0], "modified")
+        change = {"status": status, "path": fields[-1]}
+        if len(fields) > 2:
+            change["old_path"] = fields[1]
+        changes.append(change)
+    return changes
+
+
+class ImpactRules:
+    """
+    Associe des motifs de chemins (voir scanner.compile_glob) aux documents
+    concernés. Un fichier modifié touche les documents de toutes les règles
+    qui lui correspondent ; une règle peut se limiter à certains statuts
+    (ex: ["added", "deleted", "renamed"] pour la structure du projet).
+    Les fichiers ignorés ne touchent aucun document ; ceux qu'aucune règle ne
+    couvre (chemin et statut) touchent les documents par défaut.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], ignore: List[str] = None, default: List[str] = None):
+        """
+        Args:
+            rules (List[Dict[str, Any]]): Règles {"paths": [motifs], "documents": [noms de nodes],
+                                          "status": [statuts], optionnel}
+            ignore (List[str], optional): Motifs des fichiers sans effet sur les documents
+            default (List[str], optional): Documents touchés par un fichier qu'aucune règle ne couvre
+        """
+        self.rules: List[Tuple[list, List[str], Optional[set]]] = [
+            ([compile_glob(pattern) for pattern in rule["paths"]], list(rule["documents"]),
+             set(rule["status"]) if rule.get("status") else None)
+            for rule in rules
+        ]
+        self.ignore = [compile_glob(pattern) for pattern in ignore or []]
+        self.default = list(default or [])
+
+    @classmethod
+    def from_config(cls) -> "ImpactRules":
+        """
+        Crée les règles à partir de la section "impact" de la configuration.
+        """
+        settings = get_setting("impact", {}) or {}
+        return cls(settings.get("rules", []), settings.get("ignore", []), settings.get("default", []))
+
+    def documents_for(self, change: Dict[str, str]) -> List[str]:
+        """
+        Documents touchés par un fichier modifié.
+        """
+        paths = [change["path"]] + ([change["old_path"]] if change.get("old_path") else [])
+        if all(any(pattern.match(path) for pattern in self.ignore) for path in paths):
+            return []
+        documents: List[str] = []
+        matched = False
+        for patterns, rule_documents, statuses in self.rules:
+            if not any(pattern.match(path) for pattern in patterns for path in paths):
+                continue
+            # Une règle limitée à d'autres statuts ne couvre pas le fichier
+            if statuses is None or change["status"] in statuses:
+                matched = True
+                documents.extend(document for document in rule_documents if document not in documents)
+        return documents if matched else list(self.default)
+
+    def plan(self, changes: List[Dict[str, str]], documents: List[str]) -> Dict[str, Any]:
+        """
+        Construit le plan d'exécution des nodes de documents.
+
+        Args:
+            changes (List[Dict[str, str]]): Fichiers modifiés (voir parse_name_status)
+            documents (List[str]): Noms de tous les nodes de documents routés
+
+        Returns:
+            Dict[str, Any]: {"run": [nodes à exécuter], "skip": {node: raison},
+                             "reasons": {node: [fichiers qui le déclenchent]}}
+        """
+        reasons: Dict[str, List[str]] = {}
+        for change in changes:
+            for document in self.documents_for(change):
+                if document in documents:
+                    reasons.setdefault(document, []).append(change["path"])
+        run = [document for document in documents if document in reasons]
+        skip = {document: "aucun fichier modifié ne concerne ce document"
+                for document in documents if document not in reasons}
+        return {"run": run, "skip": skip, "reasons": reasons}
@@ -0,0 +1,292 @@
+"""
+File de jobs locale (SQLite) pour les hooks Git : l'ajout est immédiat, un worker exécute les runs
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+# Ce module est importé par "update_docs.py --enqueue" depuis un hook Git :
+# il ne dépend que de la bibliothèque standard pour démarrer en quelques millisecondes.
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pocketflow", "jobs.sqlite")
+
+
+class JobQueue:
+    """
+    Jobs en attente, en cours et terminés, dans une base SQLite partagée par
+    les processus (hooks, workers). Les jobs en attente d'un même dépôt sont
+    regroupés en un seul run (voir claim).
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH):
+        """
+        Args:
+            path (str, optional): Chemin de la base SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, repo TEXT NOT NULL, args TEXT NOT NULL, "
+            "status TEXT NOT NULL, enqueued REAL NOT NULL, started REAL, finished REAL, "
+            "batch INTEGER, worker INTEGER, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, repo)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, heartbeat REAL NOT NULL)")
+
+    def enqueue(self, repo: str, args: Dict[str, Any]) -> int:
+        """
+        Ajoute un job.
+
+        Args:
+            repo (str): Racine du dépôt
+            args (Dict[str, Any]): Options du run (sérialisables en JSON)
+
+        Returns:
+            int: Identifiant du job
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (repo, args, status, enqueued) VALUES (?, ?, 'pending', ?)",
+                (os.path.abspath(repo), json.dumps(args, ensure_ascii=False), time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: int = None) -> Optional[Dict[str, Any]]:
+        """
+        Prend le plus ancien job en attente et tous les jobs en attente du même
+        dépôt : ils forment un lot exécuté en un seul run, avec les options du
+        job le plus récent. Un dépôt dont un lot est en cours n'est pas pris.
+
+        Args:
+            worker (int, optional): Identifiant du worker (par défaut son pid)
+
+        Returns:
+            Optional[Dict[str, Any]]: {"batch", "repo", "args", "jobs": [ids], "wait": attente
+                                      maximale en secondes}, ou None si la file est vide
+        """
+        worker = worker or os.getpid()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT repo FROM jobs WHERE status = 'pending' AND repo NOT IN "
+                    "(SELECT repo FROM jobs WHERE status = 'running') ORDER BY id LIMIT 1").fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                repo = row[0]
+                jobs = self._conn.execute(
+                    "SELECT id, args, enqueued FROM jobs WHERE status = 'pending' AND repo = ? ORDER BY id",
+                    (repo,)).fetchall()
+                now = time.time()
+                batch = jobs[-1][0]
+                self._conn.executemany(
+                    "UPDATE jobs SET status = 'running', started = ?, batch = ?, worker = ? WHERE id = ?",
+                    [(now, batch, worker, job[0]) for job in jobs])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {
+            "batch": batch,
+            "repo": repo,
+            "args": json.loads(jobs[-1][1]),
+            "jobs": [job[0] for job in jobs],
+            "wait": now - min(job[2] for job in jobs)
+        }
+
+    def finish(self, batch: int, error: str = None) -> None:
+        """
+        Marque les jobs d'un lot comme terminés ("done") ou en erreur ("error").
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE batch = ? AND status = 'running'",
+                ("error" if error else "done", time.time(), error, batch))
+
+    def requeue_stale(self, max_age: float) -> int:
+        """
+        Remet en attente les jobs "running" dont le worker n'a pas signalé son
+        activité depuis max_age secondes (worker arrêté brutalement). Un run
+        long d'un worker actif n'est pas repris.
+
+        Returns:
+            int: Nombre de jobs remis en attente
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', started = NULL, batch = NULL, worker = NULL "
+                "WHERE status = 'running' AND worker NOT IN (SELECT pid FROM workers WHERE heartbeat > ?)",
+                (time.time() - max_age,))
+            return cursor.rowcount
+
+    def heartbeat(self, pid: int = None) -> None:
+        """
+        Signale qu'un worker est actif.
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO workers (pid, heartbeat) VALUES (?, ?)",
+                               (pid or os.getpid(), time.time()))
+
+    def unregister(self, pid: int = None) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE pid = ?", (pid or os.getpid(),))
+
+    def worker_alive(self, max_age: float = 30.0) -> bool:
+        """
+        Indique si un worker a signalé son activité depuis moins de max_age secondes.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat > ?",
+                                     (time.time() - max_age,)).fetchone()
+        return row[0] > 0
+
+    def depth(self) -> int:
+        """
+        Nombre de jobs en attente.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
+
+    def stats(self, since: float = 0.0) -> Dict[str, Any]:
+        """
+        Indicateurs de la file : profondeur, jobs en cours, jobs terminés depuis
+        since, attente et durée moyennes et maximales des lots terminés.
+
+        Returns:
+            Dict[str, Any]: Indicateurs (durées en secondes)
+        """
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN ('pending', 'running') "
+                "OR finished >= ? GROUP BY status", (since,)).fetchall())
+            wait = self._conn.execute(
+                "SELECT AVG(started - enqueued), MAX(started - enqueued) FROM jobs "
+                "WHERE finished >= ? AND started IS NOT NULL", (since,)).fetchone()
+            run = self._conn.execute(
+                "SELECT AVG(finished - started), MAX(finished - started), COUNT(DISTINCT batch) FROM jobs "
+                "WHERE finished >= ? AND started IS NOT NULL", (since,)).fetchone()
+        return {
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "error": counts.get("error", 0),
+            "runs": run[2] or 0,
+            "avg_wait": wait[0] or 0.0,
+            "max_wait": wait[1] or 0.0,
+            "avg_run": run[0] or 0.0,
+            "max_run": run[1] or 0.0
+        }
+
+    def close(self) -> None:
+        """
+        Ferme la connexion SQLite.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class QueueWorker:
+    """
+    Exécute les lots de la file les uns après les autres. Le worker signale
+    son activité (voir JobQueue.worker_alive) pour qu'un hook n'en démarre
+    pas un second, et s'arrête après idle_exit secondes sans job.
+    """
+
+    def __init__(self, queue: JobQueue, runner: Callable[[str, Dict[str, Any]], Any], poll: float = 1.0,
+                 idle_exit: Optional[float] = None, stale_after: float = 60.0,
+                 on_batch: Callable[[Dict[str, Any]], None] = None):
+        """
+        Args:
+            queue (JobQueue): File des jobs
+            runner (Callable): Exécute un run : runner(dépôt, options) ; une exception marque le lot en erreur
+            poll (float, optional): Intervalle de consultation de la file vide, en secondes
+            idle_exit (float, optional): Arrêt après cette durée sans job (None : jamais)
+            stale_after (float, optional): Durée sans signal d'activité de son worker après laquelle
+                                           un job "running" est remis en attente (voir requeue_stale)
+            on_batch (Callable, optional): Appelé après chaque lot avec ses indicateurs
+        """
+        self.queue = queue
+        self.runner = runner
+        self.poll = poll
+        self.idle_exit = idle_exit
+        self.stale_after = stale_after
+        self.on_batch = on_batch
+
+    def run_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Exécute un lot et retourne ses indicateurs.
+
+        Returns:
+            Dict[str, Any]: {"batch", "repo", "jobs", "wait", "run", "depth", "error"}
+        """
+        start = time.time()
+        error = None
+        try:
+            self.runner(batch["repo"], batch["args"])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        self.queue.finish(batch["batch"], error=error)
+        report = {
+            "batch": batch["batch"],
+            "repo": batch["repo"],
+            "jobs": len(batch["jobs"]),
+            "wait": batch["wait"],
+            "run": time.time() - start,
+            "depth": self.queue.depth(),
+            "error": error
+        }
+        if self.on_batch:
+            self.on_batch(report)
+        return report
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Exécute les lots jusqu'à ce que la file soit vide.
+        """
+        reports = []
+        while True:
+            self.queue.heartbeat()
+            batch = self.queue.claim()
+            if batch is None:
+                return reports
+            reports.append(self.run_batch(batch))
+
+    def serve(self, stop: threading.Event = None, heartbeat: float = 10.0) -> None:
+        """
+        Boucle jusqu'à stop, ou jusqu'à idle_exit secondes sans job.
+
+        Args:
+            stop (threading.Event, optional): Arrête la boucle
+            heartbeat (float, optional): Intervalle des signaux d'activité, y compris pendant un run
+        """
+        stop = stop or threading.Event()
+        done = threading.Event()
+
+        def beat() -> None:
+            while not done.wait(heartbeat):
+                self.queue.heartbeat()
+
+        threading.Thread(target=beat, name="pocketflow-heartbeat", daemon=True).start()
+        idle_since = time.monotonic()
+        try:
+            while not stop.is_set():
+                # Reprend aussi les jobs d'un autre worker mort pendant que celui-ci tourne
+                self.queue.requeue_stale(self.stale_after)
+                if self.drain():
+                    idle_since = time.monotonic()
+                elif self.idle_exit is not None and time.monotonic() - idle_since >= self.idle_exit:
+                    return
+                stop.wait(self.poll)
+        finally:
+            done.set()
+            self.queue.unregister()
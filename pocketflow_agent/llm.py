@@ -4,15 +4,52 @@ Client pour interagir avec les modèles LLM (Gemini)
 
 import os
 import json
+import math
 import httpx
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, AsyncIterator
+
+from . import transport
+from . import deadline
+from . import tracing
+from .cache import LLMCache, cache_key
+from .ratelimit import RateLimiter, get_rate_limiter, estimate_tokens
+from .resilience import (
+    RetryPolicy,
+    LLMError,
+    LLMHTTPError,
+    call_with_retry,
+    acall_with_retry,
+    get_counters,
+    parse_retry_after
+)
+
+# Points d'accès des fournisseurs supportés
+PROVIDERS = {
+    "deepseek": {
+        "base_url": "https://api.deepseek.com",
+        "default_model": "deepseek-reasoner",
+        "http2": True
+    },
+    "openai": {
+        "base_url": "https://api.openai.com",
+        "default_model": "gpt-3.5-turbo",
+        "http2": True
+    },
+    "gemini": {
+        "base_url": "https://generativelanguage.googleapis.com",
+        "default_model": "gemini-1.5-flash",
+        "http2": True
+    }
+}
 
 class LLMClient:
     """
     Client pour interagir avec une API LLM (DeepSeek, OpenAI, Gemini).
     """
     
-    def __init__(self, api_key: str = None, provider: str = "deepseek", test_mode: bool = False):
+    def __init__(self, api_key: str = None, provider: str = "deepseek", test_mode: bool = False, base_url: str = None,
+                 cache: Optional[LLMCache] = None, retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None, timeout: float = 60.0):
         """
         Initialise un client LLM.
         
@@ -20,10 +57,22 @@ class LLMClient:
             api_key (str, optional): Clé API. Si non fournie, cherche dans les variables d'environnement.
             provider (str, optional): Le fournisseur de l'API ('deepseek', 'openai', 'gemini').
             test_mode (bool, optional): Si True, n'exige pas de clé API (pour les tests unitaires).
+            base_url (str, optional): URL de base de l'API (par défaut celle du fournisseur).
+            cache (LLMCache, optional): Cache disque des réponses (aucun cache si non fourni).
+            retry_policy (RetryPolicy, optional): Politique de nouvelles tentatives (par défaut "llm.retry").
+            rate_limiter (RateLimiter, optional): Limiteur de débit (par défaut celui partagé par
+                                                  le fournisseur et la clé, configuré dans "llm.rateLimits").
+            timeout (float, optional): Délai maximal d'une requête en secondes, réduit au temps
+                                       restant quand une échéance est active (voir deadline.scope).
         """
         self.provider = provider.lower()
         self.api_key = api_key or self._get_api_key_from_env()
         self.test_mode = test_mode
+        self.base_url = base_url or PROVIDERS.get(self.provider, {}).get("base_url")
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy.from_config()
+        self.rate_limiter = rate_limiter or get_rate_limiter(self.provider, self.api_key)
+        self.timeout = timeout
         
         if not self.api_key and not self.test_mode:
             raise ValueError(f"API key for {self.provider} is required.")
@@ -37,26 +86,289 @@ class LLMClient:
             return os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         return None
 
-    def generate_text(self, prompt: str, model_id: str = None, temperature: float = 0.2) -> str:
+    def _http_client(self) -> httpx.Client:
+        """
+        Retourne le client HTTP keep-alive partagé pour ce fournisseur.
+        """
+        http2 = PROVIDERS.get(self.provider, {}).get("http2", False)
+        return transport.get_client(self.base_url, http2=http2)
+
+    def _async_http_client(self) -> httpx.AsyncClient:
+        """
+        Retourne le client HTTP asynchrone partagé pour ce fournisseur et la boucle courante.
+        """
+        http2 = PROVIDERS.get(self.provider, {}).get("http2", False)
+        return transport.get_async_client(self.base_url, http2=http2)
+
+    def generate_text(self, prompt: str, model_id: str = None, temperature: float = 0.2, use_cache: bool = True) -> str:
         """
         Génère du texte à partir d'un prompt.
+        
+        Args:
+            prompt (str): Prompt à envoyer
+            model_id (str, optional): ID du modèle (par défaut celui du fournisseur)
+            temperature (float, optional): Température d'échantillonnage
+            use_cache (bool, optional): Si False, ignore le cache et n'y enregistre pas la réponse
         """
         if self.test_mode:
             return "Ceci est une réponse de test générée en mode test."
 
-        if self.provider == "deepseek":
-            model_id = model_id or "deepseek-reasoner"
-            return self._generate_openai_compatible(prompt, model_id, temperature, "https://api.deepseek.com/v1/chat/completions")
-        elif self.provider == "openai":
-            model_id = model_id or "gpt-3.5-turbo"
-            return self._generate_openai_compatible(prompt, model_id, temperature, "https://api.openai.com/v1/chat/completions")
-        elif self.provider == "gemini":
-            model_id = model_id or "gemini-1.5-flash"
-            return self._generate_gemini(prompt, model_id, temperature)
-        else:
+        with tracing.span("llm.generate", "llm", **self._span_attributes(prompt, model_id)):
+            url, headers, payload = self._build_request(prompt, model_id, temperature)
+            key = self._cache_key(prompt, model_id, temperature) if use_cache else None
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+            prompt_tokens = estimate_tokens(prompt)
+
+            def attempt():
+                if self.rate_limiter:
+                    self.rate_limiter.acquire(prompt_tokens)
+                response = self._http_client().post(url, headers=headers, json=payload, timeout=deadline.http_timeout(self.timeout))
+                response.raise_for_status()
+                return self._extract_text(response.json())
+
+            try:
+                text = call_with_retry(attempt, self.provider, self.retry_policy)
+            except Exception as e:
+                self._raise_api_error(e)
+
+            self._record_output(text)
+            self._cache_put(key, text)
+            return text
+
+    async def agenerate_text(self, prompt: str, model_id: str = None, temperature: float = 0.2, use_cache: bool = True) -> str:
+        """
+        Version asynchrone de generate_text, basée sur httpx.AsyncClient.
+        """
+        if self.test_mode:
+            return "Ceci est une réponse de test générée en mode test."
+
+        with tracing.span("llm.generate", "llm", **self._span_attributes(prompt, model_id)):
+            url, headers, payload = self._build_request(prompt, model_id, temperature)
+            key = self._cache_key(prompt, model_id, temperature) if use_cache else None
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+            prompt_tokens = estimate_tokens(prompt)
+
+            async def attempt():
+                if self.rate_limiter:
+                    await self.rate_limiter.aacquire(prompt_tokens)
+                response = await self._async_http_client().post(url, headers=headers, json=payload, timeout=deadline.http_timeout(self.timeout))
+                response.raise_for_status()
+                return self._extract_text(response.json())
+
+            try:
+                text = await acall_with_retry(attempt, self.provider, self.retry_policy)
+            except Exception as e:
+                self._raise_api_error(e)
+
+            self._record_output(text)
+            self._cache_put(key, text)
+            return text
+
+    def stream_text(self, prompt: str, model_id: str = None, temperature: float = 0.2, use_cache: bool = True) -> Iterator[str]:
+        """
+        Génère du texte en streaming (SSE "stream": true ou Gemini streamGenerateContent).
+        
+        Les fragments sont produits dès leur réception. Fermer le générateur
+        avant la fin interrompt la requête. La réponse complète n'est
+        conservée en mémoire que si un cache est configuré.
+        
+        Args:
+            prompt (str): Prompt à envoyer
+            model_id (str, optional): ID du modèle (par défaut celui du fournisseur)
+            temperature (float, optional): Température d'échantillonnage
+            use_cache (bool, optional): Si False, ignore le cache et n'y enregistre pas la réponse
+            
+        Yields:
+            str: Fragments de texte successifs
+        """
+        if self.test_mode:
+            yield "Ceci est une réponse de test générée en mode test."
+            return
+
+        url, headers, payload = self._build_request(prompt, model_id, temperature, stream=True)
+        # Le span n'est pas rendu courant : le générateur rend la main à l'appelant entre deux fragments
+        span = tracing.begin("llm.stream", "llm", **self._span_attributes(prompt, model_id))
+        key = self._cache_key(prompt, model_id, temperature) if use_cache else None
+        with tracing.use(span):
+            cached = self._cache_get(key)
+        if cached is not None:
+            tracing.end(span)
+            yield cached
+            return
+
+        prompt_tokens = estimate_tokens(prompt)
+
+        def attempt():
+            if self.rate_limiter:
+                self.rate_limiter.acquire(prompt_tokens)
+            client = self._http_client()
+            request = client.build_request("POST", url, headers=headers, json=payload, timeout=deadline.http_timeout(self.timeout))
+            response = client.send(request, stream=True)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError:
+                response.close()
+                raise
+            return response
+
+        # Les nouvelles tentatives ne portent que sur l'ouverture du flux
+        chunks = [] if key is not None else None
+        output_chars = 0
+        error = None
+        try:
+            with tracing.use(span):
+                response = call_with_retry(attempt, self.provider, self.retry_policy)
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    deadline.check("streaming")
+                    chunk = self._extract_chunk(json.loads(data))
+                    if chunk:
+                        output_chars += len(chunk)
+                        if chunks is not None:
+                            chunks.append(chunk)
+                        yield chunk
+            finally:
+                response.close()
+        except Exception as e:
+            error = e
+            self._raise_api_error(e)
+        finally:
+            if self.rate_limiter and output_chars:
+                self.rate_limiter.consume(math.ceil(output_chars / 4))
+            if span is not None:
+                span.set(response_bytes=output_chars)
+            tracing.end(span, error)
+
+        if chunks is not None:
+            self._cache_put(key, "".join(chunks))
+
+    async def astream_text(self, prompt: str, model_id: str = None, temperature: float = 0.2,
+                           use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Version asynchrone de stream_text, basée sur httpx.AsyncClient.
+        """
+        if self.test_mode:
+            yield "Ceci est une réponse de test générée en mode test."
+            return
+
+        url, headers, payload = self._build_request(prompt, model_id, temperature, stream=True)
+        span = tracing.begin("llm.stream", "llm", **self._span_attributes(prompt, model_id))
+        key = self._cache_key(prompt, model_id, temperature) if use_cache else None
+        with tracing.use(span):
+            cached = self._cache_get(key)
+        if cached is not None:
+            tracing.end(span)
+            yield cached
+            return
+
+        prompt_tokens = estimate_tokens(prompt)
+
+        async def attempt():
+            if self.rate_limiter:
+                await self.rate_limiter.aacquire(prompt_tokens)
+            client = self._async_http_client()
+            request = client.build_request("POST", url, headers=headers, json=payload, timeout=deadline.http_timeout(self.timeout))
+            response = await client.send(request, stream=True)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError:
+                await response.aclose()
+                raise
+            return response
+
+        chunks = [] if key is not None else None
+        output_chars = 0
+        error = None
+        try:
+            with tracing.use(span):
+                response = await acall_with_retry(attempt, self.provider, self.retry_policy)
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    deadline.check("streaming")
+                    chunk = self._extract_chunk(json.loads(data))
+                    if chunk:
+                        output_chars += len(chunk)
+                        if chunks is not None:
+                            chunks.append(chunk)
+                        yield chunk
+            finally:
+                await response.aclose()
+        except Exception as e:
+            error = e
+            self._raise_api_error(e)
+        finally:
+            if self.rate_limiter and output_chars:
+                self.rate_limiter.consume(math.ceil(output_chars / 4))
+            if span is not None:
+                span.set(response_bytes=output_chars)
+            tracing.end(span, error)
+
+        if chunks is not None:
+            self._cache_put(key, "".join(chunks))
+
+    def _record_output(self, text: str) -> None:
+        """
+        Comptabilise les tokens de la réponse dans le limiteur de débit.
+        """
+        tracing.annotate(response_bytes=len(text.encode("utf8")))
+        if self.rate_limiter:
+            self.rate_limiter.consume(estimate_tokens(text))
+
+    def _span_attributes(self, prompt: str, model_id: Optional[str]) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": model_id or PROVIDERS.get(self.provider, {}).get("default_model"),
+            "prompt_bytes": len(prompt.encode("utf8"))
+        }
+
+    def _cache_key(self, prompt: str, model_id: Optional[str], temperature: float) -> Optional[str]:
+        if self.cache is None:
+            return None
+        model_id = model_id or PROVIDERS[self.provider]["default_model"]
+        return cache_key(self.provider, model_id, temperature, prompt)
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        tracing.annotate(cached=cached is not None)
+        if cached is not None:
+            tracing.annotate(response_bytes=len(cached.encode("utf8")))
+        return cached
+
+    def _cache_put(self, key: Optional[str], text: str) -> None:
+        if key is not None:
+            self.cache.put(key, text)
+
+    def _build_request(self, prompt, model_id, temperature, stream=False):
+        """
+        Construit l'URL, les en-têtes et le corps de la requête pour le fournisseur.
+        """
+        if self.provider not in PROVIDERS:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
-    def _generate_openai_compatible(self, prompt, model_id, temperature, url):
+        model_id = model_id or PROVIDERS[self.provider]["default_model"]
+        if self.provider == "gemini":
+            return self._generate_gemini(prompt, model_id, temperature, stream)
+        return self._generate_openai_compatible(prompt, model_id, temperature, "/v1/chat/completions", stream)
+
+    def _generate_openai_compatible(self, prompt, model_id, temperature, url, stream=False):
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
@@ -66,20 +378,15 @@ class LLMClient:
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature
         }
-        try:
-            response = httpx.post(url, headers=headers, json=payload, timeout=60.0)
-            response.raise_for_status()
-            result = response.json()
-            return result['choices'][0]['message']['content']
-        except httpx.HTTPStatusError as e:
-            print(f"Error calling {self.provider} API: {e}")
-            raise Exception(f"API error. Status: {e.response.status_code}")
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            raise Exception("An unexpected error occurred while generating text.")
+        if stream:
+            payload["stream"] = True
+        return url, headers, payload
 
-    def _generate_gemini(self, prompt, model_id, temperature):
-        url = f"https://generativelanguage.googleapis.com/v1/models/{model_id}:generateContent"
+    def _generate_gemini(self, prompt, model_id, temperature, stream=False):
+        if stream:
+            url = f"/v1/models/{model_id}:streamGenerateContent?alt=sse"
+        else:
+            url = f"/v1/models/{model_id}:generateContent"
         headers = {
             'Content-Type': 'application/json',
             'x-goog-api-key': self.api_key
@@ -88,14 +395,41 @@ class LLMClient:
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {"temperature": temperature}
         }
-        try:
-            response = httpx.post(url, headers=headers, json=payload, timeout=60.0)
-            response.raise_for_status()
-            result = response.json()
+        return url, headers, payload
+
+    def _extract_text(self, result: Dict[str, Any]) -> str:
+        if self.provider == "gemini":
             return result['candidates'][0]['content']['parts'][0]['text']
-        except httpx.HTTPStatusError as e:
-            print(f"Error calling Gemini API: {e}")
-            raise Exception(f"API error. Status: {e.response.status_code}")
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            raise Exception("An unexpected error occurred while generating text.")
+        return result['choices'][0]['message']['content']
+
+    def _extract_chunk(self, event: Dict[str, Any]) -> str:
+        if self.provider == "gemini":
+            candidates = event.get('candidates') or [{}]
+            parts = candidates[0].get('content', {}).get('parts') or [{}]
+            return parts[0].get('text', "")
+        choices = event.get('choices') or [{}]
+        return choices[0].get('delta', {}).get('content') or ""
+
+    def retry_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs de tentatives et l'état du disjoncteur du fournisseur.
+        """
+        return get_counters(self.provider)
+
+    def _raise_api_error(self, error: Exception):
+        if isinstance(error, deadline.DeadlineExceeded):
+            print(f"Error calling {self.provider} API: {error}")
+            raise error
+        if isinstance(error, httpx.TimeoutException) and deadline.expired():
+            print(f"Error calling {self.provider} API: {error}")
+            raise deadline.DeadlineExceeded(f"Budget de temps épuisé pendant l'appel à {self.provider}") from error
+        if isinstance(error, LLMError):
+            print(f"Error calling {self.provider} API: {error}")
+            raise error
+        if isinstance(error, httpx.HTTPStatusError):
+            print(f"Error calling {self.provider} API: {error}")
+            status = error.response.status_code
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            raise LLMHTTPError(f"API error. Status: {status}", status, retry_after) from error
+        print(f"An unexpected error occurred: {error}")
+        raise LLMError("An unexpected error occurred while generating text.") from error
@@ -0,0 +1,219 @@
+"""
+Découpage des documents Markdown en sections, pour les mises à jour partielles
+"""
+
+import os
+import re
+import hashlib
+from typing import Dict, List, Optional
+
+from .ratelimit import estimate_tokens
+
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"^[ \t]{0,3}(`{3,}|~{3,})")
+
+
+class Section:
+    """
+    Titre Markdown (ATX) et contenu jusqu'au titre suivant, quel que soit son niveau.
+    Le texte éventuel avant le premier titre forme une section de niveau 0 sans titre.
+    """
+
+    def __init__(self, level: int, title: str, text: str, key: str = None):
+        """
+        Args:
+            level (int): Niveau du titre (1 à 6, 0 pour le préambule)
+            title (str): Titre, sans les "#"
+            text (str): Texte complet de la section, titre compris
+            key (str, optional): Identifiant de la section dans le document (voir parse_sections)
+        """
+        self.level = level
+        self.title = title
+        self.text = text
+        self.key = key if key is not None else section_key(level, title)
+
+    @property
+    def hash(self) -> str:
+        """
+        Empreinte SHA-256 du texte de la section.
+        """
+        return hashlib.sha256(self.text.encode("utf8")).hexdigest()
+
+    @property
+    def heading(self) -> str:
+        return f"{'#' * self.level} {self.title}" if self.level else ""
+
+    def __repr__(self) -> str:
+        return f"Section({self.key!r})"
+
+
+def section_key(level: int, title: str) -> str:
+    """
+    Identifiant d'un titre, insensible à la casse et aux espaces multiples.
+    """
+    return f"{'#' * level} {' '.join(title.split()).lower()}" if level else ""
+
+
+def parse_sections(text: str) -> List[Section]:
+    """
+    Découpe un document Markdown sur ses titres. Les titres des blocs de code
+    délimités (``` ou ~~~) sont ignorés, et "".join(s.text for s in sections) == text.
+
+    Les titres identiques reçoivent des clés distinctes ("## notes", "## notes#2"...).
+
+    Returns:
+        List[Section]: Sections, dans l'ordre du document
+    """
+    sections: List[Section] = []
+    seen: Dict[str, int] = {}
+    level, title, lines = 0, "", []
+    fence: Optional[str] = None
+
+    def flush() -> None:
+        if not lines and not level:
+            return
+        key = section_key(level, title)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        sections.append(Section(level, title, "".join(lines), key))
+
+    for line in text.splitlines(keepends=True):
+        marker = _FENCE.match(line)
+        if marker:
+            if fence is None:
+                fence = marker.group(1)[0] * 3
+            elif marker.group(1).startswith(fence):
+                fence = None
+        heading = _HEADING.match(line.rstrip("\r\n")) if fence is None and not marker else None
+        if heading:
+            flush()
+            level, title, lines = len(heading.group(1)), heading.group(2).strip(), []
+        lines.append(line)
+    flush()
+    return sections
+
+
+def outline(sections: List[Section]) -> str:
+    """
+    Plan du document : un titre par ligne, indenté selon son niveau.
+    """
+    return "\n".join(f"{'  ' * (section.level - 1)}{section.heading}" for section in sections if section.level)
+
+
+def select_sections(sections: List[Section], changed_files: List[str]) -> List[Section]:
+    """
+    Retient les sections qui mentionnent un fichier modifié (chemin, nom ou
+    nom sans extension d'au moins 4 caractères).
+    """
+    terms = set()
+    for path in changed_files:
+        name = os.path.basename(path)
+        stem = os.path.splitext(name)[0]
+        terms.update(term.lower() for term in (path, name) if term)
+        if len(stem) >= 4:
+            terms.add(stem.lower())
+    return [section for section in sections if any(term in section.text.lower() for term in terms)]
+
+
+def strip_fence(text: str) -> str:
+    """
+    Retire le bloc de code ```markdown qui entoure parfois la réponse d'un LLM.
+    """
+    stripped = text.strip()
+    match = re.match(r"^```[\w-]*\n(.*?)\n?```$", stripped, re.DOTALL)
+    return match.group(1) + "\n" if match else text
+
+
+def splice(text: str, replacements: List[Section], expected: Dict[str, str]) -> str:
+    """
+    Remplace des sections d'un document. Les sections de remplacement sont
+    associées par clé ; celles qui n'existent pas (et ont un titre) sont
+    ajoutées à la fin du document.
+
+    Args:
+        text (str): Document actuel
+        replacements (List[Section]): Nouvelles sections (voir parse_sections)
+        expected (Dict[str, str]): Empreinte attendue de chaque section, par clé, telle
+                                   qu'elle a été lue avant l'appel LLM
+
+    Returns:
+        str: Document mis à jour
+
+    Raises:
+        ValueError: Si une section remplacée a changé depuis sa lecture
+    """
+    sections = parse_sections(text)
+    by_key = {section.key: section for section in sections}
+    new_text: Dict[str, str] = {}
+    added: List[str] = []
+    for replacement in replacements:
+        current = by_key.get(replacement.key)
+        if current is None:
+            if replacement.level and replacement.text.strip():
+                added.append(_terminate(replacement.text, "\n"))
+            continue
+        if expected.get(current.key) != current.hash:
+            raise ValueError(f"La section \"{current.title or 'préambule'}\" a été modifiée pendant la mise à jour")
+        new_text[current.key] = _terminate(replacement.text, _trailing_newlines(current.text))
+
+    parts = [new_text.get(section.key, section.text) for section in sections]
+    if added:
+        if parts and not parts[-1].endswith("\n\n"):
+            parts[-1] = _terminate(parts[-1], "\n\n")
+        parts.append("\n".join(added))
+    return "".join(parts)
+
+
+def _trailing_newlines(text: str) -> str:
+    return "\n" * (len(text) - len(text.rstrip("\n"))) or "\n"
+
+
+def _terminate(text: str, newlines: str) -> str:
+    return text.rstrip("\n") + newlines
+
+
+def chunk_sections(sections: List[Section], max_tokens: int) -> List[List[Section]]:
+    """
+    Regroupe des sections consécutives en morceaux d'au plus max_tokens tokens
+    estimés. Une section plus grande que le budget forme un morceau à elle seule.
+
+    Args:
+        sections (List[Section]): Sections du document
+        max_tokens (int): Budget de tokens par morceau (voir ratelimit.estimate_tokens)
+
+    Returns:
+        List[List[Section]]: Morceaux, dans l'ordre du document
+    """
+    chunks: List[List[Section]] = []
+    current: List[Section] = []
+    size = 0
+    for section in sections:
+        tokens = estimate_tokens(section.text)
+        if current and size + tokens > max_tokens:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(section)
+        size += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_chunks(parts: List[str]) -> str:
+    """
+    Assemble les morceaux d'un document mis à jour séparément : retire les blocs
+    de code qui les entourent, les sépare par une ligne vide et supprime les
+    sections répétées à l'identique d'un morceau à l'autre.
+    """
+    texts = [strip_fence(part).strip("\n") for part in parts]
+    merged = "\n\n".join(text for text in texts if text) + "\n"
+    seen = set()
+    kept = []
+    for section in parse_sections(merged):
+        signature = (section.key.split("#")[0] if section.level else section.key, section.text.strip())
+        if section.level and signature in seen:
+            continue
+        seen.add(signature)
+        kept.append(section.text)
+    return "".join(kept)
@@ -6,43 +6,105 @@ import os
 import datetime
 import subprocess
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from ..llm import LLMClient
+from .. import git, tracing
+from ..dmlog import DMLogStore
+from ..documents import write_document
+from ..state import fingerprint, file_hash, CommitCursor
 from .node import BaseNode
 
 class GitCommitNode(BaseNode):
     """
-    Node pour récupérer les informations du dernier commit Git.
+    Node pour récupérer les informations des commits Git à documenter.
+    
+    Avec un CommitCursor, tous les commits arrivés depuis le dernier commit
+    traité sont lus en un seul appel "git log" : un push de plusieurs commits
+    donne un seul run et une seule entrée DM-Log. Au-delà de max_commits, seuls
+    les plus anciens sont traités ("head_commit" est alors le dernier d'entre
+    eux) et les suivants le sont au run suivant. Le curseur n'est avancé
+    qu'une fois l'entrée enregistrée (voir DMLogUpdateNode).
+    Sans curseur, ou au premier run, seul le dernier commit est lu.
     """
     
-    def __init__(self):
+    def __init__(self, cwd: str = None, cursor: CommitCursor = None, max_commits: int = 50):
         """
         Initialise le node GitCommitNode.
+        
+        Args:
+            cwd (str, optional): Répertoire du dépôt Git (par défaut le répertoire courant)
+            cursor (CommitCursor, optional): Dernier commit traité
+            max_commits (int, optional): Nombre maximal de commits documentés en un run
         """
         super().__init__("git_commit")
+        self.cwd = cwd
+        self.cursor = cursor
+        self.max_commits = max_commits
+    
+    def _log(self) -> List[Dict[str, Any]]:
+        """
+        Lit les commits à traiter, du plus ancien au plus récent.
+        
+        Returns:
+            List[Dict[str, Any]]: {"commit", "message", "tasks", "files"} par commit
+        """
+        repo = git.repo(self.cwd)
+        fields = ["--pretty=format:%x1e%H%x00%B%x00", "--name-only"]
+        last = self.cursor.get() if self.cursor else None
+        output = None
+        if last:
+            try:
+                # Pas de --max-count : il garderait les plus récents et perdrait les plus anciens
+                output = repo.output("log", *fields, f"{last}..HEAD")
+            except subprocess.CalledProcessError:
+                # Commit inconnu (historique réécrit...) : on se limite au dernier commit
+                output = None
+        if output is None:
+            output = repo.output("log", "-1", *fields)
+        
+        commits = []
+        for record in output.split("\x1e")[1:]:
+            commit, _, rest = record.partition("\0")
+            message, _, files = rest.partition("\0")
+            commits.append({
+                "commit": commit.strip(),
+                "message": message.strip(),
+                # Format attendu: "Task: <nom de la tâche>", éventuellement plusieurs par commit
+                "tasks": [task.strip() for task in re.findall(r"^Task:\s*(.+)$", message, re.MULTILINE)],
+                "files": [line for line in files.splitlines() if line.strip()]
+            })
+        commits.reverse()
+        return commits[:self.max_commits]
     
     def exec(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Récupère les informations du dernier commit Git.
+        Récupère les informations des commits à documenter : "commits",
+        "task_name" (tâches de tous les commits), "changed_files" (chemins
+        modifiés relatifs au dépôt) et "head_commit".
         
         Args:
             context (Dict[str, Any]): Contexte d'exécution
             
         Returns:
-            Dict[str, Any]: Contexte mis à jour avec les informations du commit
+            Dict[str, Any]: Contexte mis à jour avec les informations des commits
         """
         try:
-            # Récupérer le message du dernier commit
-            msg = subprocess.check_output(["git", "log", "-1", "--pretty=%B"], text=True).strip()
+            commits = self._log()
+            tracing.annotate(commits=len(commits))
             
-            # Extraire le nom de la tâche (format attendu: "Task: <nom de la tâche>")
-            match = re.search(r"Task:\s*(.*)", msg)
-            task = match.group(1) if match else "Tâche inconnue"
+            tasks: List[str] = []
+            changed: List[str] = []
+            for commit in commits:
+                tasks.extend(task for task in commit["tasks"] if task not in tasks)
+                changed.extend(path for path in commit["files"] if path not in changed)
             
             # Ajouter les informations au contexte
-            context["task_name"] = task
+            context["commits"] = [{key: commit[key] for key in ("commit", "message", "tasks")} for commit in commits]
+            context["head_commit"] = commits[-1]["commit"] if commits else None
+            context["task_name"] = ", ".join(tasks) if tasks else "Tâche inconnue"
             context["today"] = datetime.date.today().isoformat()
+            context["changed_files"] = changed
             
             # Ajouter des résultats et prochaines étapes par défaut si non fournis
             if "task_results" not in context:
@@ -59,17 +121,24 @@ class GitCommitNode(BaseNode):
 class DMLogParserNode(BaseNode):
     """
     Node pour parser le contenu du journal DM-Log.
+    
+    Avec un DMLogStore, seules les recent_entries dernières entrées sont lues
+    (context["dm_recent_entries"]) au lieu du document complet.
     """
     
-    def __init__(self, path: str = "docs/dm-log.md"):
+    def __init__(self, path: str = "docs/dm-log.md", store: DMLogStore = None, recent_entries: int = 5):
         """
         Initialise le node DMLogParserNode.
         
         Args:
             path (str, optional): Chemin vers le fichier DM-Log
+            store (DMLogStore, optional): Stockage segmenté du journal
+            recent_entries (int, optional): Nombre d'entrées récentes lues dans le stockage
         """
         super().__init__("dm_log_parser")
         self.path = path
+        self.store = store
+        self.recent_entries = recent_entries
     
     def exec(self, context: Dict[str, Any]) -> str:
         """
@@ -79,11 +148,17 @@ class DMLogParserNode(BaseNode):
             context (Dict[str, Any]): Contexte d'exécution
             
         Returns:
-            str: Contenu du journal DM-Log
+            str: Contenu du journal DM-Log (avec un stockage : liste des entrées récentes)
         """
         try:
-            with open(self.path, 'r', encoding='utf8') as f:
-                content = f.read()
+            if self.store is not None:
+                entries = self.store.last(self.recent_entries)
+                context["dm_recent_entries"] = entries
+                return entries
+            
+            with tracing.span("file.read", "file", path=self.path):
+                with open(self.path, 'r', encoding='utf8') as f:
+                    content = f.read()
             
             context["dm_content"] = content
             return content
@@ -91,9 +166,96 @@ class DMLogParserNode(BaseNode):
             raise Exception(f"Erreur lors du parsing du journal DM-Log: {str(e)}")
 
 
+class DMLogSummaryNode(BaseNode):
+    """
+    Node pour résumer l'historique du journal DM-Log.
+    
+    Les window dernières entrées restent lues telles quelles (voir
+    DMLogParserNode) ; les plus anciennes sont remplacées par un résumé mis en
+    cache dans le stockage. Le résumé n'est régénéré que lorsque de nouvelles
+    entrées sortent de la fenêtre, à partir de l'ancien résumé et de ces seules
+    entrées : la taille du prompt reste constante.
+    """
+    
+    PROMPT = """
+Tu tiens à jour le résumé de l'historique d'un journal de décisions (DM-Log) de projet.
+
+Résumé actuel :
+{summary}
+
+Nouvelles entrées à intégrer au résumé :
+
+{entries}
+
+RENVOIE le résumé mis à jour, en Markdown, en moins de {max_words} mots : décisions
+prises, résultats marquants et sujets encore ouverts. Pas de préambule.
+"""
+    
+    def __init__(self, store: DMLogStore, window: int = 5, api_key: str = None, model_id: str = None,
+                 provider: str = "deepseek", llm_client: LLMClient = None, batch: int = 20, max_words: int = 300):
+        """
+        Initialise le node DMLogSummaryNode.
+        
+        Args:
+            store (DMLogStore): Stockage segmenté du journal
+            window (int, optional): Nombre d'entrées récentes conservées telles quelles
+            api_key (str, optional): Clé API
+            model_id (str, optional): ID du modèle à utiliser
+            provider (str, optional): Le fournisseur de l'API ('deepseek', 'openai', 'gemini')
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            batch (int, optional): Nombre maximal d'entrées intégrées par appel LLM
+            max_words (int, optional): Taille cible du résumé
+        """
+        super().__init__("dm_log_summary")
+        self.store = store
+        self.window = window
+        self.llm = llm_client or LLMClient(api_key=api_key, provider=provider)
+        self.model = model_id
+        self.batch = batch
+        self.max_words = max_words
+    
+    def exec(self, context: Dict[str, Any]) -> str:
+        """
+        Met à jour le résumé si des entrées sont sorties de la fenêtre.
+        
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+            
+        Returns:
+            str: Résumé de l'historique (vide s'il tient dans la fenêtre)
+        """
+        try:
+            summary = self.store.load_summary()
+            head = self.store.head()
+            upto = (head["seq"] if head else 0) - self.window
+            rolled_out = self.store.after(summary["upto"], upto=upto) if upto > summary["upto"] else []
+            tracing.annotate(rolled_out=len(rolled_out))
+            for start in range(0, len(rolled_out), self.batch):
+                entries = rolled_out[start:start + self.batch]
+                prompt = self.PROMPT.format(
+                    summary=summary["text"] or "(aucun)",
+                    entries="\n\n".join(self.store.read(entry).strip() for entry in entries),
+                    max_words=self.max_words
+                )
+                summary = {"upto": entries[-1]["seq"], "text": self.llm.generate_text(prompt, model_id=self.model).strip()}
+                self.store.save_summary(summary["upto"], summary["text"])
+            
+            context["dm_summary"] = summary["text"]
+            return summary["text"]
+        except Exception as e:
+            raise Exception(f"Erreur lors du résumé du journal DM-Log: {str(e)}")
+
+
 class DMLogLLMNode(BaseNode):
     """
     Node pour générer une entrée DM-Log via un LLM.
+    
+    Si le contexte contient le résumé de l'historique ("dm_summary") ou les
+    dernières entrées ("dm_recent_entries"), ils sont ajoutés au prompt.
+    
+    Quand le run couvre plusieurs commits (context["commits"], voir
+    GitCommitNode), une seule entrée consolidée est demandée ; sans nouveau
+    commit, aucune entrée n'est générée.
     """
     
     PROMPT = """
@@ -114,7 +276,31 @@ Générez une entrée de journal au format Markdown avec la structure suivante:
 Assurez-vous que l'entrée est claire, concise et informative.
 """
     
-    def __init__(self, api_key: str = None, model_id: str = None, provider: str = "deepseek", test_mode: bool = False):
+    HISTORY_PROMPT = """
+Historique du journal, pour le contexte (ne le répétez pas) :
+
+Résumé des entrées précédentes :
+{summary}
+
+Dernières entrées :
+
+{recent}
+"""
+    
+    COMMITS_PROMPT = """
+Cette entrée couvre les {count} commits suivants, du plus ancien au plus récent.
+Rédigez une seule entrée consolidée qui les résume tous :
+
+{commits}
+"""
+
+    COMMIT_PROMPT = """
+Cette entrée documente le commit suivant :
+
+{commits}
+"""
+    
+    def __init__(self, api_key: str = None, model_id: str = None, provider: str = "deepseek", test_mode: bool = False, llm_client: LLMClient = None):
         """
         Initialise le node DMLogLLMNode.
         
@@ -123,9 +309,10 @@ Assurez-vous que l'entrée est claire, concise et informative.
             model_id (str, optional): ID du modèle à utiliser
             provider (str, optional): Le fournisseur de l'API ('deepseek', 'openai', 'gemini')
             test_mode (bool, optional): Si True, active le mode test pour les appels LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
         """
         super().__init__("dm_log_llm")
-        self.llm = LLMClient(api_key=api_key, provider=provider, test_mode=test_mode)
+        self.llm = llm_client or LLMClient(api_key=api_key, provider=provider, test_mode=test_mode)
         self.model = model_id
     
     def exec(self, context: Dict[str, Any]) -> str:
@@ -139,42 +326,151 @@ Assurez-vous que l'entrée est claire, concise et informative.
             str: Entrée DM-Log générée
         """
         try:
-            date = context["today"]
-            task = context["task_name"]
-            done = "\n".join(f"- {d}" for d in context["task_results"])
-            results = "\n".join(f"- Résultat obtenu: {d}" for d in context["task_results"])
-            next_steps = "\n".join(f"- {n}" for n in context["next_steps"])
-            
-            prompt = self.PROMPT.format(
-                date=date,
-                task=task,
-                done=done,
-                results=results,
-                next=next_steps
-            )
-            
+            if context.get("commits") == []:
+                # Aucun commit depuis le dernier run : rien à consigner
+                context["dm_entry"] = ""
+                return ""
+            prompt = self._build_prompt(context)
             entry = self.llm.generate_text(prompt, model_id=self.model)
             context["dm_entry"] = entry
             
             return entry
         except Exception as e:
             raise Exception(f"Erreur lors de la génération de l'entrée DM-Log: {str(e)}")
+    
+    async def aexec(self, context: Dict[str, Any]) -> str:
+        """
+        Génère une entrée DM-Log sans bloquer la boucle d'événements.
+        
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+            
+        Returns:
+            str: Entrée DM-Log générée
+        """
+        try:
+            if context.get("commits") == []:
+                # Aucun commit depuis le dernier run : rien à consigner
+                context["dm_entry"] = ""
+                return ""
+            prompt = self._build_prompt(context)
+            entry = await self.llm.agenerate_text(prompt, model_id=self.model)
+            context["dm_entry"] = entry
+            
+            return entry
+        except Exception as e:
+            raise Exception(f"Erreur lors de la génération de l'entrée DM-Log: {str(e)}")
+    
+    def fingerprint(self, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Empreinte du prompt complet et du modèle.
+        """
+        return fingerprint(self.name, self.llm.provider, self.model, self._build_prompt(context))
+    
+    def restore(self, context: Dict[str, Any], result: str) -> None:
+        """
+        Remet l'entrée réutilisée dans le contexte.
+        """
+        context["dm_entry"] = result
+    
+    def _build_prompt(self, context: Dict[str, Any]) -> str:
+        """
+        Construit le prompt à partir des informations de la tâche.
+        """
+        date = context["today"]
+        task = context["task_name"]
+        done = "\n".join(f"- {d}" for d in context["task_results"])
+        results = "\n".join(f"- Résultat obtenu: {d}" for d in context["task_results"])
+        next_steps = "\n".join(f"- {n}" for n in context["next_steps"])
+        
+        prompt = self.PROMPT.format(
+            date=date,
+            task=task,
+            done=done,
+            results=results,
+            next=next_steps
+        )
+        summary = context.get("dm_summary")
+        recent = context.get("dm_recent_entries")
+        if summary or recent:
+            prompt += self.HISTORY_PROMPT.format(
+                summary=summary or "(aucun)",
+                recent="\n\n".join(entry.strip() for entry in recent or []) or "(aucune)"
+            )
+        # Identifiants toujours présents : deux commits au même message donnent deux prompts distincts
+        commits = context.get("commits") or []
+        if commits:
+            listing = "\n".join(f"- {commit['commit'][:7]} {commit['message'].splitlines()[0] if commit['message'] else ''}"
+                                 for commit in commits)
+            if len(commits) > 1:
+                prompt += self.COMMITS_PROMPT.format(count=len(commits), commits=listing)
+            else:
+                prompt += self.COMMIT_PROMPT.format(commits=listing)
+        return prompt
 
 
 class DMLogUpdateNode(BaseNode):
     """
     Node pour mettre à jour le journal DM-Log.
+    
+    Avec un DMLogStore, l'entrée est seulement ajoutée au stockage (coût
+    constant). La vue (le document lisible) n'est régénérée qu'une fois
+    render_every entrées en attente, ou à la demande
+    (update_docs.py --render-dm-log, voir DMLogStore.render).
+    
+    Avec un CommitCursor, le dernier commit traité (context["head_commit"])
+    y est enregistré une fois l'entrée écrite.
     """
     
-    def __init__(self, path: str = "docs/dm-log.md"):
+    def __init__(self, path: str = "docs/dm-log.md", store: DMLogStore = None, cursor: CommitCursor = None,
+                 render_every: int = 0):
         """
         Initialise le node DMLogUpdateNode.
         
         Args:
             path (str, optional): Chemin vers le fichier DM-Log
+            store (DMLogStore, optional): Stockage segmenté du journal
+            cursor (CommitCursor, optional): Dernier commit traité (voir GitCommitNode)
+            render_every (int, optional): Nombre d'entrées en attente à partir duquel la vue est
+                                          régénérée (0 : jamais par le node)
         """
         super().__init__("dm_log_update")
         self.path = path
+        self.store = store
+        self.cursor = cursor
+        self.render_every = render_every
+    
+    def fingerprint(self, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Empreinte du journal et de l'entrée à insérer : une entrée déjà
+        insérée n'est pas ajoutée une seconde fois.
+        """
+        if self.store is not None:
+            head = self.store.head()
+            return fingerprint(self.name, head["hash"] if head else None, file_hash(self.path),
+                               context.get("dm_entry"))
+        return fingerprint(self.name, file_hash(self.path), context.get("dm_entry"))
+    
+    def restore(self, context: Dict[str, Any], result: Any) -> None:
+        """
+        Avance le curseur des commits même si l'entrée avait déjà été insérée.
+        """
+        self._advance_cursor(context)
+    
+    def _advance_cursor(self, context: Dict[str, Any]) -> None:
+        if self.cursor is not None and context.get("head_commit"):
+            self.cursor.set(context["head_commit"])
+    
+    def _store_entry(self, context: Dict[str, Any], entry: str) -> bool:
+        """
+        Ajoute l'entrée au stockage ; la vue n'est régénérée qu'après render_every entrées.
+        """
+        self.store.append(entry)
+        if self.render_every and self.store.pending() >= self.render_every and self.store.render():
+            context.setdefault("modified_files", []).append(self.path)
+        # Index, segments et état de la vue sont versionnés avec le document
+        context.setdefault("modified_files", []).append(self.store.directory)
+        return True
     
     def exec(self, context: Dict[str, Any]) -> bool:
         """
@@ -187,8 +483,15 @@ class DMLogUpdateNode(BaseNode):
             bool: True si la mise à jour a réussi
         """
         try:
-            content = context["dm_content"]
             entry = context["dm_entry"]
+            if not entry:
+                return True
+            if self.store is not None:
+                self._store_entry(context, entry)
+                self._advance_cursor(context)
+                return True
+            
+            content = context["dm_content"]
             
             # Insérer la nouvelle entrée après la section "Résultats des étapes"
             section_marker = "## Résultats des étapes"
@@ -196,8 +499,9 @@ class DMLogUpdateNode(BaseNode):
             
             updated_content = content[:insert_position] + "\n\n" + entry + content[insert_position:]
             
-            with open(self.path, 'w', encoding='utf8') as f:
-                f.write(updated_content)
+            if write_document(self.path, updated_content):
+                context.setdefault("modified_files", []).append(self.path)
+            self._advance_cursor(context)
             
             return True
         except Exception as e:
@@ -207,23 +511,57 @@ class DMLogUpdateNode(BaseNode):
 class GitPushNode(BaseNode):
     """
     Node pour committer et pusher les changements.
+    
+    Avec un CommitCursor, le curseur passe le commit du run quand celui-ci
+    suit directement le dernier commit traité : le run suivant ne documente
+    pas la mise à jour des documents elle-même.
     """
     
-    def __init__(self, files: List[str] = None, commit_message: str = None):
+    def __init__(self, files: List[str] = None, commit_message: str = None, cwd: str = None,
+                 cursor: CommitCursor = None):
         """
         Initialise le node GitPushNode.
         
         Args:
             files (List[str], optional): Liste des fichiers à committer
             commit_message (str, optional): Message de commit
+            cwd (str, optional): Répertoire du dépôt Git (par défaut le répertoire courant)
+            cursor (CommitCursor, optional): Dernier commit traité (voir GitCommitNode)
         """
         super().__init__("git_push")
         self.files = files
         self.commit_message = commit_message
+        self.cwd = cwd
+        self.cursor = cursor
+    
+    def _files_to_commit(self, context: Dict[str, Any]) -> List[str]:
+        """
+        Fichiers à committer : ceux de self.files réellement modifiés pendant le
+        run (context["modified_files"]), ou tous si cette information manque.
+        """
+        files = self.files or ["docs/dm-log.md"]
+        if "modified_files" not in context:
+            return files
+        modified = {os.path.abspath(path) for path in context["modified_files"]}
+        return [file for file in files if os.path.abspath(os.path.join(self.cwd or ".", file)) in modified]
+    
+    def _skip_own_commit(self, repo: git.GitRepo) -> None:
+        """
+        Avance le curseur sur le commit du run s'il suit le dernier commit
+        traité. Sinon (commits restants au-delà de max_commits, commit arrivé
+        pendant le run), les commits intermédiaires restent à documenter.
+        """
+        if self.cursor is None:
+            return
+        # "%H %P" : commit et parents (aucun pour un premier commit)
+        head, *parents = repo.output("log", "-1", "--pretty=format:%H %P").split()
+        if parents == [self.cursor.get()]:
+            self.cursor.set(head)
     
     def exec(self, context: Dict[str, Any]) -> bool:
         """
-        Committe et pushe les changements.
+        Committe et pushe les changements. Sans fichier modifié, rien n'est
+        committé ni pushé.
         
         Args:
             context (Dict[str, Any]): Contexte d'exécution
@@ -232,19 +570,26 @@ class GitPushNode(BaseNode):
             bool: True si le push a réussi
         """
         try:
-            files = self.files or ["docs/dm-log.md"]
+            files = self._files_to_commit(context)
+            tracing.annotate(files=len(files))
+            if not files:
+                return True
             date = context.get("today", datetime.date.today().isoformat())
             commit_message = self.commit_message or f"Auto-update docs: {date}"
             
-            # Ajouter les fichiers
-            for file in files:
-                subprocess.check_call(["git", "add", file])
+            # Un seul appel pour indexer tous les fichiers
+            repo = git.repo(self.cwd)
+            repo.add(files)
             
-            # Committer
-            subprocess.check_call(["git", "commit", "-m", commit_message])
+            # Rien à committer si l'index ne diffère pas de HEAD pour ces fichiers
+            if not repo.has_staged_changes(files):
+                return True
             
-            # Pusher
-            subprocess.check_call(["git", "push"])
+            repo.commit(commit_message)
+            # Voir WatchDaemon : le commit du run ne doit pas relancer le flow
+            context["committed_files"] = files
+            self._skip_own_commit(repo)
+            repo.push()
             
             return True
         except Exception as e:
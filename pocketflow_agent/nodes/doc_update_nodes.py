@@ -3,83 +3,518 @@ Nodes pour la mise à jour des documents MCD et structure du projet
 """
 
 import os
-from typing import Dict, Any
+import asyncio
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..llm import LLMClient
+from .. import git, tracing
+from ..impact import ImpactRules, parse_name_status
+from ..documents import write_document, temp_file, replace_if_changed, sync_file
+from ..markdown import parse_sections, outline, select_sections, strip_fence, splice, chunk_sections, merge_chunks
+from ..ratelimit import estimate_tokens
+from ..scanner import ProjectScanner
+from ..state import fingerprint, file_hash, source_tree_hash, find_repo_root
 from .node import BaseNode
 
-class ModelConceptUpdateNode(BaseNode):
+class ProjectScanNode(BaseNode):
     """
-    Node pour mettre à jour le document MCD & Garde-fous via un LLM.
+    Node qui inventorie une seule fois par run les fichiers du projet (voir
+    ProjectScanner) et les partage via le contexte : "project_files", liste
+    des chemins (tronquée à max_files) utilisée par les prompts des documents.
     """
-    
-    PROMPT = """
-Le document suivant définit le Modèle Conceptuel de Données et les Garde-fous techniques.
-Mets-le à jour en ajoutant ou corrigeant les sections selon les dernières modifications du projet.
+
+    def __init__(self, root: str = None, cache_path: str = None, max_files: int = 400, max_workers: int = 8):
+        """
+        Initialise le node ProjectScanNode.
+
+        Args:
+            root (str, optional): Racine du projet (par défaut le répertoire courant)
+            cache_path (str, optional): Cache des répertoires (ex: .pocketflow/scan.json)
+            max_files (int, optional): Nombre maximal de fichiers listés dans "project_files"
+            max_workers (int, optional): Nombre de répertoires lus en parallèle
+        """
+        super().__init__("project_scan")
+        self.scanner = ProjectScanner(root or ".", cache_path=cache_path, max_workers=max_workers)
+        self.max_files = max_files
+
+    def exec(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parcourt le projet et ajoute la liste de ses fichiers au contexte.
+
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+
+        Returns:
+            Dict[str, Any]: Nombre de fichiers et de répertoires relus ou repris du cache
+        """
+        snapshot = self.scanner.scan()
+        context["project_files"] = snapshot.listing(self.max_files)
+        return {"files": len(snapshot.files), "scanned_dirs": snapshot.scanned, "reused_dirs": snapshot.reused}
+
+
+class ChangeImpactNode(BaseNode):
+    """
+    Node qui décide quels documents mettre à jour d'après les fichiers
+    modifiés par les commits du run ("git diff --name-status", classé par
+    ImpactRules). Le plan est placé dans context["execution_plan"] : le flow
+    saute les nodes de documents qu'il n'inclut pas (voir Flow).
+    """
+
+    def __init__(self, documents: List[str], rules: ImpactRules = None, cwd: str = None):
+        """
+        Initialise le node ChangeImpactNode.
+
+        Args:
+            documents (List[str]): Noms des nodes de documents routés
+            rules (ImpactRules, optional): Règles de routage (par défaut la section "impact" de la configuration)
+            cwd (str, optional): Répertoire du dépôt Git (par défaut le répertoire courant)
+        """
+        super().__init__("change_impact")
+        self.documents = list(documents)
+        self.rules = rules or ImpactRules.from_config()
+        self.cwd = cwd
+
+    def _changes(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Fichiers modifiés par les commits du run (context["commits"], voir
+        GitCommitNode), ou par le dernier commit.
+        """
+        commits = context.get("commits")
+        if commits == []:
+            return []
+        base, head = (f"{commits[0]['commit']}^", commits[-1]["commit"]) if commits else ("HEAD^", "HEAD")
+        try:
+            return parse_name_status(git.repo(self.cwd).output("diff", "--name-status", "-M", base, head))
+        except subprocess.CalledProcessError:
+            # Premier commit du dépôt (pas de parent) : fichiers lus par GitCommitNode
+            return [{"status": "modified", "path": path} for path in context.get("changed_files", [])]
+
+    def exec(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Construit le plan d'exécution des documents.
+
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+
+        Returns:
+            Dict[str, Any]: Plan d'exécution (voir ImpactRules.plan)
+        """
+        plan = self.rules.plan(self._changes(context), self.documents)
+        tracing.annotate(run=len(plan["run"]), pruned=len(plan["skip"]))
+        context["execution_plan"] = plan
+        return plan
+
+
+class DocumentUpdateNode(BaseNode):
+    """
+    Node de base pour mettre à jour un document Markdown complet via un LLM.
+    Les sous-classes définissent PROMPT et DOCUMENT_LABEL.
+
+    En mode streaming, les fragments sont écrits au fil de l'eau dans un
+    fichier temporaire renommé atomiquement à la fin. Si le contexte contient
+    un threading.Event "abort_event" et qu'il est levé, la génération est
+    interrompue et le document d'origine reste intact.
+
+    En mode sections, si le contexte contient "changed_files" (voir
+    GitCommitNode), seules les sections qui mentionnent ces fichiers sont
+    envoyées au LLM avec le plan du document, et seules les sections
+    renvoyées sont remplacées : le coût suit la taille du changement et non
+    celle du document.
+
+    Sinon, un document de plus de chunk_tokens tokens est découpé en morceaux
+    de sections consécutives, mis à jour par des appels LLM parallèles puis
+    réassemblés (voir merge_chunks) : la durée est celle du morceau le plus lent.
+
+    Si PROJECT_FILES est vrai et que le contexte contient "project_files"
+    (voir ProjectScanNode), la liste des fichiers du projet est ajoutée au prompt.
+    """
+
+    PROMPT = ""
+    DOCUMENT_LABEL = "document"
+    PROJECT_FILES = False
+    PROJECT_FILES_PROMPT = """
+Fichiers actuels du projet :
+
+```
+{project_files}
+```
+"""
+    SECTION_PROMPT = """
+Le {label} suivant est découpé en sections Markdown. Voici son plan :
+
+{outline}
+
+Fichiers modifiés dans le dépôt depuis la dernière mise à jour :
+{changes}
+
+Sections actuelles concernées par ces modifications :
+
+```markdown
+{sections}
+```
+
+Mets à jour le document pour refléter ces modifications.
+RENVOIE uniquement les sections modifiées ou ajoutées, en Markdown valide, chacune
+commençant par son titre exact (même texte et même niveau). N'inclus pas les sections
+inchangées. Si rien ne doit changer, ne renvoie rien.
+"""
+    CHUNK_PROMPT = """
+{instructions}
+
+Le document est trop long pour être traité en une fois : voici la partie {index}/{count}.
+Plan complet du document, pour le contexte :
+
+{outline}
 
 ```markdown
 {content}
 ```
 
-RENVOIE le document complet en Markdown valide.
+RENVOIE uniquement cette partie, complète et mise à jour, en Markdown valide, avec
+les mêmes titres. Ne reprends pas le contenu des autres parties.
 """
-    
-    def __init__(self, path: str = "docs/mcd-guardrails.md", api_key: str = None, model_id: str = None, provider: str = "deepseek"):
+
+    def __init__(self, name: str, path: str, api_key: str = None, model_id: str = None, provider: str = "deepseek",
+                 llm_client: LLMClient = None, stream: bool = False, sections: bool = False,
+                 chunk_tokens: int = None, chunk_workers: int = 4):
         """
-        Initialise le node ModelConceptUpdateNode.
-        
+        Initialise le node.
+
         Args:
-            path (str, optional): Chemin vers le fichier MCD
+            name (str): Nom du node
+            path (str): Chemin vers le document à mettre à jour
             api_key (str, optional): Clé API pour l'utilisation du LLM
             model_id (str, optional): ID du modèle à utiliser
             provider (str, optional): Fournisseur du LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            stream (bool, optional): Si True, écrit la réponse au fil du streaming
+            sections (bool, optional): Si True, ne met à jour que les sections concernées par les
+                                       fichiers modifiés (context["changed_files"])
+            chunk_tokens (int, optional): Taille (en tokens estimés) au-delà de laquelle le document
+                                          est mis à jour par morceaux. Par défaut, jamais.
+            chunk_workers (int, optional): Nombre maximal d'appels LLM simultanés par document
         """
-        super().__init__("model_concept_update")
+        super().__init__(name)
         self.path = path
-        self.llm = LLMClient(api_key=api_key, provider=provider)
+        self.llm = llm_client or LLMClient(api_key=api_key, provider=provider)
         self.model = model_id
+        self.stream = stream
+        self.sections = sections
+        self.chunk_tokens = chunk_tokens
+        self.chunk_workers = chunk_workers
+        self._content: Optional[Tuple[Tuple[int, int, int], str]] = None
+
+    def fingerprint(self, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Empreinte du document, du prompt, du modèle, des sources du dépôt
+        (arbre Git de HEAD hors répertoire des documents) et, si PROJECT_FILES,
+        de la liste des fichiers du projet.
+        """
+        prompt = self.SECTION_PROMPT if self.sections else self.PROMPT
+        # Chemins seuls : les dates des fichiers (dont ce document) changeraient à chaque run
+        project_files = context.get("project_files") if self.PROJECT_FILES else None
+        return fingerprint(self.name, prompt, self.llm.provider, self.model, self.chunk_tokens,
+                           file_hash(self.path), source_tree_hash(self.path), project_files)
+
+    def _with_project_files(self, context: Dict[str, Any], prompt: str) -> str:
+        """
+        Ajoute au prompt la liste des fichiers du projet, si le document en a besoin.
+        """
+        if not self.PROJECT_FILES or not context.get("project_files"):
+            return prompt
+        return prompt + self.PROJECT_FILES_PROMPT.format(project_files=context["project_files"])
+
+    def _read(self) -> str:
+        """
+        Lit le document. Le contenu est gardé en mémoire tant que le fichier
+        (inode, date et taille) ne change pas (utile quand le node est réutilisé
+        d'un run à l'autre, voir watch.WatchDaemon).
+        """
+        stat = os.stat(self.path)
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._content
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with tracing.span("file.read", "file", path=self.path) as span:
+            with open(self.path, 'r', encoding='utf8') as f:
+                content = f.read()
+            if span:
+                span.set(bytes=len(content.encode("utf8")))
+        self._content = (key, content)
+        return content
+
+    def _chunk_prompts(self, content: str) -> Optional[List[str]]:
+        """
+        Construit un prompt par morceau si le document dépasse chunk_tokens.
+        
+        Returns:
+            Optional[List[str]]: Prompts dans l'ordre du document, ou None s'il tient en un appel
+        """
+        if not self.chunk_tokens or estimate_tokens(content) <= self.chunk_tokens:
+            return None
+        sections = parse_sections(content)
+        chunks = chunk_sections(sections, self.chunk_tokens)
+        if len(chunks) < 2:
+            return None
+        tracing.annotate(chunks=len(chunks))
+        # Consignes propres au document : le début du PROMPT, avant le document lui-même
+        instructions = self.PROMPT.split("```")[0].strip()
+        plan = outline(sections)
+        return [self.CHUNK_PROMPT.format(instructions=instructions, index=i + 1, count=len(chunks), outline=plan,
+                                         content="".join(section.text for section in chunk))
+                for i, chunk in enumerate(chunks)]
     
-    def exec(self, context: Dict[str, Any]) -> bool:
+    def _generate_chunks(self, prompts: List[str]) -> str:
+        """
+        Met à jour les morceaux en parallèle et les réassemble.
+        """
+        with ThreadPoolExecutor(max_workers=min(len(prompts), self.chunk_workers)) as executor:
+            # Chaque thread hérite de l'échéance et du span courants
+            futures = [executor.submit(contextvars.copy_context().run, self.llm.generate_text, prompt,
+                                       model_id=self.model) for prompt in prompts]
+            return merge_chunks([future.result() for future in futures])
+    
+    async def _agenerate_chunks(self, prompts: List[str]) -> str:
+        """
+        Version asynchrone de _generate_chunks.
         """
-        Met à jour le document MCD et garde-fous.
+        semaphore = asyncio.Semaphore(self.chunk_workers)
         
+        async def generate(prompt: str) -> str:
+            async with semaphore:
+                return await self.llm.agenerate_text(prompt, model_id=self.model)
+        
+        return merge_chunks(await asyncio.gather(*(generate(prompt) for prompt in prompts)))
+
+    def _source_changes(self, context: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Fichiers modifiés hors du répertoire des documents (voir source_tree_hash),
+        ou None si le mode sections est désactivé ou qu'ils sont inconnus.
+        """
+        changed = context.get("changed_files")
+        if not self.sections or changed is None:
+            return None
+        root = find_repo_root(self.path)
+        if root is None:
+            return list(changed)
+        excluded = os.path.relpath(os.path.abspath(self.path), root).split(os.sep)[0]
+        return [path for path in changed if path.split("/")[0] != excluded]
+
+    def _section_prompt(self, changes: List[str]) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Lit le document et construit le prompt des sections concernées.
+
+        Returns:
+            Tuple[Optional[str], Dict[str, str]]: Prompt (None s'il n'y a rien à mettre à jour)
+                                                  et empreinte des sections envoyées, par clé
+        """
+        sections = parse_sections(self._read())
+        affected = select_sections(sections, changes) if changes else []
+        tracing.annotate(sections=len(affected), total_sections=len(sections))
+        if not changes:
+            return None, {}
+        prompt = self.SECTION_PROMPT.format(
+            label=self.DOCUMENT_LABEL,
+            outline=outline(sections),
+            changes="\n".join(f"- {path}" for path in changes),
+            sections="".join(section.text for section in affected) or "(aucune)"
+        )
+        return prompt, {section.key: section.hash for section in affected}
+
+    def _write_sections(self, context: Dict[str, Any], response: str, expected: Dict[str, str]) -> bool:
+        """
+        Remplace dans le document les sections renvoyées par le LLM.
+        """
+        content = self._read()
+        existing = {section.key for section in parse_sections(content)}
+        # Seules les sections envoyées au LLM peuvent être remplacées ; les autres titres sont ajoutés
+        replacements = [section for section in parse_sections(strip_fence(response))
+                        if section.key in expected or (section.level and section.key not in existing)]
+        tracing.annotate(replaced_sections=len(replacements))
+        if not replacements:
+            return True
+        return self._write(context, splice(content, replacements, expected))
+
+    def _write(self, context: Dict[str, Any], updated: str) -> bool:
+        """
+        Écrit le document mis à jour et l'ajoute aux fichiers modifiés,
+        sauf si son contenu n'a pas changé.
+        """
+        if write_document(self.path, updated):
+            self._mark_modified(context)
+        return True
+
+    def _mark_modified(self, context: Dict[str, Any]) -> None:
+        # setdefault est atomique : plusieurs nodes peuvent s'exécuter en parallèle
+        context.setdefault("modified_files", []).append(self.path)
+
+    def _stream_write(self, context: Dict[str, Any], prompt: str) -> bool:
+        """
+        Écrit la réponse en streaming dans un fichier temporaire puis le renomme
+        (sauf si le contenu n'a pas changé).
+        """
+        abort_event = context.get("abort_event")
+        fd, tmp_path = temp_file(self.path)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as f:
+                chunks = self.llm.stream_text(prompt, model_id=self.model)
+                try:
+                    for chunk in chunks:
+                        if abort_event is not None and abort_event.is_set():
+                            raise Exception("génération interrompue")
+                        f.write(chunk)
+                        f.flush()
+                    sync_file(f)
+                finally:
+                    chunks.close()
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return self._replace(context, tmp_path)
+
+    async def _astream_write(self, context: Dict[str, Any], prompt: str) -> bool:
+        """
+        Version asynchrone de _stream_write.
+        """
+        abort_event = context.get("abort_event")
+        fd, tmp_path = temp_file(self.path)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as f:
+                chunks = self.llm.astream_text(prompt, model_id=self.model)
+                try:
+                    async for chunk in chunks:
+                        if abort_event is not None and abort_event.is_set():
+                            raise Exception("génération interrompue")
+                        f.write(chunk)
+                        f.flush()
+                    sync_file(f)
+                finally:
+                    await chunks.aclose()
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return self._replace(context, tmp_path)
+
+    def _replace(self, context: Dict[str, Any], tmp_path: str) -> bool:
+        """
+        Remplace le document par le fichier temporaire écrit en streaming.
+        """
+        with tracing.span("file.write", "file", path=self.path) as span:
+            changed = replace_if_changed(tmp_path, self.path)
+            if span:
+                span.set(changed=changed)
+        if changed:
+            self._mark_modified(context)
+        return True
+
+    def exec(self, context: Dict[str, Any]) -> bool:
+        """
+        Met à jour le document.
+
         Args:
             context (Dict[str, Any]): Contexte d'exécution
-            
+
         Returns:
             bool: True si la mise à jour a réussi
         """
         try:
-            # Lecture du MCD existant
-            with open(self.path, 'r', encoding='utf8') as f:
-                content = f.read()
-            
-            # Générer le prompt
-            prompt = self.PROMPT.format(content=content)
-            
-            # Générer le document mis à jour
+            changes = self._source_changes(context)
+            if changes is not None:
+                prompt, expected = self._section_prompt(changes)
+                if prompt is None:
+                    return True
+                prompt = self._with_project_files(context, prompt)
+                return self._write_sections(context, self.llm.generate_text(prompt, model_id=self.model), expected)
+            content = self._read()
+            prompts = self._chunk_prompts(content)
+            if prompts is not None:
+                prompts = [self._with_project_files(context, prompt) for prompt in prompts]
+                return self._write(context, self._generate_chunks(prompts))
+            prompt = self._with_project_files(context, self.PROMPT.format(content=content))
+            if self.stream:
+                return self._stream_write(context, prompt)
             updated = self.llm.generate_text(prompt, model_id=self.model)
-            
-            # Écrire le document mis à jour
-            with open(self.path, 'w', encoding='utf8') as f:
-                f.write(updated)
-            
-            # Ajouter le fichier à la liste des fichiers modifiés
-            if "modified_files" not in context:
-                context["modified_files"] = []
-            
-            context["modified_files"].append(self.path)
-            
-            return True
+            return self._write(context, updated)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la mise à jour du {self.DOCUMENT_LABEL}: {str(e)}")
+
+    async def aexec(self, context: Dict[str, Any]) -> bool:
+        """
+        Met à jour le document sans bloquer la boucle d'événements pendant l'appel LLM.
+
+        Args:
+            context (Dict[str, Any]): Contexte d'exécution
+
+        Returns:
+            bool: True si la mise à jour a réussi
+        """
+        try:
+            changes = self._source_changes(context)
+            if changes is not None:
+                prompt, expected = self._section_prompt(changes)
+                if prompt is None:
+                    return True
+                prompt = self._with_project_files(context, prompt)
+                response = await self.llm.agenerate_text(prompt, model_id=self.model)
+                return self._write_sections(context, response, expected)
+            content = self._read()
+            prompts = self._chunk_prompts(content)
+            if prompts is not None:
+                prompts = [self._with_project_files(context, prompt) for prompt in prompts]
+                return self._write(context, await self._agenerate_chunks(prompts))
+            prompt = self._with_project_files(context, self.PROMPT.format(content=content))
+            if self.stream:
+                return await self._astream_write(context, prompt)
+            updated = await self.llm.agenerate_text(prompt, model_id=self.model)
+            return self._write(context, updated)
         except Exception as e:
-            raise Exception(f"Erreur lors de la mise à jour du document MCD: {str(e)}")
+            raise Exception(f"Erreur lors de la mise à jour du {self.DOCUMENT_LABEL}: {str(e)}")
 
 
-class ProjectStructureUpdateNode(BaseNode):
+class ModelConceptUpdateNode(DocumentUpdateNode):
+    """
+    Node pour mettre à jour le document MCD & Garde-fous via un LLM.
+    """
+
+    PROMPT = """
+Le document suivant définit le Modèle Conceptuel de Données et les Garde-fous techniques.
+Mets-le à jour en ajoutant ou corrigeant les sections selon les dernières modifications du projet.
+
+```markdown
+{content}
+```
+
+RENVOIE le document complet en Markdown valide.
+"""
+    DOCUMENT_LABEL = "document MCD"
+
+    def __init__(self, path: str = "docs/mcd-guardrails.md", api_key: str = None, model_id: str = None, provider: str = "deepseek", llm_client: LLMClient = None, stream: bool = False, sections: bool = False, chunk_tokens: int = None):
+        """
+        Initialise le node ModelConceptUpdateNode.
+
+        Args:
+            path (str, optional): Chemin vers le fichier MCD
+            api_key (str, optional): Clé API pour l'utilisation du LLM
+            model_id (str, optional): ID du modèle à utiliser
+            provider (str, optional): Fournisseur du LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            stream (bool, optional): Si True, écrit la réponse au fil du streaming
+            sections (bool, optional): Si True, ne met à jour que les sections concernées (voir DocumentUpdateNode)
+            chunk_tokens (int, optional): Taille au-delà de laquelle le document est mis à jour par morceaux
+        """
+        super().__init__("model_concept_update", path, api_key=api_key, model_id=model_id, provider=provider, llm_client=llm_client, stream=stream, sections=sections, chunk_tokens=chunk_tokens)
+
+
+class ProjectStructureUpdateNode(DocumentUpdateNode):
     """
     Node pour mettre à jour le document de structure du projet via un LLM.
     """
-    
+
     PROMPT = """
 Le document suivant décrit la structure du projet. Mets-le à jour pour refléter les dernières conventions et scripts d'automatisation.
 
@@ -89,63 +524,31 @@ Le document suivant décrit la structure du projet. Mets-le à jour pour reflét
 
 RENVOIE le document complet en Markdown valide.
 """
-    
-    def __init__(self, path: str = "docs/project-structure.md", api_key: str = None, model_id: str = None, provider: str = "deepseek"):
+    DOCUMENT_LABEL = "document de structure"
+    PROJECT_FILES = True
+
+    def __init__(self, path: str = "docs/project-structure.md", api_key: str = None, model_id: str = None, provider: str = "deepseek", llm_client: LLMClient = None, stream: bool = False, sections: bool = False, chunk_tokens: int = None):
         """
         Initialise le node ProjectStructureUpdateNode.
-        
+
         Args:
             path (str, optional): Chemin vers le fichier de structure du projet
             api_key (str, optional): Clé API pour l'utilisation du LLM
             model_id (str, optional): ID du modèle à utiliser
             provider (str, optional): Fournisseur du LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            stream (bool, optional): Si True, écrit la réponse au fil du streaming
+            sections (bool, optional): Si True, ne met à jour que les sections concernées (voir DocumentUpdateNode)
+            chunk_tokens (int, optional): Taille au-delà de laquelle le document est mis à jour par morceaux
         """
-        super().__init__("project_structure_update")
-        self.path = path
-        self.llm = LLMClient(api_key=api_key, provider=provider)
-        self.model = model_id
-    
-    def exec(self, context: Dict[str, Any]) -> bool:
-        """
-        Met à jour le document de structure du projet.
-        
-        Args:
-            context (Dict[str, Any]): Contexte d'exécution
-            
-        Returns:
-            bool: True si la mise à jour a réussi
-        """
-        try:
-            # Lecture du document existant
-            with open(self.path, 'r', encoding='utf8') as f:
-                content = f.read()
-            
-            # Générer le prompt
-            prompt = self.PROMPT.format(content=content)
-            
-            # Générer le document mis à jour
-            updated = self.llm.generate_text(prompt, model_id=self.model)
-            
-            # Écrire le document mis à jour
-            with open(self.path, 'w', encoding='utf8') as f:
-                f.write(updated)
-            
-            # Ajouter le fichier à la liste des fichiers modifiés
-            if "modified_files" not in context:
-                context["modified_files"] = []
-            
-            context["modified_files"].append(self.path)
-            
-            return True
-        except Exception as e:
-            raise Exception(f"Erreur lors de la mise à jour du document de structure: {str(e)}")
+        super().__init__("project_structure_update", path, api_key=api_key, model_id=model_id, provider=provider, llm_client=llm_client, stream=stream, sections=sections, chunk_tokens=chunk_tokens)
 
 
-class TasksUpdateNode(BaseNode):
+class TasksUpdateNode(DocumentUpdateNode):
     """
     Node pour mettre à jour le document des tâches via un LLM.
     """
-    
+
     PROMPT = """
 Le document suivant décrit les tâches du projet. Mets-le à jour pour refléter l'avancement et les nouvelles tâches.
 
@@ -155,63 +558,31 @@ Le document suivant décrit les tâches du projet. Mets-le à jour pour refléte
 
 RENVOIE le document complet en Markdown valide.
 """
-    
-    def __init__(self, path: str = "docs/tasks.md", api_key: str = None, model_id: str = None, provider: str = "deepseek"):
+    DOCUMENT_LABEL = "document des tâches"
+    PROJECT_FILES = True
+
+    def __init__(self, path: str = "docs/tasks.md", api_key: str = None, model_id: str = None, provider: str = "deepseek", llm_client: LLMClient = None, stream: bool = False, sections: bool = False, chunk_tokens: int = None):
         """
         Initialise le node TasksUpdateNode.
-        
+
         Args:
             path (str, optional): Chemin vers le fichier des tâches
             api_key (str, optional): Clé API pour l'utilisation du LLM
             model_id (str, optional): ID du modèle à utiliser
             provider (str, optional): Fournisseur du LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            stream (bool, optional): Si True, écrit la réponse au fil du streaming
+            sections (bool, optional): Si True, ne met à jour que les sections concernées (voir DocumentUpdateNode)
+            chunk_tokens (int, optional): Taille au-delà de laquelle le document est mis à jour par morceaux
         """
-        super().__init__("tasks_update")
-        self.path = path
-        self.llm = LLMClient(api_key=api_key, provider=provider)
-        self.model = model_id
-    
-    def exec(self, context: Dict[str, Any]) -> bool:
-        """
-        Met à jour le document des tâches.
-        
-        Args:
-            context (Dict[str, Any]): Contexte d'exécution
-            
-        Returns:
-            bool: True si la mise à jour a réussi
-        """
-        try:
-            # Lecture du document existant
-            with open(self.path, 'r', encoding='utf8') as f:
-                content = f.read()
-            
-            # Générer le prompt
-            prompt = self.PROMPT.format(content=content)
-            
-            # Générer le document mis à jour
-            updated = self.llm.generate_text(prompt, model_id=self.model)
-            
-            # Écrire le document mis à jour
-            with open(self.path, 'w', encoding='utf8') as f:
-                f.write(updated)
-            
-            # Ajouter le fichier à la liste des fichiers modifiés
-            if "modified_files" not in context:
-                context["modified_files"] = []
-            
-            context["modified_files"].append(self.path)
-            
-            return True
-        except Exception as e:
-            raise Exception(f"Erreur lors de la mise à jour du document des tâches: {str(e)}")
+        super().__init__("tasks_update", path, api_key=api_key, model_id=model_id, provider=provider, llm_client=llm_client, stream=stream, sections=sections, chunk_tokens=chunk_tokens)
 
 
-class RequirementsUpdateNode(BaseNode):
+class RequirementsUpdateNode(DocumentUpdateNode):
     """
     Node pour mettre à jour le document des exigences via un LLM.
     """
-    
+
     PROMPT = """
 Le document suivant décrit les exigences du projet. Mets-le à jour pour refléter les nouvelles exigences et les modifications.
 
@@ -221,53 +592,21 @@ Le document suivant décrit les exigences du projet. Mets-le à jour pour reflé
 
 RENVOIE le document complet en Markdown valide.
 """
-    
-    def __init__(self, path: str = "docs/requirements.md", api_key: str = None, model_id: str = None, provider: str = "deepseek"):
+    DOCUMENT_LABEL = "document des exigences"
+    PROJECT_FILES = True
+
+    def __init__(self, path: str = "docs/requirements.md", api_key: str = None, model_id: str = None, provider: str = "deepseek", llm_client: LLMClient = None, stream: bool = False, sections: bool = False, chunk_tokens: int = None):
         """
         Initialise le node RequirementsUpdateNode.
-        
+
         Args:
             path (str, optional): Chemin vers le fichier des exigences
             api_key (str, optional): Clé API pour l'utilisation du LLM
             model_id (str, optional): ID du modèle à utiliser
             provider (str, optional): Fournisseur du LLM
+            llm_client (LLMClient, optional): Client LLM partagé (sinon un client dédié est créé)
+            stream (bool, optional): Si True, écrit la réponse au fil du streaming
+            sections (bool, optional): Si True, ne met à jour que les sections concernées (voir DocumentUpdateNode)
+            chunk_tokens (int, optional): Taille au-delà de laquelle le document est mis à jour par morceaux
         """
-        super().__init__("requirements_update")
-        self.path = path
-        self.llm = LLMClient(api_key=api_key, provider=provider)
-        self.model = model_id
-    
-    def exec(self, context: Dict[str, Any]) -> bool:
-        """
-        Met à jour le document des exigences.
-        
-        Args:
-            context (Dict[str, Any]): Contexte d'exécution
-            
-        Returns:
-            bool: True si la mise à jour a réussi
-        """
-        try:
-            # Lecture du document existant
-            with open(self.path, 'r', encoding='utf8') as f:
-                content = f.read()
-            
-            # Générer le prompt
-            prompt = self.PROMPT.format(content=content)
-            
-            # Générer le document mis à jour
-            updated = self.llm.generate_text(prompt, model_id=self.model)
-            
-            # Écrire le document mis à jour
-            with open(self.path, 'w', encoding='utf8') as f:
-                f.write(updated)
-            
-            # Ajouter le fichier à la liste des fichiers modifiés
-            if "modified_files" not in context:
-                context["modified_files"] = []
-            
-            context["modified_files"].append(self.path)
-            
-            return True
-        except Exception as e:
-            raise Exception(f"Erreur lors de la mise à jour du document des exigences: {str(e)}")
+        super().__init__("requirements_update", path, api_key=api_key, model_id=model_id, provider=provider, llm_client=llm_client, stream=stream, sections=sections, chunk_tokens=chunk_tokens)
@@ -2,20 +2,29 @@
 Classe de base pour tous les nodes PocketFlow
 """
 
+import asyncio
+from typing import Optional
+
 class BaseNode:
     """
     Classe de base pour tous les nodes dans le système PocketFlow.
     Chaque node doit hériter de cette classe et implémenter la méthode exec.
     """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, timeout: Optional[float] = None, optional: bool = False):
         """
         Initialise un nouveau node.
         
         Args:
             name (str): Nom du node
+            timeout (float, optional): Durée maximale d'exécution en secondes. Elle borne les
+                                       délais des appels LLM du node (voir deadline.scope).
+            optional (bool, optional): Si True, le node est sauté (et non en erreur) quand le
+                                       budget de temps du flow ou du node est épuisé
         """
         self.name = name
+        self.timeout = timeout
+        self.optional = optional
         
     def exec(self, context: dict) -> any:
         """
@@ -28,3 +37,44 @@ class BaseNode:
             any: Résultat de l'exécution
         """
         raise NotImplementedError("La méthode exec doit être implémentée par les sous-classes")
+    
+    async def aexec(self, context: dict) -> any:
+        """
+        Version asynchrone de exec, utilisée par AsyncFlow.
+        Par défaut, exec est exécutée dans un thread pour ne pas bloquer la boucle.
+        
+        Args:
+            context (dict): Contexte d'exécution
+            
+        Returns:
+            any: Résultat de l'exécution
+        """
+        return await asyncio.to_thread(self.exec, context)
+    
+    def fingerprint(self, context: dict) -> Optional[str]:
+        """
+        Retourne l'empreinte des entrées du node (contenu des fichiers lus,
+        arbre Git, version du prompt...). Si un flow avec état trouve la même
+        empreinte qu'au run précédent, le node n'est pas ré-exécuté et son
+        résultat précédent est réutilisé.
+        
+        L'empreinte est aussi calculée après exec : elle doit décrire les
+        entrées telles que le prochain run les verra.
+        
+        Args:
+            context (dict): Contexte d'exécution
+            
+        Returns:
+            Optional[str]: Empreinte, ou None pour toujours exécuter le node
+        """
+        return None
+    
+    def restore(self, context: dict, result: any) -> None:
+        """
+        Rétablit dans le contexte les effets de bord d'un résultat réutilisé
+        (voir fingerprint). Par défaut, rien n'est fait.
+        
+        Args:
+            context (dict): Contexte d'exécution
+            result (any): Résultat enregistré au run précédent
+        """
@@ -0,0 +1,259 @@
+"""
+Limiteur de débit côté client (requêtes et tokens par minute) pour les appels LLM
+"""
+
+import math
+import time
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from typing import Dict, Any, Optional, Tuple
+
+from .config import get_setting
+from . import deadline
+from . import tracing
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime le nombre de tokens d'un texte (environ 4 caractères par token).
+
+    Args:
+        text (str): Texte à estimer
+
+    Returns:
+        int: Nombre de tokens estimé
+    """
+    return max(1, math.ceil(len(text) / 4))
+
+
+class TokenBucket:
+    """
+    Seau à jetons avec réservation : un appelant réserve sa quantité puis
+    attend le temps nécessaire au remplissage. Les appelants sont ainsi
+    servis dans l'ordre, à un débit lissé, sans jamais dépasser la limite.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialise le seau (plein).
+
+        Args:
+            capacity (float): Nombre maximal de jetons
+            refill_per_second (float): Jetons ajoutés par seconde
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Réserve des jetons.
+
+        Args:
+            amount (float): Jetons à consommer (plafonnés à la capacité)
+
+        Returns:
+            float: Attente en secondes avant de pouvoir les utiliser
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Seau à jetons en mémoire partagée, commun aux processus d'un pool
+    (voir batch). Il se transmet aux processus à leur création
+    (initializer d'un ProcessPoolExecutor) ; time.monotonic est commun
+    aux processus d'une même machine.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, context: Any = None):
+        """
+        Args:
+            capacity (float): Nombre maximal de jetons
+            refill_per_second (float): Jetons ajoutés par seconde
+            context (optional): Contexte multiprocessing du pool (par défaut celui du système)
+        """
+        context = context or multiprocessing.get_context()
+        self._state = context.RawArray("d", 2)
+        super().__init__(capacity, refill_per_second)
+        self._lock = context.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._state[0]
+
+    @tokens.setter
+    def tokens(self, value: float) -> None:
+        self._state[0] = value
+
+    @property
+    def updated(self) -> float:
+        return self._state[1]
+
+    @updated.setter
+    def updated(self, value: float) -> None:
+        self._state[1] = value
+
+
+class RateLimiter:
+    """
+    Limite combinée en requêtes par minute (rpm) et tokens par minute (tpm).
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 buckets: Optional[Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = None):
+        """
+        Initialise le limiteur.
+
+        Args:
+            rpm (float, optional): Requêtes par minute (None = illimité)
+            tpm (float, optional): Tokens par minute (None = illimité)
+            buckets (Tuple, optional): Seaux (requêtes, tokens) existants, à la place de rpm et tpm
+        """
+        if buckets is not None:
+            self.requests, self.tokens = buckets
+        else:
+            self.requests = TokenBucket(rpm, rpm / 60.0) if rpm else None
+            self.tokens = TokenBucket(tpm, tpm / 60.0) if tpm else None
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += wait
+        return wait
+
+    @staticmethod
+    def _check_deadline(wait: float) -> None:
+        budget = deadline.remaining()
+        if budget is not None and wait > budget:
+            raise deadline.DeadlineExceeded(f"Budget de temps insuffisant pour attendre le limiteur de débit ({wait:.1f}s)")
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Bloque jusqu'à ce qu'une requête de `tokens` tokens puisse partir.
+        Lève deadline.DeadlineExceeded si l'attente dépasse l'échéance courante.
+
+        Returns:
+            float: Temps attendu en secondes
+        """
+        wait = self._reserve(tokens)
+        self._check_deadline(wait)
+        if wait > 0:
+            with tracing.span("ratelimit.wait", "llm", seconds=wait, tokens=tokens):
+                time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 1) -> float:
+        """
+        Version asynchrone de acquire.
+        """
+        wait = self._reserve(tokens)
+        self._check_deadline(wait)
+        if wait > 0:
+            with tracing.span("ratelimit.wait", "llm", seconds=wait, tokens=tokens):
+                await asyncio.sleep(wait)
+        return wait
+
+    def consume(self, tokens: int) -> None:
+        """
+        Comptabilise des tokens après coup (par exemple ceux de la réponse), sans attendre.
+        Ils retardent les appels suivants.
+        """
+        if self.tokens:
+            self.tokens.reserve(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne le nombre d'attentes et le temps total attendu.
+        """
+        with self._lock:
+            return {"waits": self.waits, "wait_seconds": self.wait_seconds}
+
+
+_lock = threading.Lock()
+_limiters: Dict[Tuple[str, str], Optional[RateLimiter]] = {}
+_shared: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+
+
+def get_rate_limiter(provider: str, api_key: Optional[str]) -> Optional[RateLimiter]:
+    """
+    Retourne le limiteur partagé par tous les clients d'un même fournisseur et d'une même clé.
+    Les limites viennent de "llm.rateLimits.<provider>" dans config/default.json ; dans un
+    processus où des seaux partagés sont installés (voir install_shared_buckets), le limiteur
+    d'un fournisseur les utilise, quelle que soit la clé.
+
+    Args:
+        provider (str): Fournisseur du LLM
+        api_key (str, optional): Clé API (seule son empreinte est conservée)
+
+    Returns:
+        Optional[RateLimiter]: Le limiteur, ou None si aucune limite n'est configurée
+    """
+    key_hash = hashlib.sha256((api_key or "").encode("utf8")).hexdigest()[:16]
+    key = (provider, key_hash)
+    with _lock:
+        if key not in _limiters and provider in _shared:
+            _limiters[key] = RateLimiter(buckets=_shared[provider])
+        elif key not in _limiters:
+            limits = get_setting(f"llm.rateLimits.{provider}", {}) or {}
+            rpm, tpm = limits.get("rpm"), limits.get("tpm")
+            _limiters[key] = RateLimiter(rpm=rpm, tpm=tpm) if (rpm or tpm) else None
+        return _limiters[key]
+
+
+def create_shared_buckets(context: Any = None) -> Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]]:
+    """
+    Crée des seaux partagés (requêtes, tokens) pour chaque fournisseur de "llm.rateLimits".
+
+    Args:
+        context (optional): Contexte multiprocessing du pool qui les utilisera
+
+    Returns:
+        Dict[str, Tuple]: Seaux par fournisseur, à passer à install_shared_buckets dans chaque processus
+    """
+    buckets = {}
+    for provider, limits in (get_setting("llm.rateLimits", {}) or {}).items():
+        rpm, tpm = (limits or {}).get("rpm"), (limits or {}).get("tpm")
+        if rpm or tpm:
+            buckets[provider] = (SharedTokenBucket(rpm, rpm / 60.0, context) if rpm else None,
+                                 SharedTokenBucket(tpm, tpm / 60.0, context) if tpm else None)
+    return buckets
+
+
+def install_shared_buckets(buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]]) -> None:
+    """
+    Fait utiliser des seaux partagés aux limiteurs du processus (initializer d'un pool).
+    """
+    with _lock:
+        _shared.clear()
+        _shared.update(buckets)
+        _limiters.clear()
+
+
+def reset() -> None:
+    """
+    Oublie les limiteurs créés (utile pour les tests ou après un changement de configuration).
+    """
+    with _lock:
+        _limiters.clear()
+        _shared.clear()
@@ -0,0 +1,199 @@
+"""
+Affichage de la progression des flows (terminal, JSON lines ou silencieux)
+"""
+
+import sys
+import json
+import time
+import threading
+from typing import Dict, Any, Optional, TextIO
+
+
+class ProgressReporter:
+    """
+    Interface des afficheurs de progression. Les méthodes peuvent être
+    appelées depuis plusieurs threads. L'implémentation de base n'affiche
+    rien (mode silencieux).
+    """
+
+    def flow_started(self, flow: Any, context: Dict[str, Any]) -> None:
+        """
+        Appelé au démarrage du run, après l'initialisation de context["flow"].
+        """
+
+    def node_started(self, flow: Any, context: Dict[str, Any], index: int, node: Any) -> None:
+        """
+        Appelé avant l'exécution d'un node (index à partir de 0, dans l'ordre de démarrage).
+        """
+
+    def node_finished(self, flow: Any, context: Dict[str, Any], node: Any, entry: Dict[str, Any]) -> None:
+        """
+        Appelé quand un node se termine ; entry est l'entrée ajoutée à context["flow"]["completed_nodes"].
+        """
+
+    def message(self, text: str) -> None:
+        """
+        Message ponctuel (avertissement, reprise de run...).
+        """
+
+    def flow_finished(self, flow: Any, context: Dict[str, Any], dashboard: str) -> None:
+        """
+        Appelé à la fin du run avec le dashboard final.
+        """
+
+
+SilentReporter = ProgressReporter
+
+
+def describe_entry(entry: Dict[str, Any]) -> str:
+    """
+    Décrit en une ligne le résultat d'un node.
+    """
+    name = entry["name"]
+    if entry["status"] == "error":
+        return f"❌ Erreur lors de l'exécution du node {name}: {entry.get('error', 'Erreur inconnue')}"
+    if entry.get("pruned"):
+        return f"⏭ Node {name} non concerné: {entry.get('reason', '')}"
+    if entry["status"] == "skipped":
+        return f"⏭ Node optionnel {name} sauté: {entry.get('reason', '')}"
+    if entry.get("skipped"):
+        return f"⏭ Node {name} inchangé, résultat précédent réutilisé"
+    return f"✅ Node {name} exécuté avec succès en {entry['elapsed']:.2f}s"
+
+
+class TTYReporter(ProgressReporter):
+    """
+    Affichage dans le terminal : en-tête, une ligne par node terminé et
+    dashboard final. Sur un vrai terminal, une barre de progression est
+    redessinée sur place, au plus une fois toutes les min_interval secondes.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, min_interval: float = 0.2):
+        """
+        Args:
+            stream (TextIO, optional): Flux de sortie (par défaut sys.stdout)
+            min_interval (float, optional): Intervalle minimal entre deux redessins de la barre
+        """
+        self.stream = stream
+        self.min_interval = min_interval
+        self._last_draw = 0.0
+        self._line_drawn = False
+        self._lock = threading.Lock()
+
+    def _out(self) -> TextIO:
+        return self.stream or sys.stdout
+
+    def _live(self) -> bool:
+        isatty = getattr(self._out(), "isatty", None)
+        return bool(isatty and isatty())
+
+    def _print(self, text: str) -> None:
+        # Efface la barre de progression avant d'écrire une ligne
+        if self._line_drawn:
+            print("\r\033[K", end="", file=self._out())
+            self._line_drawn = False
+        print(text, file=self._out())
+
+    def _draw(self, flow: Any, context: Dict[str, Any], force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_draw < self.min_interval:
+            return
+        self._last_draw = now
+        info = context["flow"]
+        total = info["node_count"] or 1
+        done = len(info["completed_nodes"])
+        width = 30
+        filled = int(width * done / total)
+        bar = "=" * filled + ">" + " " * (width - filled - 1) if filled < width else "=" * width
+        line = f"[{bar}] {done}/{info['node_count']} {info.get('current_node_name', '')} ({info['elapsed_time']})"
+        print(f"\r\033[K{line}", end="", file=self._out(), flush=True)
+        self._line_drawn = True
+
+    def flow_started(self, flow: Any, context: Dict[str, Any]) -> None:
+        with self._lock:
+            self._print(flow._generate_ascii_header())
+
+    def node_started(self, flow: Any, context: Dict[str, Any], index: int, node: Any) -> None:
+        with self._lock:
+            if self._live():
+                self._draw(flow, context)
+            else:
+                self._print(f"[{index + 1}/{len(flow.nodes)}] Exécution du node: {node.name}")
+
+    def node_finished(self, flow: Any, context: Dict[str, Any], node: Any, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._print(describe_entry(entry))
+            if self._live():
+                self._draw(flow, context, force=True)
+
+    def message(self, text: str) -> None:
+        with self._lock:
+            self._print(text)
+
+    def flow_finished(self, flow: Any, context: Dict[str, Any], dashboard: str) -> None:
+        with self._lock:
+            self._print(dashboard)
+
+
+class JSONLReporter(ProgressReporter):
+    """
+    Un événement JSON par ligne, pour les outils et l'intégration continue.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, path: Optional[str] = None):
+        """
+        Args:
+            stream (TextIO, optional): Flux de sortie (par défaut sys.stdout)
+            path (str, optional): Fichier où ajouter les événements (prioritaire sur stream)
+        """
+        self.stream = stream
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"event": event, "time": time.time(), **fields}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self.path:
+                with open(self.path, 'a', encoding='utf8') as f:
+                    f.write(line + "\n")
+            else:
+                stream = self.stream or sys.stdout
+                stream.write(line + "\n")
+                stream.flush()
+
+    def flow_started(self, flow: Any, context: Dict[str, Any]) -> None:
+        self._emit("flow_started", flow=flow.name, nodes=[node.name for node in flow.nodes],
+                   run_id=context["flow"].get("run_id"))
+
+    def node_started(self, flow: Any, context: Dict[str, Any], index: int, node: Any) -> None:
+        self._emit("node_started", flow=flow.name, node=node.name, index=index + 1)
+
+    def node_finished(self, flow: Any, context: Dict[str, Any], node: Any, entry: Dict[str, Any]) -> None:
+        self._emit("node_finished", flow=flow.name, node=node.name, **{k: v for k, v in entry.items() if k != "name"})
+
+    def message(self, text: str) -> None:
+        self._emit("message", text=text)
+
+    def flow_finished(self, flow: Any, context: Dict[str, Any], dashboard: str) -> None:
+        self._emit("flow_finished", flow=flow.name, status=context["flow"]["status"],
+                   elapsed_seconds=context["flow"].get("total_elapsed_seconds"))
+
+
+def create_reporter(kind: str = "tty", path: Optional[str] = None) -> ProgressReporter:
+    """
+    Crée un afficheur de progression.
+
+    Args:
+        kind (str, optional): "tty", "jsonl" ou "silent"
+        path (str, optional): Fichier de sortie du mode "jsonl" (par défaut la sortie standard)
+
+    Returns:
+        ProgressReporter: L'afficheur
+    """
+    if kind == "tty":
+        return TTYReporter()
+    if kind == "jsonl":
+        return JSONLReporter(path=path)
+    if kind == "silent":
+        return SilentReporter()
+    raise ValueError(f"Mode d'affichage inconnu: {kind}")
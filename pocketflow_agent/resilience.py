@@ -0,0 +1,355 @@
+"""
+Politique de nouvelles tentatives et disjoncteur pour les appels LLM
+"""
+
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+import httpx
+
+from .config import get_setting
+from . import deadline
+from . import tracing
+
+# Statuts HTTP considérés comme transitoires
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """
+    Erreur lors d'un appel à l'API LLM.
+    """
+
+
+class LLMHTTPError(LLMError):
+    """
+    Réponse HTTP en erreur de l'API LLM.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMError):
+    """
+    Appel refusé car le disjoncteur du fournisseur est ouvert.
+    """
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes.
+
+    Args:
+        value (str, optional): Valeur de l'en-tête
+
+    Returns:
+        Optional[float]: Délai en secondes, ou None si absent ou invalide
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Indique si une erreur est transitoire et mérite une nouvelle tentative.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+def _retry_after_of(error: Exception) -> Optional[float]:
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (429, 503):
+        return parse_retry_after(error.response.headers.get("Retry-After"))
+    return None
+
+
+class RetryPolicy:
+    """
+    Backoff exponentiel avec jitter ("full jitter"), qui respecte Retry-After :
+    le délai imposé par le serveur n'est jamais raccourci (voir _after_failure).
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0, jitter: bool = True):
+        """
+        Initialise la politique.
+
+        Args:
+            max_attempts (int, optional): Nombre total de tentatives (1 = pas de nouvelle tentative)
+            base_delay (float, optional): Délai de base en secondes
+            max_delay (float, optional): Délai maximal entre deux tentatives
+            jitter (bool, optional): Si True, tire le délai aléatoirement dans [0, backoff]
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        """
+        Crée la politique à partir de la section "llm.retry" de la configuration.
+        """
+        settings = get_setting("llm.retry", {}) or {}
+        return cls(
+            max_attempts=settings.get("maxAttempts", 4),
+            base_delay=settings.get("baseDelay", 1.0),
+            max_delay=settings.get("maxDelay", 30.0),
+            jitter=settings.get("jitter", True)
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Calcule l'attente avant la tentative suivante.
+
+        Args:
+            attempt (int): Numéro de la tentative qui vient d'échouer (à partir de 1)
+            retry_after (float, optional): Délai imposé par le serveur, retourné tel quel
+
+        Returns:
+            float: Attente en secondes
+        """
+        if retry_after is not None:
+            return retry_after
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : après failure_threshold échecs transitoires consécutifs, les
+    appels sont refusés pendant reset_timeout secondes, puis un seul appel
+    d'essai à la fois est autorisé (état "half_open") : les autres appelants
+    sont refusés jusqu'à son résultat.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialise le disjoncteur.
+
+        Args:
+            failure_threshold (int, optional): Échecs consécutifs avant ouverture
+            reset_timeout (float, optional): Durée d'ouverture en secondes
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Indique si un appel peut être tenté.
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def release(self) -> None:
+        """
+        Termine un appel sans verdict sur la disponibilité du fournisseur (erreur
+        non transitoire, annulation) : un nouvel appel d'essai peut être tenté.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.open_count += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_counters: Dict[str, Dict[str, float]] = {}
+_EMPTY_COUNTERS = {"attempts": 0, "retries": 0, "failures": 0, "rejected": 0, "wait_seconds": 0.0}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """
+    Retourne le disjoncteur partagé d'un fournisseur.
+    """
+    with _lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            settings = get_setting("llm.circuitBreaker", {}) or {}
+            breaker = CircuitBreaker(
+                failure_threshold=settings.get("failureThreshold", 5),
+                reset_timeout=settings.get("resetTimeout", 30.0)
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def _count(provider: str, name: str, value: float = 1) -> None:
+    with _lock:
+        counters = _counters.setdefault(provider, dict(_EMPTY_COUNTERS))
+        counters[name] += value
+
+
+def get_counters(provider: str = None) -> Dict[str, Any]:
+    """
+    Retourne les compteurs de tentatives, d'attente et l'état des disjoncteurs.
+
+    Args:
+        provider (str, optional): Fournisseur. Si absent, retourne tous les fournisseurs
+
+    Returns:
+        Dict[str, Any]: Compteurs par fournisseur
+    """
+    with _lock:
+        providers = [provider] if provider else sorted(set(_counters) | set(_breakers))
+        result = {}
+        for name in providers:
+            counters = dict(_counters.get(name, _EMPTY_COUNTERS))
+            breaker = _breakers.get(name)
+            counters["breaker_state"] = breaker.state if breaker else "closed"
+            counters["breaker_opens"] = breaker.open_count if breaker else 0
+            result[name] = counters
+    return result[provider] if provider else result
+
+
+def reset() -> None:
+    """
+    Réinitialise les disjoncteurs et les compteurs (utile pour les tests).
+    """
+    with _lock:
+        _breakers.clear()
+        _counters.clear()
+
+
+def _before_attempt(provider: str, breaker: CircuitBreaker, attempt: int) -> None:
+    if not breaker.allow():
+        _count(provider, "rejected")
+        raise CircuitOpenError(f"Circuit ouvert pour {provider}: appels suspendus")
+    _count(provider, "attempts")
+    tracing.annotate(attempts=attempt, retries=attempt - 1)
+
+
+def _after_failure(provider: str, policy: RetryPolicy, breaker: CircuitBreaker, error: Exception, attempt: int) -> float:
+    """
+    Enregistre un échec et retourne l'attente avant la prochaine tentative.
+    Relance l'erreur si elle n'est pas transitoire, si les tentatives sont
+    épuisées ou si le Retry-After du serveur dépasse max_delay.
+    """
+    if not is_retryable(error):
+        breaker.release()
+        raise error
+    breaker.record_failure()
+    _count(provider, "failures")
+    if attempt >= policy.max_attempts:
+        raise error
+    retry_after = _retry_after_of(error)
+    if retry_after is not None and retry_after > policy.max_delay:
+        # Réessayer plus tôt serait refusé par le serveur : abandon
+        raise error
+    wait = policy.delay(attempt, retry_after)
+    budget = deadline.remaining()
+    if budget is not None and wait >= budget:
+        # Inutile d'attendre au-delà de l'échéance de l'appelant
+        raise error
+    _count(provider, "retries")
+    _count(provider, "wait_seconds", wait)
+    return wait
+
+
+def call_with_retry(fn: Callable[[], Any], provider: str, policy: RetryPolicy = None,
+                    breaker: CircuitBreaker = None, sleep: Callable[[float], None] = None) -> Any:
+    """
+    Appelle fn en réessayant les erreurs transitoires.
+
+    Args:
+        fn (Callable): Appel à effectuer
+        provider (str): Fournisseur (pour le disjoncteur et les compteurs)
+        policy (RetryPolicy, optional): Politique de nouvelles tentatives
+        breaker (CircuitBreaker, optional): Disjoncteur (par défaut celui du fournisseur)
+        sleep (Callable, optional): Fonction d'attente (par défaut time.sleep)
+
+    Returns:
+        Any: Résultat de fn
+    """
+    policy = policy or RetryPolicy()
+    breaker = breaker or get_breaker(provider)
+    sleep = sleep or time.sleep
+    attempt = 0
+    while True:
+        attempt += 1
+        _before_attempt(provider, breaker, attempt)
+        try:
+            result = fn()
+        except Exception as e:
+            wait = _after_failure(provider, policy, breaker, e, attempt)
+            with tracing.span("llm.retry_wait", "llm", seconds=wait, cause=str(e)):
+                sleep(wait)
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[Any]], provider: str, policy: RetryPolicy = None,
+                           breaker: CircuitBreaker = None) -> Any:
+    """
+    Version asynchrone de call_with_retry.
+    """
+    policy = policy or RetryPolicy()
+    breaker = breaker or get_breaker(provider)
+    attempt = 0
+    while True:
+        attempt += 1
+        _before_attempt(provider, breaker, attempt)
+        try:
+            result = await fn()
+        except Exception as e:
+            wait = _after_failure(provider, policy, breaker, e, attempt)
+            with tracing.span("llm.retry_wait", "llm", seconds=wait, cause=str(e)):
+                await asyncio.sleep(wait)
+            continue
+        except BaseException:
+            # Annulation (asyncio.CancelledError) : l'appel d'essai éventuel est abandonné
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,119 @@
+"""
+Verrou d'exécution par dépôt : au plus un run en cours et un run en attente
+"""
+
+import os
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou, les runs ne sont pas regroupés
+    fcntl = None
+
+from .state import find_repo_root
+
+# Valeur retournée par acquire() quand le verrouillage n'est pas disponible
+UNLOCKED = -1
+
+
+def git_dir(root: str) -> Optional[str]:
+    """
+    Répertoire Git d'un dépôt (".git", ou celui désigné par le fichier ".git" d'un worktree).
+
+    Returns:
+        Optional[str]: Chemin du répertoire, ou None s'il est introuvable
+    """
+    path = os.path.join(root, ".git")
+    if os.path.isdir(path):
+        return path
+    try:
+        with open(path, 'r', encoding='utf8') as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    return os.path.normpath(os.path.join(root, content[len("gitdir:"):].strip()))
+
+
+class RunLock:
+    """
+    Verrous fcntl.flock d'un dépôt, dans <.git>/pocketflow/ : run.lock est
+    tenu pendant un run, pending.lock par le run qui attend la fin du run en
+    cours. Un run qui arrive alors qu'un autre attend déjà est regroupé avec
+    lui (acquire retourne None) : le run en attente démarre après la fin du
+    run en cours et voit donc les commits des deux. Le système libère les
+    verrous d'un processus qui meurt.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Répertoire des fichiers de verrou
+        """
+        self.directory = directory
+
+    @classmethod
+    def for_repo(cls, path: str = ".") -> Optional["RunLock"]:
+        """
+        Crée le verrou du dépôt qui contient path.
+
+        Returns:
+            Optional[RunLock]: Le verrou, ou None hors d'un dépôt Git
+        """
+        root = find_repo_root(path)
+        directory = git_dir(root) if root else None
+        return cls(os.path.join(directory, "pocketflow")) if directory else None
+
+    def _open(self, name: str) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.open(os.path.join(self.directory, name), os.O_RDWR | os.O_CREAT, 0o644)
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def acquire(self, on_wait: Callable[[], None] = None) -> Optional[int]:
+        """
+        Prend le verrou de run, en attendant la fin du run en cours s'il y en a
+        un et qu'aucun autre run n'attend déjà.
+
+        Args:
+            on_wait (Callable, optional): Appelé avant d'attendre la fin du run en cours
+
+        Returns:
+            Optional[int]: Jeton à passer à release(), ou None si le run est regroupé
+                           avec le run déjà en attente (il ne doit pas s'exécuter)
+        """
+        if fcntl is None:
+            return UNLOCKED
+        run = self._open("run.lock")
+        try:
+            if self._try_lock(run):
+                return run
+            pending = self._open("pending.lock")
+            try:
+                if not self._try_lock(pending):
+                    os.close(run)
+                    return None
+                if on_wait:
+                    on_wait()
+                fcntl.flock(run, fcntl.LOCK_EX)
+            finally:
+                # Libéré dès le run en cours terminé : le run suivant peut attendre à son tour
+                os.close(pending)
+            return run
+        except BaseException:
+            os.close(run)
+            raise
+
+    def release(self, token: int) -> None:
+        """
+        Libère le verrou de run pris par acquire().
+        """
+        if token != UNLOCKED:
+            os.close(token)
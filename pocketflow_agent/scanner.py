@@ -0,0 +1,271 @@
+"""
+Inventaire des fichiers du projet (os.scandir, .gitignore, cache des répertoires)
+"""
+
+import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Tuple
+
+from . import tracing
+from .state import fingerprint, write_json_atomic
+
+# Toujours ignorés, même sans .gitignore
+DEFAULT_EXCLUDES = (".git", "node_modules", "__pycache__", ".pocketflow")
+
+
+def _translate(pattern: str) -> str:
+    """
+    Traduit un motif glob de .gitignore en expression régulière (sans ancres).
+    """
+    regex, i = "", 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "(?:/.*)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def compile_glob(pattern: str, base: str = "") -> "re.Pattern":
+    """
+    Compile un motif à la manière de .gitignore : "**" traverse les
+    répertoires, et un motif sans "/" (hors "/" final) correspond à un nom à
+    n'importe quelle profondeur sous base.
+
+    Args:
+        pattern (str): Motif (ex: "*.css", "frontend/**", "/build")
+        base (str, optional): Répertoire (relatif à la racine) auquel le motif est relatif
+    """
+    prefix = re.escape(base + "/") if base else ""
+    body = _translate(pattern.lstrip("/"))
+    if "/" in pattern:
+        return re.compile(f"^{prefix}{body}$")
+    return re.compile(f"^{prefix}(?:.*/)?{body}$")
+
+
+class IgnoreRules:
+    """
+    Règles .gitignore accumulées depuis la racine : la dernière règle qui
+    correspond l'emporte, "!" ré-inclut, "/" final ne vise que les répertoires.
+    """
+
+    def __init__(self, rules: Tuple = ()):
+        self.rules = rules
+
+    def extend(self, base: str, lines: List[str]) -> "IgnoreRules":
+        """
+        Ajoute les règles d'un fichier .gitignore situé dans le répertoire base
+        (relatif à la racine, "" pour la racine).
+
+        Returns:
+            IgnoreRules: Nouvel ensemble de règles (l'original n'est pas modifié)
+        """
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            rules.append((compile_glob(line, base), negate, dir_only))
+        return IgnoreRules(tuple(rules))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """
+        Indique si un chemin (relatif à la racine, séparateur "/") est ignoré.
+        """
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                result = not negate
+        return result
+
+
+class ProjectSnapshot:
+    """
+    Fichiers du projet à un instant donné : chemin relatif -> (taille, mtime_ns).
+    """
+
+    def __init__(self, root: str, files: Dict[str, Tuple[int, int]], scanned: int = 0, reused: int = 0):
+        """
+        Args:
+            root (str): Racine du projet
+            files (Dict[str, Tuple[int, int]]): Taille et date de modification par chemin relatif
+            scanned (int, optional): Nombre de répertoires relus
+            reused (int, optional): Nombre de répertoires repris du cache
+        """
+        self.root = root
+        self.files = files
+        self.scanned = scanned
+        self.reused = reused
+
+    @property
+    def paths(self) -> List[str]:
+        return sorted(self.files)
+
+    def fingerprint(self) -> str:
+        """
+        Empreinte de la liste des fichiers et de leurs tailles et dates.
+        """
+        return fingerprint(sorted(self.files.items()))
+
+    def listing(self, max_files: int = 400) -> str:
+        """
+        Liste des fichiers, un par ligne, tronquée à max_files entrées.
+        """
+        paths = self.paths
+        lines = paths[:max_files]
+        if len(paths) > max_files:
+            lines.append(f"... ({len(paths) - max_files} autres fichiers)")
+        return "\n".join(lines)
+
+
+class ProjectScanner:
+    """
+    Parcourt le projet avec os.scandir, en parallèle, en respectant les
+    .gitignore (y compris ceux des sous-répertoires) et DEFAULT_EXCLUDES.
+
+    Avec un fichier de cache, la liste des entrées de chaque répertoire est
+    conservée avec sa date de modification : au scan suivant, un répertoire
+    dont la date (et celle de son .gitignore) n'a pas changé n'est pas relu,
+    seul un stat de contrôle est fait. La taille et la date des fichiers d'un
+    tel répertoire sont celles du scan précédent.
+    """
+
+    def __init__(self, root: str = ".", cache_path: str = None, max_workers: int = 8,
+                 exclude: Tuple[str, ...] = DEFAULT_EXCLUDES):
+        """
+        Args:
+            root (str, optional): Racine du projet
+            cache_path (str, optional): Fichier de cache des répertoires (ex: .pocketflow/scan.json)
+            max_workers (int, optional): Nombre de répertoires lus en parallèle
+            exclude (Tuple[str, ...], optional): Noms toujours ignorés
+        """
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.exclude = set(exclude)
+        self._cache_lock = threading.Lock()
+
+    def _load_cache(self) -> Dict[str, Any]:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf8') as f:
+                data = json.load(f)
+            return data["dirs"] if data.get("root") == self.root else {}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _list(self, relative: str, cached: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Liste un répertoire, ou reprend sa liste du cache s'il n'a pas changé.
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: Entrée de cache du répertoire et True si elle a été relue
+        """
+        path = os.path.join(self.root, relative) if relative else self.root
+        mtime = os.stat(path).st_mtime_ns
+        try:
+            ignore_mtime = os.stat(os.path.join(path, ".gitignore")).st_mtime_ns
+        except OSError:
+            ignore_mtime = None
+        if cached and cached["mtime"] == mtime and cached.get("gitignore_mtime") == ignore_mtime:
+            return cached, False
+
+        files, dirs = {}, []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name in self.exclude:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                except OSError:
+                    continue
+        gitignore = None
+        if ignore_mtime is not None:
+            with open(os.path.join(path, ".gitignore"), 'r', encoding='utf8', errors='replace') as f:
+                gitignore = f.read().splitlines()
+        return {"mtime": mtime, "gitignore_mtime": ignore_mtime, "gitignore": gitignore,
+                "files": files, "dirs": sorted(dirs)}, True
+
+    def scan(self) -> ProjectSnapshot:
+        """
+        Parcourt le projet et met à jour le cache.
+
+        Returns:
+            ProjectSnapshot: Fichiers non ignorés du projet
+        """
+        with tracing.span("project.scan", "file", root=self.root) as span:
+            cache = self._load_cache()
+            new_cache: Dict[str, Any] = {}
+            files: Dict[str, Tuple[int, int]] = {}
+            scanned = reused = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = {executor.submit(self._list, "", cache.get("")): ("", IgnoreRules())}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        relative, rules = pending.pop(future)
+                        try:
+                            entry, fresh = future.result()
+                        except OSError:
+                            continue
+                        scanned += fresh
+                        reused += not fresh
+                        new_cache[relative] = entry
+                        if entry["gitignore"]:
+                            rules = rules.extend(relative, entry["gitignore"])
+                        for name, (size, mtime) in entry["files"].items():
+                            path = f"{relative}/{name}" if relative else name
+                            if not rules.ignored(path, False):
+                                files[path] = (size, mtime)
+                        for name in entry["dirs"]:
+                            path = f"{relative}/{name}" if relative else name
+                            if not rules.ignored(path, True):
+                                pending[executor.submit(self._list, path, cache.get(path))] = (path, rules)
+            if span:
+                span.set(files=len(files), scanned_dirs=scanned, reused_dirs=reused)
+
+        if self.cache_path:
+            with self._cache_lock:
+                try:
+                    write_json_atomic(self.cache_path, {"root": self.root, "dirs": new_cache})
+                except OSError:
+                    pass
+        return ProjectSnapshot(self.root, files, scanned=scanned, reused=reused)
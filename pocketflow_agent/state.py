@@ -0,0 +1,303 @@
+"""
+État persistant entre deux exécutions d'un flow (empreintes des nodes et points de reprise)
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from . import git
+from .documents import sync_file, sync_directory
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'une liste de valeurs sérialisables en JSON.
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    material = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf8")).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    """
+    Retourne l'empreinte SHA-256 du contenu d'un fichier, ou None s'il n'existe pas.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def find_repo_root(path: str) -> Optional[str]:
+    """
+    Remonte depuis path jusqu'au répertoire contenant ".git".
+
+    Returns:
+        Optional[str]: Racine du dépôt, ou None hors d'un dépôt
+    """
+    current = os.path.abspath(path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path)))
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def source_tree_hash(path: str) -> str:
+    """
+    Empreinte de l'arbre Git de HEAD, sans le répertoire de premier niveau
+    qui contient path (typiquement "docs/"). Les documents générés ne
+    changent donc pas l'empreinte des sources.
+
+    Args:
+        path (str): Fichier ou répertoire du dépôt à exclure
+
+    Returns:
+        str: Empreinte, ou "" hors d'un dépôt Git
+    """
+    root = find_repo_root(path)
+    if root is None:
+        return ""
+    relative = os.path.relpath(os.path.abspath(path), root)
+    excluded = relative.split(os.sep)[0]
+    # Arbre lu par le processus "git cat-file --batch" partagé du dépôt (un seul pour tous les nodes)
+    try:
+        tree = git.repo(root).tree("HEAD")
+    except OSError:
+        return ""
+    if tree is None:
+        return ""
+    return fingerprint([entry for entry in tree if entry[1] != excluded])
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """
+    Écrit un fichier JSON atomiquement (fichier temporaire puis os.replace).
+    """
+    content = json.dumps(data, ensure_ascii=False, indent=2)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf8') as f:
+            f.write(content)
+            sync_file(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    sync_directory(directory)
+
+
+class FlowState:
+    """
+    Empreintes et résultats des nodes, enregistrés dans un fichier JSON.
+
+    Le fichier est réécrit atomiquement (fichier temporaire puis os.replace).
+    Un fichier absent ou illisible équivaut à un état vide.
+    """
+
+    def __init__(self, path: str):
+        """
+        Charge l'état.
+
+        Args:
+            path (str): Chemin du fichier d'état (ex: .pocketflow/state.json)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf8') as f:
+                self._nodes = json.load(f).get("nodes", {})
+        except (OSError, ValueError, AttributeError):
+            self._nodes = {}
+
+    def lookup(self, name: str, node_fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Retourne l'entrée d'un node si son empreinte enregistrée est identique.
+
+        Returns:
+            Optional[Dict[str, Any]]: {"fingerprint": ..., "result": ...}, ou None
+        """
+        with self._lock:
+            entry = self._nodes.get(name)
+            if entry and entry.get("fingerprint") == node_fingerprint:
+                return entry
+        return None
+
+    def record(self, name: str, node_fingerprint: str, result: Any) -> bool:
+        """
+        Enregistre l'empreinte et le résultat d'un node.
+
+        Returns:
+            bool: False si le résultat n'est pas sérialisable en JSON (rien n'est enregistré)
+        """
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            self._nodes[name] = {"fingerprint": node_fingerprint, "result": result}
+        return True
+
+    def forget(self, name: str) -> None:
+        """
+        Oublie l'entrée d'un node (il sera ré-exécuté au prochain run).
+        """
+        with self._lock:
+            self._nodes.pop(name, None)
+
+    def save(self) -> None:
+        """
+        Écrit l'état sur disque.
+        """
+        with self._lock:
+            data = {"version": 1, "nodes": dict(self._nodes)}
+        write_json_atomic(self.path, data)
+
+
+class CommitCursor:
+    """
+    Dernier commit traité par le flow (ex: .pocketflow/commits.json), pour ne
+    traiter au run suivant que les commits arrivés depuis.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Chemin du fichier
+        """
+        self.path = path
+
+    def get(self) -> Optional[str]:
+        """
+        Retourne l'identifiant du dernier commit traité, ou None.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf8') as f:
+                return json.load(f).get("last_commit") or None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def set(self, commit: str) -> None:
+        """
+        Enregistre le dernier commit traité.
+        """
+        write_json_atomic(self.path, {"last_commit": commit})
+
+
+def serializable_items(context: Dict[str, Any], exclude: tuple = ("flow",)) -> Dict[str, Any]:
+    """
+    Retourne les entrées du contexte sérialisables en JSON (les autres sont ignorées).
+    """
+    items = {}
+    for key, value in context.items():
+        if key in exclude:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        items[key] = value
+    return items
+
+
+def new_run_id() -> str:
+    """
+    Génère un identifiant de run triable chronologiquement (ex: 20260101-120000-1a2b3c).
+    """
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class RunCheckpoint:
+    """
+    Point de reprise d'un run : nodes terminés et partie sérialisable du
+    contexte, dans <directory>/<run_id>/checkpoint.json.
+    """
+
+    def __init__(self, directory: str, run_id: str):
+        """
+        Args:
+            directory (str): Répertoire des runs (ex: .pocketflow/runs)
+            run_id (str): Identifiant du run
+        """
+        self.directory = directory
+        self.run_id = run_id
+        self.path = os.path.join(directory, run_id, "checkpoint.json")
+
+    @staticmethod
+    def list_runs(directory: str) -> List[str]:
+        """
+        Retourne les identifiants des runs enregistrés, du plus ancien au plus récent.
+        """
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if os.path.isfile(os.path.join(directory, name, "checkpoint.json")))
+
+    @classmethod
+    def resolve(cls, directory: str, run_id: str) -> "RunCheckpoint":
+        """
+        Retrouve un run existant ("last" désigne le plus récent).
+
+        Raises:
+            ValueError: Si le run n'existe pas
+        """
+        if run_id == "last":
+            runs = cls.list_runs(directory)
+            if not runs:
+                raise ValueError(f"Aucun run à reprendre dans {directory}")
+            run_id = runs[-1]
+        checkpoint = cls(directory, run_id)
+        if not os.path.isfile(checkpoint.path):
+            raise ValueError(f"Run introuvable: {run_id}")
+        return checkpoint
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Lit le point de reprise.
+
+        Returns:
+            Dict[str, Any]: {"run_id", "flow", "status", "completed", "context"}
+        """
+        with open(self.path, 'r', encoding='utf8') as f:
+            return json.load(f)
+
+    def save(self, flow_name: str, status: str, completed: List[str], context: Dict[str, Any]) -> None:
+        """
+        Enregistre le point de reprise.
+
+        Args:
+            flow_name (str): Nom du flow
+            status (str): Statut du flow
+            completed (List[str]): Noms des nodes réussis
+            context (Dict[str, Any]): Partie sérialisable du contexte (voir serializable_items)
+        """
+        write_json_atomic(self.path, {
+            "run_id": self.run_id,
+            "flow": flow_name,
+            "status": status,
+            "completed": completed,
+            "context": context
+        })
+
+    def prune(self, keep: int = 20) -> None:
+        """
+        Supprime les runs les plus anciens pour n'en garder que keep.
+        """
+        runs = [run for run in self.list_runs(self.directory) if run != self.run_id]
+        for run in runs[:max(0, len(runs) - keep + 1)]:
+            shutil.rmtree(os.path.join(self.directory, run), ignore_errors=True)
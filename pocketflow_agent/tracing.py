@@ -0,0 +1,216 @@
+"""
+Traces d'exécution (spans) des flows, exportables en JSON lines et au format Chrome trace_event
+"""
+
+import os
+import json
+import time
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List, Iterator, Optional
+
+_tracer: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("pocketflow_tracer", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("pocketflow_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    Intervalle de temps nommé, avec une catégorie (flow, node, llm, file, git...)
+    et des attributs libres.
+    """
+
+    def __init__(self, name: str, category: str, parent: Optional["Span"] = None, attributes: Dict[str, Any] = None):
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.category = category
+        self.attributes = dict(attributes or {})
+        self.thread_id = threading.get_ident()
+        self.wall_start = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.tracer: Optional["Tracer"] = None
+
+    def set(self, **attributes: Any) -> None:
+        """
+        Ajoute ou remplace des attributs.
+        """
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        """
+        Durée en secondes (jusqu'à maintenant si le span est en cours).
+        """
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start": self.wall_start,
+            "duration": self.duration,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes
+        }
+
+
+class Tracer:
+    """
+    Collecte les spans terminés d'un ou plusieurs runs.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retourne le nombre de spans et leur durée cumulée par catégorie.
+        """
+        result: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = result.setdefault(span.category, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span.duration
+        return result
+
+    def export_jsonl(self, path: str) -> None:
+        """
+        Écrit un span par ligne (JSON lines), dans l'ordre de fin.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, 'w', encoding='utf8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    def export_chrome(self, path: str) -> None:
+        """
+        Écrit les spans au format Chrome trace_event (chrome://tracing, Perfetto).
+        """
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": (span.start_ns - self.origin_ns) / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": span.attributes
+        } for span in spans]
+        with open(path, 'w', encoding='utf8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+
+    def export(self, path: str) -> None:
+        """
+        Exporte selon l'extension : ".jsonl" en JSON lines, sinon au format Chrome.
+        """
+        if path.endswith(".jsonl"):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome(path)
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """
+    Active un traceur pour le contexte courant (et les threads et tâches qui en héritent).
+    Sans traceur, le traceur courant est conservé.
+    """
+    if tracer is None:
+        yield _tracer.get()
+        return
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Mesure un bloc de code. Sans traceur actif, ne fait rien et produit None.
+
+    Une exception levée dans le bloc est ajoutée aux attributs ("error").
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        yield None
+        return
+    current = Span(name, category, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer._finish(current)
+
+
+def begin(name: str, category: str, **attributes: Any) -> Optional[Span]:
+    """
+    Démarre un span sans le rendre courant, par exemple dans un générateur
+    dont le corps s'exécute par morceaux. À terminer avec end.
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        return None
+    current = Span(name, category, parent=_current_span.get(), attributes=attributes)
+    current.tracer = tracer
+    return current
+
+
+def end(current: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """
+    Termine un span démarré par begin.
+    """
+    if current is None:
+        return
+    if error is not None:
+        current.set(error=f"{type(error).__name__}: {error}")
+    current.tracer._finish(current)
+
+
+@contextmanager
+def use(current: Optional[Span]) -> Iterator[Optional[Span]]:
+    """
+    Rend un span démarré par begin courant le temps d'un bloc (pour annotate et les spans enfants).
+    """
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
+
+
+def annotate(**attributes: Any) -> None:
+    """
+    Ajoute des attributs au span courant, s'il y en a un.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
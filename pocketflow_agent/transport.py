@@ -0,0 +1,172 @@
+"""
+Pool de connexions HTTP partagé par tous les clients LLM du processus
+"""
+
+import atexit
+import asyncio
+import threading
+import importlib.util
+from typing import Dict, Any, Tuple
+
+import httpx
+
+from .config import get_setting
+
+# Limites par défaut du pool (surchargées par "llm.pool" dans config/default.json)
+DEFAULT_POOL_SETTINGS = {
+    "maxConnections": 20,
+    "maxKeepaliveConnections": 10,
+    "keepaliveExpiry": 30.0,
+    "http2": True
+}
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, bool], httpx.Client] = {}
+# Les clients asynchrones sont liés à une boucle d'événements
+_async_clients: Dict[Tuple[str, bool, int], httpx.AsyncClient] = {}
+_pool_settings: Dict[str, Any] = {}
+
+
+def http2_available() -> bool:
+    """
+    Indique si le support HTTP/2 de httpx est installé (paquet optionnel "h2").
+
+    Returns:
+        bool: True si HTTP/2 peut être activé
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_pool_settings() -> Dict[str, Any]:
+    """
+    Retourne les réglages effectifs du pool.
+
+    Returns:
+        Dict[str, Any]: Réglages par défaut, configuration puis surcharges de configure_pool
+    """
+    settings = dict(DEFAULT_POOL_SETTINGS)
+    settings.update(get_setting("llm.pool", {}) or {})
+    settings.update(_pool_settings)
+    return settings
+
+
+def configure_pool(**settings: Any) -> None:
+    """
+    Modifie les limites du pool. Les clients existants sont fermés pour
+    que les nouvelles limites s'appliquent aux prochaines requêtes.
+
+    Args:
+        **settings: maxConnections, maxKeepaliveConnections, keepaliveExpiry, http2
+    """
+    unknown = set(settings) - set(DEFAULT_POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Réglages de pool inconnus: {', '.join(sorted(unknown))}")
+    _pool_settings.update(settings)
+    close_all()
+
+
+def _build_limits(settings: Dict[str, Any]) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings["maxConnections"],
+        max_keepalive_connections=settings["maxKeepaliveConnections"],
+        keepalive_expiry=settings["keepaliveExpiry"]
+    )
+
+
+def _client_key(base_url: str, http2: bool, settings: Dict[str, Any]) -> Tuple[str, bool]:
+    return base_url.rstrip("/"), bool(http2 and settings["http2"] and http2_available())
+
+
+def get_client(base_url: str, http2: bool = False) -> httpx.Client:
+    """
+    Retourne le client keep-alive partagé pour une URL de base.
+
+    Args:
+        base_url (str): URL de base du fournisseur (ex: https://api.openai.com)
+        http2 (bool, optional): True si le fournisseur supporte HTTP/2
+
+    Returns:
+        httpx.Client: Client partagé par tout le processus
+    """
+    settings = get_pool_settings()
+    key = _client_key(base_url, http2, settings)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                base_url=key[0],
+                http2=key[1],
+                limits=_build_limits(settings)
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_client(base_url: str, http2: bool = False) -> httpx.AsyncClient:
+    """
+    Retourne le client asynchrone partagé pour une URL de base et la boucle courante.
+
+    Args:
+        base_url (str): URL de base du fournisseur
+        http2 (bool, optional): True si le fournisseur supporte HTTP/2
+
+    Returns:
+        httpx.AsyncClient: Client partagé par toutes les coroutines de la boucle
+    """
+    settings = get_pool_settings()
+    base_url, use_http2 = _client_key(base_url, http2, settings)
+    key = (base_url, use_http2, id(asyncio.get_running_loop()))
+
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                http2=use_http2,
+                limits=_build_limits(settings)
+            )
+            _async_clients[key] = client
+        return client
+
+
+def close_all() -> None:
+    """
+    Ferme tous les clients du pool. Ils seront recréés à la demande.
+    """
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+# Les flows ne ferment pas le pool par défaut : il l'est au plus tard à la sortie du processus
+atexit.register(close_all)
+
+
+async def aclose_all() -> None:
+    """
+    Ferme les clients asynchrones de la boucle d'événements courante.
+    """
+    loop_id = id(asyncio.get_running_loop())
+    with _lock:
+        keys = [key for key in _async_clients if key[2] == loop_id]
+        clients = [_async_clients.pop(key) for key in keys]
+    for client in clients:
+        await client.aclose()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Retourne un résumé des clients ouverts.
+
+    Returns:
+        Dict[str, Any]: Nombre de clients et URLs de base ouvertes
+    """
+    with _lock:
+        return {
+            "clients": len(_clients),
+            "async_clients": len(_async_clients),
+            "base_urls": sorted({key[0] for key in list(_clients) + list(_async_clients)})
+        }
@@ -0,0 +1,232 @@
+"""
+Mode surveillance : relance incrémentale du flow quand les documents ou les références Git changent
+"""
+
+import os
+import time
+import threading
+import subprocess
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from . import git
+from . import transport
+
+# Surveillés par défaut, relativement à la racine du dépôt
+DEFAULT_WATCH_PATHS = ("docs", ".git/HEAD", ".git/refs", ".git/packed-refs")
+
+
+class PollingWatcher:
+    """
+    Détecte les modifications de fichiers par comparaison périodique des
+    tailles et dates (os.scandir, sans dépendance). Une rafale de
+    modifications (commit, rebase, écriture de plusieurs documents) ne
+    produit qu'un seul réveil, après debounce secondes sans changement.
+    """
+
+    def __init__(self, paths: Tuple[str, ...] = DEFAULT_WATCH_PATHS, root: str = None,
+                 interval: float = 1.0, debounce: float = 2.0):
+        """
+        Args:
+            paths (Tuple[str, ...], optional): Fichiers ou répertoires surveillés (relatifs à root)
+            root (str, optional): Racine du dépôt (par défaut le répertoire courant)
+            interval (float, optional): Intervalle entre deux relevés, en secondes
+            debounce (float, optional): Durée sans changement avant de signaler une rafale
+        """
+        self.root = os.path.abspath(root or ".")
+        self.paths = [os.path.join(self.root, path) for path in paths]
+        self.interval = interval
+        self.debounce = debounce
+        self._baseline = self.snapshot()
+
+    def _walk(self, path: str, entries: Dict[str, Tuple[int, int]]) -> None:
+        try:
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._walk(entry.path, entries)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        entries[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except NotADirectoryError:
+            stat = os.stat(path)
+            entries[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Relève la date et la taille de chaque fichier surveillé.
+        """
+        entries: Dict[str, Tuple[int, int]] = {}
+        for path in self.paths:
+            self._walk(path, entries)
+        return entries
+
+    @staticmethod
+    def _diff(old: Dict[str, Tuple[int, int]], new: Dict[str, Tuple[int, int]]) -> List[str]:
+        return [path for path in old.keys() | new.keys() if old.get(path) != new.get(path)]
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def reset(self) -> None:
+        """
+        Prend l'état actuel comme référence : toutes les modifications en cours sont ignorées.
+        """
+        self._baseline = self.snapshot()
+
+    def accept(self, own: Callable[[str], bool]) -> None:
+        """
+        Intègre à la référence l'état actuel des seuls chemins pour lesquels
+        own(chemin relatif) est vrai (ex: écritures d'un run). Les autres
+        modifications restent à signaler par wait().
+        """
+        current = self.snapshot()
+        for path in self._baseline.keys() | current.keys():
+            if not own(self._relative(path)):
+                continue
+            if path in current:
+                self._baseline[path] = current[path]
+            else:
+                self._baseline.pop(path, None)
+
+    def wait(self, stop: threading.Event = None) -> List[str]:
+        """
+        Attend une rafale de modifications.
+
+        Args:
+            stop (threading.Event, optional): Interrompt l'attente quand il est levé
+
+        Returns:
+            List[str]: Chemins modifiés (relatifs à la racine), vide si l'attente a été interrompue
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            current = self.snapshot()
+            changed = set(self._diff(self._baseline, current))
+            if changed:
+                quiet_since = time.monotonic()
+                while time.monotonic() - quiet_since < self.debounce and not stop.wait(self.interval):
+                    latest = self.snapshot()
+                    burst = self._diff(current, latest)
+                    if burst:
+                        changed.update(burst)
+                        current, quiet_since = latest, time.monotonic()
+                self._baseline = current
+                return sorted(self._relative(path) for path in changed)
+            stop.wait(self.interval)
+        return []
+
+
+class WatchDaemon:
+    """
+    Garde un flow (et donc ses nodes, son client LLM, son pool de connexions,
+    ses caches et le processus git cat-file) en mémoire et le relance à chaque
+    rafale de modifications. Les runs sont incrémentaux (voir Flow, state_path) :
+    seuls les nodes dont les entrées ont changé sont ré-exécutés.
+    """
+
+    def __init__(self, flow: Any, watcher: PollingWatcher,
+                 context_factory: Callable[[], Dict[str, Any]] = None,
+                 on_result: Callable[[Dict[str, Any], List[str], float], None] = None,
+                 time_budget: Optional[float] = None,
+                 on_error: Callable[[Exception], None] = None):
+        """
+        Args:
+            flow (Flow): Flow à relancer
+            watcher (PollingWatcher): Détecteur de modifications
+            context_factory (Callable, optional): Crée le contexte initial de chaque run
+            on_result (Callable, optional): Appelé après chaque run avec le contexte final,
+                                            les chemins modifiés et la latence en secondes
+            time_budget (float, optional): Durée maximale de chaque run
+            on_error (Callable, optional): Appelé quand un run lève une exception (la surveillance continue)
+        """
+        self.flow = flow
+        self.watcher = watcher
+        self.context_factory = context_factory or dict
+        self.on_result = on_result
+        self.time_budget = time_budget
+        self.on_error = on_error
+        self.runs = 0
+        self.errors = 0
+
+    def _committed_alone(self, context: Dict[str, Any]) -> bool:
+        """
+        Indique si le seul commit arrivé pendant le run est celui du run
+        (GitPushNode) : HEAD est alors exactement un commit après le dernier
+        commit lu par GitCommitNode.
+        """
+        start = context.get("head_commit")
+        if not context.get("committed_files") or not start:
+            return False
+        try:
+            count = git.repo(self.watcher.root).output("rev-list", "--count", f"{start}..HEAD")
+            return int(count.strip()) == 1
+        except (subprocess.CalledProcessError, OSError, ValueError):
+            return False
+
+    def _own_writes(self, context: Dict[str, Any]) -> Callable[[str], bool]:
+        """
+        Chemins écrits par le run lui-même : documents (context["modified_files"]),
+        état du flow (.pocketflow) et références Git si le run a committé seul.
+        """
+        written = [os.path.relpath(os.path.abspath(path), self.watcher.root).replace(os.sep, "/")
+                   for path in context.get("modified_files", [])] + [".pocketflow"]
+        refs = self._committed_alone(context)
+
+        def own(path: str) -> bool:
+            if refs and path.startswith(".git/"):
+                return True
+            return any(path == prefix or path.startswith(prefix + "/") for prefix in written)
+
+        return own
+
+    def run_once(self, changes: List[str]) -> Dict[str, Any]:
+        """
+        Exécute un run pour une rafale de modifications. Les écritures du run
+        ne le relancent pas ; les modifications survenues pendant le run
+        (ex: un commit) restent à signaler et déclenchent le run suivant.
+        """
+        start = time.monotonic()
+        context = self.context_factory()
+        context["watch_changes"] = changes
+        try:
+            result = self.flow.run(context, time_budget=self.time_budget)
+        finally:
+            # Le flow complète context en place, y compris quand il lève une exception
+            self.watcher.accept(self._own_writes(context))
+        self.runs += 1
+        if self.on_result:
+            self.on_result(result, changes, time.monotonic() - start)
+        return result
+
+    def _run_safely(self, changes: List[str]) -> None:
+        try:
+            self.run_once(changes)
+        except Exception as e:
+            self.errors += 1
+            if self.on_error:
+                self.on_error(e)
+
+    def serve(self, stop: threading.Event = None, initial_run: bool = True) -> None:
+        """
+        Boucle jusqu'à ce que stop soit levé (ou KeyboardInterrupt).
+
+        Args:
+            stop (threading.Event, optional): Arrête la boucle
+            initial_run (bool, optional): Si True, un premier run rattrape les changements
+                                          survenus avant le démarrage
+        """
+        stop = stop or threading.Event()
+        # Les connexions restent ouvertes d'un run à l'autre
+        self.flow.close_transport = False
+        try:
+            if initial_run:
+                self._run_safely([])
+            while not stop.is_set():
+                changes = self.watcher.wait(stop)
+                if changes:
+                    self._run_safely(changes)
+        finally:
+            transport.close_all()
+            git.close_all()
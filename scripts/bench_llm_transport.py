@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark du transport HTTP de LLMClient contre un serveur local simulé.
+
+Compare une connexion neuve par appel (httpx.post) avec le pool keep-alive
+partagé utilisé par LLMClient.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Ajouter le répertoire parent au path pour pouvoir importer pocketflow_agent
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocketflow_agent.llm import LLMClient
+from pocketflow_agent import transport
+
+STUB_RESPONSE = json.dumps({
+    "choices": [{"message": {"content": "Réponse simulée"}}]
+}).encode("utf8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serveur compatible OpenAI qui répond immédiatement (HTTP/1.1 keep-alive).
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """
+    Démarre le serveur simulé dans un thread.
+
+    Returns:
+        ThreadingHTTPServer: Serveur démarré sur un port libre
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench(fn, calls):
+    """
+    Mesure la latence de chaque appel.
+
+    Returns:
+        list: Latences en millisecondes
+    """
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pool HTTP de LLMClient")
+    parser.add_argument("--calls", type=int, default=200, help="Nombre d'appels par mode (par défaut: 200)")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "ping"}], "temperature": 0.2}
+
+    # Connexion neuve à chaque appel (ancien comportement)
+    cold = bench(lambda: httpx.post(f"{base_url}/v1/chat/completions", json=payload, timeout=60.0).json(), args.calls)
+
+    # Pool keep-alive partagé
+    client = LLMClient(api_key="bench", provider="openai", base_url=base_url)
+    pooled = bench(lambda: client.generate_text("ping", model_id="stub"), args.calls)
+    transport.close_all()
+    server.shutdown()
+
+    print(f"Appels par mode: {args.calls}")
+    for label, latencies in (("httpx.post (sans pool)", cold), ("LLMClient (pool)", pooled)):
+        print(f"{label:<24} médiane {statistics.median(latencies):6.2f} ms | p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:6.2f} ms")
+    saved = statistics.median(cold) - statistics.median(pooled)
+    print(f"Gain médian par appel: {saved:.2f} ms (hors TLS; le gain réel inclut aussi la poignée de main TLS)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,22 +6,29 @@ Script principal pour exécuter le système PocketFlow de mise à jour des docum
 import os
 import sys
 import argparse
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List
 
 # Ajouter le répertoire parent au path pour pouvoir importer pocketflow_agent
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from pocketflow_agent.flow_definition import (
-    create_full_update_flow,
-    create_dm_log_update_flow,
-    create_mcd_update_flow,
-    create_structure_update_flow
-)
+from pocketflow_agent.config import get_setting
+from pocketflow_agent.jobqueue import JobQueue, QueueWorker, DEFAULT_QUEUE_PATH
 
-def parse_args():
+# Le flow (httpx, client LLM...) n'est importé qu'au moment de l'exécuter :
+# "--enqueue", appelé depuis les hooks Git, doit rendre la main en quelques millisecondes.
+if TYPE_CHECKING:
+    from pocketflow_agent.tracing import Tracer
+
+# Options propres à la file de jobs, non enregistrées avec le job
+QUEUE_OPTIONS = ("enqueue", "worker", "queue_status", "api_key", "render_dm_log")
+
+def parse_args(argv: List[str] = None):
     """
     Parse les arguments de la ligne de commande.
     
+    Args:
+        argv (List[str], optional): Arguments (par défaut ceux de la ligne de commande)
+    
     Returns:
         argparse.Namespace: Arguments parsés
     """
@@ -48,22 +55,417 @@ def parse_args():
         help="Prochaines étapes (pour DM-Log)"
     )
     
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore le cache disque des réponses LLM (flow complet)"
+    )
+    
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Écrit les documents au fil du streaming LLM (flow complet)"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ré-exécute tous les nodes, même ceux dont les entrées n'ont pas changé (flow complet)"
+    )
+    
+    parser.add_argument(
+        "--full-rewrite",
+        action="store_true",
+        help="Fait réécrire les documents en entier au lieu des seules sections concernées (flow complet)"
+    )
+    
+    parser.add_argument(
+        "--all-documents",
+        action="store_true",
+        help="Met à jour tous les documents, même ceux que les fichiers modifiés ne concernent pas (flow complet)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Reprend un run interrompu au premier node en échec (\"last\" pour le plus récent, flow complet)"
+    )
+    
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDES",
+        help="Durée maximale du run ; les documents non terminés à l'échéance sont sautés "
+             "(par défaut \"flow.timeBudget\" dans config/default.json)"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        metavar="FICHIER",
+        help="Enregistre la trace du run : JSON lines si le fichier finit par .jsonl, "
+             "sinon format Chrome trace_event (chrome://tracing, Perfetto)"
+    )
+    
+    parser.add_argument(
+        "--progress",
+        choices=["tty", "jsonl", "silent"],
+        default="tty",
+        help="Affichage de la progression : terminal, un événement JSON par ligne, ou rien (par défaut: tty)"
+    )
+    
+    parser.add_argument(
+        "--progress-file",
+        metavar="FICHIER",
+        help="Fichier où écrire les événements en mode --progress jsonl (par défaut la sortie standard)"
+    )
+    
+    parser.add_argument(
+        "--llm-dashboard",
+        action="store_true",
+        help="Demande en plus un dashboard rédigé par le LLM, généré en arrière-plan après le run"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Reste actif et relance le flow (incrémental) à chaque modification de docs/ ou des références Git"
+    )
+    
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        metavar="SECONDES",
+        help="Intervalle de surveillance en mode --watch (par défaut \"watch.interval\")"
+    )
+    
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        metavar="SECONDES",
+        help="Délai sans modification avant de relancer le flow en mode --watch (par défaut \"watch.debounce\")"
+    )
+    
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Ajoute le run à la file de jobs locale et rend la main aussitôt ; un worker en arrière-plan "
+             "l'exécute (mode des hooks Git)"
+    )
+    
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Exécute les jobs de la file, en regroupant ceux d'un même dépôt, puis s'arrête après "
+             "\"queue.idleExit\" secondes sans job"
+    )
+    
+    parser.add_argument(
+        "--queue-status",
+        action="store_true",
+        help="Affiche l'état de la file de jobs : profondeur, temps d'attente et durée des runs"
+    )
+    
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        const=get_setting("batch.manifest", "pocketflow-repos.json"),
+        metavar="MANIFESTE",
+        help="Exécute le flow complet sur chaque dépôt du manifeste (JSON, ou un chemin par ligne), "
+             "dans un pool de processus (par défaut \"batch.manifest\")"
+    )
+    
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        metavar="N",
+        help="Nombre de dépôts traités en parallèle en mode --batch (par défaut \"batch.maxWorkers\")"
+    )
+    
+    parser.add_argument(
+        "--batch-report",
+        metavar="FICHIER",
+        help="Enregistre le rapport JSON du batch (résultat et durée par dépôt)"
+    )
+    
+    parser.add_argument(
+        "--batch-logs",
+        metavar="REPERTOIRE",
+        help="Enregistre la progression de chaque dépôt en JSON lines (<nom>.jsonl) en mode --batch"
+    )
+    
+    parser.add_argument(
+        "--render-dm-log",
+        action="store_true",
+        help="Régénère docs/dm-log.md avec les entrées du journal pas encore affichées, puis s'arrête"
+    )
+    
     parser.add_argument(
         "--api-key",
         help="Clé API Gemini (si non définie dans les variables d'environnement)"
     )
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
-def main():
+def print_summary(flow, final_context: Dict[str, Any], args: argparse.Namespace, tracer: "Tracer" = None) -> None:
     """
-    Fonction principale.
+    Affiche le résumé d'un run.
     """
-    args = parse_args()
+    import concurrent.futures
+    from pocketflow_agent import git
     
-    # Définir la clé API si fournie
-    if args.api_key:
-        os.environ["GEMINI_API_KEY"] = args.api_key
+    print("\nRésumé de l'exécution:")
+    print(f"Status: {final_context['flow']['status']}")
+    if final_context['flow']['status'] == 'coalesced':
+        print("Regroupé avec le run qui attend déjà sur ce dépôt : aucun node exécuté")
+        return
+    print(f"Nodes exécutés: {len(final_context['flow']['completed_nodes'])}/{final_context['flow']['node_count']}")
+    skipped = sum(1 for node in final_context['flow']['completed_nodes'] if node.get('skipped'))
+    if skipped:
+        print(f"Nodes inchangés (résultat réutilisé): {skipped}")
+    pruned = [node['name'] for node in final_context['flow']['completed_nodes'] if node.get('pruned')]
+    if pruned:
+        print(f"Documents non concernés par les modifications: {', '.join(pruned)}")
+    out_of_time = [node['name'] for node in final_context['flow']['completed_nodes']
+                   if node['status'] == 'skipped' and not node.get('pruned')]
+    if out_of_time:
+        print(f"Nodes sautés faute de temps: {', '.join(out_of_time)}")
+    
+    cache = flow.llm_client.cache if flow.llm_client else None
+    if cache:
+        stats = cache.stats()
+        print(f"Cache LLM: {stats['hits']} succès, {stats['misses']} échecs, {stats['entries']} entrées")
+    
+    if flow.llm_client:
+        retries = flow.llm_client.retry_stats()
+        print(f"Appels LLM: {retries['attempts']} tentatives, {retries['retries']} nouvelles tentatives "
+              f"({retries['wait_seconds']:.1f}s d'attente), disjoncteur {retries['breaker_state']}")
+    
+    git_stats = git.stats()
+    if git_stats:
+        print("Git: " + ", ".join(f"{operation} {entry['count']}× {entry['seconds']:.2f}s"
+                                  for operation, entry in sorted(git_stats.items())))
+    
+    if tracer:
+        tracer.export(args.trace)
+        durations = ", ".join(f"{category} {entry['seconds']:.2f}s ({entry['count']})"
+                              for category, entry in sorted(tracer.summary().items()))
+        print(f"Trace enregistrée dans {args.trace}: {durations}")
+    
+    if flow.dashboard_future is not None:
+        try:
+            llm_dashboard = flow.dashboard_future.result(timeout=get_setting("flow.dashboardTimeout", 30))
+        except concurrent.futures.TimeoutError:
+            llm_dashboard = None
+            print("Dashboard LLM non disponible à temps")
+        if llm_dashboard:
+            print(llm_dashboard)
+    
+    # Afficher les erreurs s'il y en a
+    errors = [node for node in final_context['flow']['completed_nodes'] if node['status'] == 'error']
+    if errors:
+        print("\nErreurs:")
+        for error in errors:
+            print(f"- {error['name']}: {error.get('error', 'Erreur inconnue')}")
+        if final_context['flow'].get('run_id'):
+            print(f"\nPour reprendre ce run: --resume {final_context['flow']['run_id']}")
+
+def watch(flow, initial_context: Dict[str, Any], args: argparse.Namespace, tracer: "Tracer" = None) -> int:
+    """
+    Mode --watch : garde le flow en mémoire et le relance à chaque rafale de modifications.
+    """
+    from pocketflow_agent.watch import PollingWatcher, WatchDaemon, DEFAULT_WATCH_PATHS
+    
+    watcher = PollingWatcher(
+        tuple(get_setting("watch.paths", DEFAULT_WATCH_PATHS)),
+        interval=args.watch_interval if args.watch_interval is not None else get_setting("watch.interval", 1.0),
+        debounce=args.debounce if args.debounce is not None else get_setting("watch.debounce", 2.0)
+    )
+    
+    def on_result(final_context: Dict[str, Any], changes: List[str], elapsed: float) -> None:
+        if changes:
+            print(f"\nModifications détectées: {', '.join(changes[:5])}{' ...' if len(changes) > 5 else ''}")
+        print_summary(flow, final_context, args, tracer)
+        print(f"Run terminé en {elapsed:.2f}s ; en attente de modifications (Ctrl+C pour arrêter)...")
+    
+    time_budget = args.time_budget if args.time_budget is not None else get_setting("flow.timeBudget")
+    def on_error(error: Exception) -> None:
+        print(f"\nErreur pendant le run: {error} ; en attente de modifications...")
+    
+    daemon = WatchDaemon(flow, watcher, context_factory=lambda: dict(initial_context), on_result=on_result,
+                         time_budget=time_budget, on_error=on_error)
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        print(f"\nSurveillance arrêtée après {daemon.runs} run(s)")
+    return 0
+
+def open_queue() -> JobQueue:
+    """
+    Ouvre la file de jobs ("queue.path", par défaut ~/.cache/pocketflow/jobs.sqlite).
+    """
+    return JobQueue(os.path.expanduser(get_setting("queue.path") or DEFAULT_QUEUE_PATH))
+
+def enqueue(args: argparse.Namespace) -> int:
+    """
+    Mode --enqueue : enregistre le job et démarre un worker en arrière-plan s'il n'y en a pas.
+    """
+    if args.watch or args.resume or args.batch:
+        print("Les options --watch, --resume et --batch ne sont pas disponibles avec --enqueue")
+        return 2
+    queue = open_queue()
+    job = queue.enqueue(os.getcwd(), {key: value for key, value in vars(args).items() if key not in QUEUE_OPTIONS})
+    if not queue.worker_alive():
+        import subprocess
+        log_path = os.path.join(os.path.dirname(queue.path), "worker.log")
+        with open(log_path, "a", encoding="utf8") as log:
+            worker = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker"],
+                                      stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                      start_new_session=True)
+        # Un hook lancé avant le premier signal du worker ne doit pas en démarrer un second
+        queue.heartbeat(worker.pid)
+    print(f"Job {job} ajouté à la file ({queue.depth()} en attente)")
+    queue.close()
+    return 0
+
+def run_job(repo: str, job_args: Dict[str, Any]) -> None:
+    """
+    Exécute un job de la file dans son dépôt.
+    
+    Raises:
+        RuntimeError: Si le flow ne s'est pas terminé
+    """
+    from pocketflow_agent import git
+    
+    os.chdir(repo)
+    git.reset_stats()
+    args = argparse.Namespace(**{**vars(parse_args([])), **job_args})
+    try:
+        status = execute(args)
+    finally:
+        git.close_all()
+    if status != 0:
+        raise RuntimeError(f"run terminé avec le code {status}")
+
+def work(args: argparse.Namespace) -> int:
+    """
+    Mode --worker : exécute les jobs de la file jusqu'à "queue.idleExit" secondes sans job.
+    """
+    def on_batch(report: Dict[str, Any]) -> None:
+        print(f"\nLot {report['batch']} ({report['repo']}): {report['jobs']} job(s) regroupé(s), "
+              f"attente {report['wait']:.1f}s, run {report['run']:.1f}s, {report['depth']} job(s) en attente"
+              + (f", erreur: {report['error']}" if report['error'] else ""), flush=True)
+    
+    queue = open_queue()
+    worker = QueueWorker(queue, run_job, poll=get_setting("queue.poll", 1.0),
+                         idle_exit=get_setting("queue.idleExit", 300),
+                         stale_after=get_setting("queue.staleAfter", 60), on_batch=on_batch)
+    try:
+        worker.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+        close_transport()
+    return 0
+
+def queue_status() -> int:
+    """
+    Mode --queue-status : profondeur de la file et temps des dernières 24 heures.
+    """
+    import time
+    
+    queue = open_queue()
+    stats = queue.stats(since=time.time() - 86400)
+    print(f"File de jobs {queue.path}")
+    print(f"En attente: {stats['pending']}, en cours: {stats['running']}, "
+          f"worker {'actif' if queue.worker_alive() else 'arrêté'}")
+    print(f"Dernières 24 h: {stats['runs']} run(s) pour {stats['done'] + stats['error']} job(s) "
+          f"({stats['error']} en erreur)")
+    print(f"Attente: moyenne {stats['avg_wait']:.1f}s, max {stats['max_wait']:.1f}s ; "
+          f"run: moyenne {stats['avg_run']:.1f}s, max {stats['max_run']:.1f}s")
+    queue.close()
+    return 0
+
+def batch(args: argparse.Namespace) -> int:
+    """
+    Mode --batch : flow complet sur les dépôts d'un manifeste, dans un pool de processus.
+    """
+    from pocketflow_agent.batch import BatchRunner, load_manifest
+    from pocketflow_agent.state import write_json_atomic
+    
+    try:
+        repos = load_manifest(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"Erreur: {str(e)}")
+        return 2
+    options = {
+        "use_cache": not args.no_cache,
+        "incremental": not args.force,
+        "sections": False if args.full_rewrite else None,
+        "impact": False if args.all_documents else None
+    }
+    time_budget = args.time_budget if args.time_budget is not None else get_setting("flow.timeBudget")
+    runner = BatchRunner.from_config(options=options, time_budget=time_budget, log_dir=args.batch_logs,
+                                     **({"max_workers": args.batch_workers} if args.batch_workers else {}))
+    print(f"Batch de {len(repos)} dépôt(s), {min(runner.max_workers, len(repos))} en parallèle...")
+    
+    def on_result(result: Dict[str, Any]) -> None:
+        ok = result['status'] in ('completed', 'coalesced')
+        print(f"{'✅' if ok else '❌'} {result['name']}: {result['status']} en {result['elapsed']:.1f}s"
+              + (f" ({result['errors'][0]})" if result['errors'] else ""), flush=True)
+    
+    report = runner.run(repos, on_result=on_result)
+    summary = report['summary']
+    counts = ", ".join(f"{status} {count}" for status, count in sorted(summary.items())
+                       if status not in ('repo_seconds', 'speedup'))
+    print(f"\nBatch terminé en {report['elapsed']:.1f}s avec {report['workers']} processus: {counts}")
+    print(f"Somme des runs: {summary['repo_seconds']:.1f}s (accélération ×{summary['speedup']:.1f})")
+    if report['restarts']:
+        print(f"Dépôts relancés après l'arrêt d'un processus: {report['restarts']}")
+    if args.batch_report:
+        write_json_atomic(args.batch_report, report)
+        print(f"Rapport enregistré dans {args.batch_report}")
+    
+    return 0 if all(result['status'] in ('completed', 'coalesced') for result in report['repos']) else 1
+
+def render_dm_log() -> int:
+    """
+    Mode --render-dm-log : insère dans la vue du DM-Log les entrées en attente.
+    """
+    from pocketflow_agent.dmlog import DMLogStore
+    
+    store = DMLogStore("docs/dm-log.md")
+    pending = store.pending()
+    if store.render():
+        print(f"docs/dm-log.md mis à jour ({max(pending, 0)} entrée(s) ajoutée(s))")
+    else:
+        print("docs/dm-log.md est à jour")
+    return 0
+
+def close_transport() -> None:
+    """
+    Ferme le pool HTTP partagé, une fois par processus : le worker garde ses
+    connexions d'un job à l'autre (voir run_job).
+    """
+    from pocketflow_agent import transport
+    
+    transport.close_all()
+
+def execute(args: argparse.Namespace) -> int:
+    """
+    Construit le flow demandé et l'exécute (une fois, ou en continu en mode --watch).
+    
+    Returns:
+        int: Code de sortie (0 si le flow s'est terminé)
+    """
+    from pocketflow_agent.tracing import Tracer
+    from pocketflow_agent.reporting import create_reporter
+    from pocketflow_agent.flow_definition import (
+        create_full_update_flow,
+        create_dm_log_update_flow,
+        create_mcd_update_flow,
+        create_structure_update_flow
+    )
     
     # Contexte initial
     initial_context = {
@@ -71,9 +473,13 @@ def main():
         "next_steps": args.next_steps
     }
     
+    tracer = Tracer() if args.trace else None
+    
     # Sélectionner le flow approprié
     if args.type == "full":
-        flow = create_full_update_flow()
+        flow = create_full_update_flow(use_cache=not args.no_cache, stream=args.stream, incremental=not args.force,
+                                       tracer=tracer, sections=False if args.full_rewrite else None,
+                                       impact=False if args.all_documents else None)
         print("Exécution du flow complet de mise à jour des documents...")
     elif args.type == "dm-log":
         flow = create_dm_log_update_flow()
@@ -85,22 +491,57 @@ def main():
         flow = create_structure_update_flow()
         print("Exécution du flow de mise à jour de la structure du projet...")
     
+    if tracer and flow.tracer is None:
+        flow.tracer = tracer
+    flow.reporter = create_reporter(args.progress, path=args.progress_file)
+    flow.llm_dashboard = args.llm_dashboard
+    
+    if args.watch:
+        if args.resume:
+            print("L'option --resume n'est pas disponible en mode --watch")
+            return 2
+        return watch(flow, initial_context, args, tracer)
+    
     # Exécuter le flow
-    final_context = flow.run(initial_context)
+    if args.resume and args.type != "full":
+        print("L'option --resume n'est disponible que pour le flow complet")
+        return 2
+    try:
+        time_budget = args.time_budget if args.time_budget is not None else get_setting("flow.timeBudget")
+        final_context = flow.run(initial_context, resume=args.resume, time_budget=time_budget)
+    except ValueError as e:
+        print(f"Erreur: {str(e)}")
+        return 2
     
-    # Afficher un résumé
-    print("\nRésumé de l'exécution:")
-    print(f"Status: {final_context['flow']['status']}")
-    print(f"Nodes exécutés: {len(final_context['flow']['completed_nodes'])}/{final_context['flow']['node_count']}")
+    print_summary(flow, final_context, args, tracer)
     
-    # Afficher les erreurs s'il y en a
-    errors = [node for node in final_context['flow']['completed_nodes'] if node['status'] == 'error']
-    if errors:
-        print("\nErreurs:")
-        for error in errors:
-            print(f"- {error['name']}: {error.get('error', 'Erreur inconnue')}")
+    return 0 if final_context['flow']['status'] in ('completed', 'coalesced') else 1
+
+def main():
+    """
+    Fonction principale.
+    """
+    args = parse_args()
+    
+    # Définir la clé API si fournie
+    if args.api_key:
+        os.environ["GEMINI_API_KEY"] = args.api_key
     
-    return 0 if final_context['flow']['status'] == 'completed' else 1
+    if args.enqueue:
+        return enqueue(args)
+    if args.worker:
+        return work(args)
+    if args.queue_status:
+        return queue_status()
+    if args.batch:
+        return batch(args)
+    if args.render_dm_log:
+        return render_dm_log()
+    try:
+        return execute(args)
+    finally:
+        # Fin du run (et du dashboard LLM, attendu par print_summary) : le pool ne sert plus
+        close_transport()
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -5,23 +5,61 @@ Tests unitaires pour le système PocketFlow
 
 import os
 import sys
+import json
+import stat
+import time
+import io
+import zlib
+import asyncio
+import tempfile
+import threading
+import subprocess
+import multiprocessing
 import unittest
-from unittest.mock import MagicMock, patch
+import httpx
+from unittest.mock import MagicMock, AsyncMock, patch
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 
 # Ajouter le répertoire parent au path pour pouvoir importer pocketflow_agent
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pocketflow_agent.nodes.node import BaseNode
-from pocketflow_agent.flow import Flow
+from pocketflow_agent.flow import Flow, AsyncFlow, run_flows_concurrently
 from pocketflow_agent.llm import LLMClient
+from pocketflow_agent import transport
+from pocketflow_agent.cache import LLMCache, cache_key
+from pocketflow_agent import resilience
+from pocketflow_agent import deadline
+from pocketflow_agent import tracing
+from pocketflow_agent import ratelimit
+from pocketflow_agent import git
+from pocketflow_agent.dmlog import DMLogStore
+from pocketflow_agent.documents import write_document
+from pocketflow_agent.markdown import parse_sections, splice, chunk_sections, merge_chunks
+from pocketflow_agent.reporting import TTYReporter, JSONLReporter, SilentReporter
+from pocketflow_agent.scanner import ProjectScanner
+from pocketflow_agent.impact import ImpactRules, parse_name_status
+from pocketflow_agent.watch import PollingWatcher, WatchDaemon
+from pocketflow_agent.jobqueue import JobQueue, QueueWorker
+from pocketflow_agent import runlock
+from pocketflow_agent.runlock import RunLock
+from pocketflow_agent.ratelimit import RateLimiter, TokenBucket, SharedTokenBucket
+from pocketflow_agent.batch import BatchRunner, load_manifest
+from pocketflow_agent.resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, LLMHTTPError
+from pocketflow_agent.flow_definition import create_full_update_flow
+from pocketflow_agent.state import FlowState, RunCheckpoint, CommitCursor, fingerprint, file_hash, write_json_atomic
 from pocketflow_agent.nodes.dm_log_nodes import (
     GitCommitNode,
     DMLogParserNode,
+    DMLogSummaryNode,
     DMLogLLMNode,
     DMLogUpdateNode,
     GitPushNode
 )
 from pocketflow_agent.nodes.doc_update_nodes import (
+    ProjectScanNode,
+    ChangeImpactNode,
     ModelConceptUpdateNode,
     ProjectStructureUpdateNode,
     TasksUpdateNode,
@@ -127,6 +165,537 @@ class TestFlow(unittest.TestCase):
             self.assertEqual(result["result_node1"], "result1")
             self.assertEqual(result["flow"]["status"], "error")
 
+class TestFlowDependencies(unittest.TestCase):
+    """
+    Tests pour l'exécution en graphe (DAG) de Flow
+    """
+    
+    def run_flow(self, flow):
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            return flow.run({})
+    
+    def test_independent_nodes_run_in_parallel(self):
+        """
+        Test que les nodes indépendants s'exécutent en parallèle et que le node de jonction attend
+        """
+        nodes = [SleepNode(f"doc_{i}", 0.2) for i in range(4)] + [SleepNode("join", 0)]
+        flow = Flow(nodes, dependencies={"join": [f"doc_{i}" for i in range(4)]}, max_workers=4)
+        
+        start = time.time()
+        result = self.run_flow(flow)
+        
+        self.assertLess(time.time() - start, 0.6)
+        self.assertEqual(result["flow"]["status"], "completed")
+        names = [node["name"] for node in result["flow"]["completed_nodes"]]
+        self.assertEqual(names[-1], "join")
+        self.assertEqual(len(names), 5)
+    
+    def test_error_skips_dependents(self):
+        """
+        Test qu'une erreur empêche les dépendants de démarrer sans perdre les résultats des autres branches
+        """
+        failing = MagicMock(spec=BaseNode)
+        failing.name = "failing"
+        failing.exec.side_effect = Exception("Test error")
+        join = MagicMock(spec=BaseNode)
+        join.name = "join"
+        
+        flow = Flow([SleepNode("other", 0.05), failing, join],
+                    dependencies={"join": ["other", "failing"]}, max_workers=2)
+        result = self.run_flow(flow)
+        
+        self.assertEqual(result["flow"]["status"], "error")
+        join.exec.assert_not_called()
+        statuses = {node["name"]: node["status"] for node in result["flow"]["completed_nodes"]}
+        self.assertEqual(statuses, {"other": "success", "failing": "error"})
+        self.assertEqual(result["result_other"], "other")
+    
+    def test_invalid_dependencies(self):
+        """
+        Test que les dépendances inconnues et les cycles sont refusés
+        """
+        nodes = [SleepNode("a", 0), SleepNode("b", 0)]
+        with self.assertRaises(ValueError):
+            Flow(nodes, dependencies={"a": ["missing"]})
+        with self.assertRaises(ValueError):
+            Flow(nodes, dependencies={"a": ["b"], "b": ["a"]})
+    
+    def test_async_flow_with_dependencies(self):
+        """
+        Test que AsyncFlow respecte le même graphe de dépendances
+        """
+        nodes = [SleepNode(f"doc_{i}", 0.2) for i in range(3)] + [SleepNode("join", 0)]
+        flow = AsyncFlow(nodes, dependencies={"join": ["doc_0", "doc_1", "doc_2"]}, max_workers=3)
+        start = time.time()
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            result = flow.run({})
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(result["flow"]["completed_nodes"][-1]["name"], "join")
+
+class SleepNode(BaseNode):
+    """
+    Node asynchrone simulant un appel LLM
+    """
+    
+    def __init__(self, name, delay):
+        super().__init__(name)
+        self.delay = delay
+    
+    def exec(self, context):
+        time.sleep(self.delay)
+        return self.name
+    
+    async def aexec(self, context):
+        await asyncio.sleep(self.delay)
+        return self.name
+
+class TestAsyncFlow(unittest.TestCase):
+    """
+    Tests pour la classe AsyncFlow
+    """
+    
+    def test_aexec_falls_back_to_exec(self):
+        """
+        Test que aexec exécute exec dans un thread par défaut
+        """
+        node = MagicMock(spec=BaseNode)
+        node.exec.return_value = "sync"
+        result = asyncio.run(BaseNode.aexec(node, {}))
+        self.assertEqual(result, "sync")
+    
+    def test_arun_success(self):
+        """
+        Test de l'exécution réussie d'un AsyncFlow avec un node synchrone et un node asynchrone
+        """
+        sync_node = MagicMock(spec=BaseNode)
+        sync_node.name = "sync_node"
+        sync_node.exec.return_value = "result1"
+        sync_node.aexec = lambda context: BaseNode.aexec(sync_node, context)
+        
+        flow = AsyncFlow([sync_node, SleepNode("async_node", 0)])
+        with patch('builtins.print'):
+            result = asyncio.run(flow.arun({}))
+        
+        self.assertEqual(result["result_sync_node"], "result1")
+        self.assertEqual(result["result_async_node"], "async_node")
+        self.assertEqual(result["flow"]["status"], "completed")
+    
+    def test_flows_run_concurrently(self):
+        """
+        Test que plusieurs flows attendent leurs nodes LLM en parallèle
+        """
+        flows = [AsyncFlow([SleepNode(f"llm_{i}", 0.2)]) for i in range(10)]
+        start = time.time()
+        with patch('builtins.print'):
+            results = asyncio.run(run_flows_concurrently(flows))
+        
+        self.assertLess(time.time() - start, 1.0)
+        self.assertTrue(all(result["flow"]["status"] == "completed" for result in results))
+
+class FileNode(BaseNode):
+    """
+    Node dont l'empreinte dépend du contenu d'un fichier
+    """
+    
+    def __init__(self, name, path, result="done"):
+        super().__init__(name)
+        self.path = path
+        self.result = result
+        self.calls = 0
+    
+    def fingerprint(self, context):
+        return fingerprint(self.name, file_hash(self.path))
+    
+    def exec(self, context):
+        self.calls += 1
+        return self.result
+
+class TestIncrementalFlow(unittest.TestCase):
+    """
+    Tests pour l'exécution incrémentale (empreintes des nodes)
+    """
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, ".pocketflow", "state.json")
+        self.input_path = os.path.join(self.tmp.name, "input.md")
+        with open(self.input_path, 'w', encoding='utf8') as f:
+            f.write("v1")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def run_flow(self, nodes, flow_class=Flow):
+        flow = flow_class(nodes, state_path=self.state_path)
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            return flow.run({})
+    
+    def test_unchanged_node_is_skipped(self):
+        """
+        Test qu'un node inchangé est sauté et que son résultat est réutilisé
+        """
+        node = FileNode("doc", self.input_path, result={"lines": 3})
+        self.run_flow([node])
+        result = self.run_flow([node])
+        
+        self.assertEqual(node.calls, 1)
+        self.assertEqual(result["result_doc"], {"lines": 3})
+        self.assertTrue(result["flow"]["completed_nodes"][0]["skipped"])
+        
+        with open(self.input_path, 'w', encoding='utf8') as f:
+            f.write("v2")
+        self.run_flow([node], flow_class=AsyncFlow)
+        self.assertEqual(node.calls, 2)
+    
+    def test_non_serializable_result_is_not_reused(self):
+        """
+        Test qu'un résultat non sérialisable en JSON force la ré-exécution
+        """
+        node = FileNode("doc", self.input_path, result=object())
+        self.run_flow([node])
+        self.run_flow([node])
+        self.assertEqual(node.calls, 2)
+        self.assertIsNone(FlowState(self.state_path).lookup("doc", node.fingerprint({})))
+    
+    def test_document_node_skips_llm_call(self):
+        """
+        Test qu'un document déjà à jour n'est pas régénéré au run suivant
+        """
+        client = LLMClient(api_key="key", provider="openai")
+        node = TasksUpdateNode(path=self.input_path, llm_client=client)
+        with patch.object(LLMClient, 'generate_text', return_value="# Tâches") as mock_generate:
+            self.run_flow([node])
+            result = self.run_flow([node])
+            self.assertEqual(mock_generate.call_count, 1)
+        self.assertTrue(result["result_tasks_update"])
+        
+        node.PROMPT = "Nouveau prompt {content}"
+        with patch.object(LLMClient, 'generate_text', return_value="# Tâches") as mock_generate:
+            self.run_flow([node])
+            mock_generate.assert_called_once()
+
+class TestCheckpointResume(unittest.TestCase):
+    """
+    Tests pour les points de reprise des runs
+    """
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.runs_dir = os.path.join(self.tmp.name, "runs")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def make_nodes(self, fail):
+        first = MagicMock(spec=BaseNode)
+        first.name = "first"
+        first.exec.side_effect = lambda context: context.setdefault("dm_entry", "entrée") and "ok"
+        second = MagicMock(spec=BaseNode)
+        second.name = "second"
+        if fail:
+            second.exec.side_effect = Exception("Test error")
+        else:
+            second.exec.side_effect = lambda context: context["dm_entry"].upper()
+        return first, second
+    
+    def run_flow(self, nodes, resume=None):
+        flow = Flow(list(nodes), checkpoint_dir=self.runs_dir)
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            return flow.run({"abort_event": threading.Event()}, resume=resume)
+    
+    def test_resume_restarts_at_failed_node(self):
+        """
+        Test que la reprise saute les nodes réussis et restaure le contexte sérialisable
+        """
+        failed = self.run_flow(self.make_nodes(fail=True))
+        run_id = failed["flow"]["run_id"]
+        saved = RunCheckpoint(self.runs_dir, run_id).load()
+        self.assertEqual(saved["completed"], ["first"])
+        self.assertEqual(saved["status"], "error")
+        self.assertNotIn("abort_event", saved["context"])
+        
+        first, second = self.make_nodes(fail=False)
+        result = self.run_flow([first, second], resume=run_id)
+        
+        first.exec.assert_not_called()
+        self.assertEqual(result["flow"]["status"], "completed")
+        self.assertEqual(result["flow"]["run_id"], run_id)
+        self.assertEqual(result["result_first"], "ok")
+        self.assertEqual(result["result_second"], "ENTRÉE")
+        self.assertEqual(RunCheckpoint.resolve(self.runs_dir, "last").load()["status"], "completed")
+    
+    def test_resume_unknown_run(self):
+        """
+        Test qu'un run inconnu est refusé
+        """
+        with self.assertRaises(ValueError):
+            self.run_flow(self.make_nodes(fail=False), resume="inconnu")
+        with self.assertRaises(ValueError):
+            Flow([]).run({}, resume="last")
+
+class TestDeadlines(unittest.TestCase):
+    """
+    Tests pour les échéances des nodes et le budget de temps du flow
+    """
+    
+    def test_http_timeout_follows_remaining_budget(self):
+        """
+        Test que les délais HTTP sont bornés par le temps restant
+        """
+        self.assertEqual(deadline.http_timeout(60.0).read, 60.0)
+        with deadline.scope(5.0):
+            with deadline.scope(30.0):
+                timeout = deadline.http_timeout(60.0)
+        self.assertLessEqual(timeout.read, 5.0)
+        self.assertLessEqual(timeout.connect, 5.0)
+        with deadline.scope(0):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                deadline.http_timeout(60.0)
+    
+    def test_retry_does_not_wait_past_deadline(self):
+        """
+        Test qu'aucune nouvelle tentative n'attend au-delà de l'échéance
+        """
+        response = httpx.Response(503, request=httpx.Request("POST", "https://stub"))
+        error = httpx.HTTPStatusError("503", request=response.request, response=response)
+        sleep = MagicMock()
+        policy = RetryPolicy(max_attempts=4, base_delay=5.0, jitter=False)
+        with deadline.scope(1.0), self.assertRaises(httpx.HTTPStatusError):
+            resilience.call_with_retry(MagicMock(side_effect=error), "deadline-test", policy,
+                                       CircuitBreaker(), sleep=sleep)
+        sleep.assert_not_called()
+    
+    def test_optional_nodes_skipped_when_budget_exhausted(self):
+        """
+        Test que les nodes optionnels sont sautés une fois le budget épuisé et que les autres échouent
+        """
+        optional = SleepNode("doc", 0)
+        optional.optional = True
+        flow = Flow([SleepNode("slow", 0.2), optional, SleepNode("push", 0)])
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            result = flow.run({}, time_budget=0.1)
+        
+        statuses = {node["name"]: node["status"] for node in result["flow"]["completed_nodes"]}
+        self.assertEqual(statuses, {"slow": "success", "doc": "skipped", "push": "error"})
+        self.assertEqual(result["flow"]["status"], "error")
+    
+    def test_async_node_timeout_cancels_node(self):
+        """
+        Test que AsyncFlow annule un node optionnel qui dépasse son timeout
+        """
+        hung = SleepNode("hung", 5.0)
+        hung.timeout = 0.1
+        hung.optional = True
+        flow = AsyncFlow([hung, SleepNode("next", 0)])
+        start = time.time()
+        with patch.object(flow, '_generate_ascii_footer', return_value=""), patch('builtins.print'):
+            result = flow.run({})
+        
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(result["flow"]["status"], "completed")
+        self.assertEqual([node["status"] for node in result["flow"]["completed_nodes"]], ["skipped", "success"])
+
+class TestProgressReporting(unittest.TestCase):
+    """
+    Tests des afficheurs de progression et du dashboard final
+    """
+    
+    def _flow(self, **kwargs):
+        node1 = MagicMock(spec=BaseNode)
+        node1.name = "node1"
+        node1.exec.return_value = "result1"
+        node2 = MagicMock(spec=BaseNode)
+        node2.name = "node2"
+        node2.exec.side_effect = Exception("Test error")
+        return Flow([node1, node2], **kwargs)
+    
+    def test_jsonl_events(self):
+        """
+        Test que JSONLReporter émet un événement par étape du run
+        """
+        stream = io.StringIO()
+        flow = self._flow(reporter=JSONLReporter(stream=stream))
+        with patch('builtins.print') as mock_print:
+            flow.run({})
+        mock_print.assert_not_called()
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([event["event"] for event in events],
+                         ["flow_started", "node_started", "node_finished", "node_started", "node_finished",
+                          "flow_finished"])
+        self.assertEqual(events[2]["status"], "success")
+        self.assertEqual(events[4]["error"], "Test error")
+        self.assertEqual(events[5]["status"], "error")
+    
+    def test_silent_reporter(self):
+        """
+        Test que le mode silencieux n'affiche rien mais garde le dashboard dans le contexte
+        """
+        flow = self._flow(reporter=SilentReporter())
+        with patch('builtins.print') as mock_print:
+            result = flow.run({})
+        mock_print.assert_not_called()
+        self.assertIn("Résultat: ❌ Erreur", result["flow"]["dashboard"])
+    
+    def test_footer_does_not_call_llm(self):
+        """
+        Test que le dashboard final est calculé sans appel LLM par défaut
+        """
+        client = MagicMock()
+        flow = self._flow(llm_client=client, reporter=SilentReporter())
+        flow.run({})
+        client.generate_text.assert_not_called()
+        self.assertIsNone(flow.dashboard_future)
+    
+    def test_llm_dashboard_in_background(self):
+        """
+        Test que le dashboard LLM est généré en arrière-plan quand il est demandé
+        """
+        client = MagicMock()
+        client.generate_text.return_value = "Dashboard LLM"
+        flow = self._flow(llm_client=client, reporter=SilentReporter(), llm_dashboard=True)
+        result = flow.run({})
+        self.assertEqual(flow.dashboard_future.result(timeout=5), "Dashboard LLM")
+        self.assertEqual(result["flow"]["llm_dashboard"], "Dashboard LLM")
+        self.assertIn("node2: Test error", client.generate_text.call_args[0][0])
+    
+    def test_tty_progress_is_throttled(self):
+        """
+        Test que la barre de progression d'un terminal est redessinée au plus une fois par intervalle
+        """
+        stream = io.StringIO()
+        stream.isatty = lambda: True
+        reporter = TTYReporter(stream=stream, min_interval=60)
+        nodes = []
+        for i in range(5):
+            node = MagicMock(spec=BaseNode)
+            node.name = f"node{i}"
+            node.exec.return_value = i
+            nodes.append(node)
+        flow = Flow(nodes, reporter=reporter)
+        context = {"flow": {"node_count": 5, "completed_nodes": [], "elapsed_time": "0:00:00"}}
+        for i, node in enumerate(nodes):
+            reporter.node_started(flow, context, i, node)
+        self.assertEqual(stream.getvalue().count("\r"), 1)
+        self.assertNotIn("Exécution du node", stream.getvalue())
+
+DOCUMENT = """Introduction.
+
+# Structure
+
+## scripts/
+Voir update_docs.py.
+
+```bash
+# pas un titre
+```
+
+## tests/
+Tests unitaires.
+
+## Notes
+A
+
+## Notes
+B
+"""
+
+class TestMarkdownSections(unittest.TestCase):
+    """
+    Tests du découpage en sections et des mises à jour partielles de documents
+    """
+    
+    def test_parse_sections(self):
+        """
+        Test du découpage : préambule, blocs de code ignorés, titres en double
+        """
+        sections = parse_sections(DOCUMENT)
+        self.assertEqual("".join(section.text for section in sections), DOCUMENT)
+        self.assertEqual([section.key for section in sections],
+                         ["", "# structure", "## scripts/", "## tests/", "## notes", "## notes#2"])
+        self.assertIn("# pas un titre", sections[2].text)
+    
+    def test_splice(self):
+        """
+        Test du remplacement d'une section et de l'ajout d'une nouvelle section
+        """
+        sections = {section.key: section for section in parse_sections(DOCUMENT)}
+        replacements = parse_sections("## Tests/\nTests unitaires et d'intégration.\n## config/\nRéglages.\n")
+        updated = splice(DOCUMENT, replacements, {"## tests/": sections["## tests/"].hash})
+        
+        self.assertIn("## Tests/\nTests unitaires et d'intégration.\n\n## Notes", updated)
+        self.assertTrue(updated.endswith("B\n\n## config/\nRéglages.\n"))
+        self.assertIn(sections["## scripts/"].text, updated)
+        
+        with self.assertRaises(ValueError):
+            splice(DOCUMENT, replacements, {"## tests/": "ancienne empreinte"})
+    
+    def test_node_sends_only_affected_sections(self):
+        """
+        Test qu'un document en mode sections n'envoie que les sections concernées au LLM
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "structure.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(DOCUMENT)
+            client = LLMClient(api_key="key", provider="openai")
+            node = ProjectStructureUpdateNode(path=path, llm_client=client, sections=True)
+            response = "```markdown\n## scripts/\nVoir update_docs.py et run_batch.py.\n```"
+            with patch.object(LLMClient, 'generate_text', return_value=response) as mock_generate:
+                context = {"changed_files": ["scripts/update_docs.py"]}
+                self.assertTrue(node.exec(context))
+                prompt = mock_generate.call_args[0][0]
+                self.assertIn("Voir update_docs.py.", prompt)
+                self.assertNotIn("Tests unitaires.", prompt)
+                self.assertEqual(context["modified_files"], [path])
+                
+                node.exec({"changed_files": []})
+                mock_generate.assert_called_once()
+            with open(path, 'r', encoding='utf8') as f:
+                content = f.read()
+        scripts = parse_sections(DOCUMENT)[2].text
+        self.assertEqual(content, DOCUMENT.replace(scripts, "## scripts/\nVoir update_docs.py et run_batch.py.\n\n"))
+
+    def test_chunk_sections(self):
+        """
+        Test du regroupement des sections sous un budget de tokens
+        """
+        sections = parse_sections("".join(f"## Partie {i}\n{'x' * 36}\n" for i in range(5)))
+        chunks = chunk_sections(sections, 30)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(len(chunk_sections(sections[:1], 1)), 1)
+    
+    def test_merge_chunks(self):
+        """
+        Test de l'assemblage des morceaux : blocs de code retirés, sections répétées supprimées
+        """
+        merged = merge_chunks(["```markdown\n# Titre\nA\n```", "# Titre\nA\n\n## Suite\nB\n"])
+        self.assertEqual(merged, "# Titre\nA\n\n## Suite\nB\n")
+    
+    def test_node_updates_chunks_in_parallel(self):
+        """
+        Test qu'un long document est mis à jour par morceaux en parallèle puis réassemblé
+        """
+        barrier = threading.Barrier(3, timeout=5)
+        
+        def generate(prompt, model_id=None):
+            barrier.wait()
+            content = prompt.split("```markdown\n")[1].split("```")[0]
+            return content.replace("ancien", "nouveau")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "design.md")
+            document = "".join(f"## Partie {i}\nContenu ancien {'x' * 60}\n\n" for i in range(3))
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(document)
+            client = LLMClient(api_key="key", provider="openai")
+            node = TasksUpdateNode(path=path, llm_client=client, chunk_tokens=30)
+            with patch.object(LLMClient, 'generate_text', side_effect=generate) as mock_generate:
+                self.assertTrue(node.exec({}))
+            self.assertEqual(mock_generate.call_count, 3)
+            self.assertIn("partie 2/3", mock_generate.call_args_list[1][0][0])
+            with open(path, 'r', encoding='utf8') as f:
+                self.assertEqual(f.read(), document.replace("ancien", "nouveau").rstrip("\n") + "\n")
+
 class TestLLMClient(unittest.TestCase):
     """
     Tests pour la classe LLMClient
@@ -147,7 +716,7 @@ class TestLLMClient(unittest.TestCase):
         client = LLMClient(api_key="param_key")
         self.assertEqual(client.api_key, "param_key")
     
-    @patch('httpx.post')
+    @patch('httpx.Client.post')
     def test_generate_text(self, mock_post):
         """
         Test de la méthode generate_text
@@ -169,35 +738,1395 @@ class TestLLMClient(unittest.TestCase):
         mock_post.return_value = mock_response
         
         # Appeler la méthode
-        client = LLMClient(api_key="test_key")
+        client = LLMClient(api_key="test_key", provider="gemini")
         result = client.generate_text("Test prompt")
         
         # Vérifier le résultat
         self.assertEqual(result, "Generated text")
         mock_post.assert_called_once()
 
-class TestGitCommitNode(unittest.TestCase):
+    @patch('httpx.AsyncClient.post', new_callable=AsyncMock)
+    def test_agenerate_text(self, mock_post):
+        """
+        Test de la méthode agenerate_text
+        """
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {"choices": [{"message": {"content": "Async text"}}]}
+        mock_post.return_value = mock_response
+        
+        client = LLMClient(api_key="test_key", provider="openai")
+        
+        async def generate():
+            try:
+                return await client.agenerate_text("Test prompt")
+            finally:
+                await transport.aclose_all()
+        
+        self.assertEqual(asyncio.run(generate()), "Async text")
+        mock_post.assert_awaited_once()
+
+class TestTransport(unittest.TestCase):
     """
-    Tests pour la classe GitCommitNode
+    Tests pour le pool HTTP partagé
     """
     
-    @patch('subprocess.check_output')
-    def test_exec(self, mock_check_output):
+    def tearDown(self):
+        transport.close_all()
+    
+    def test_client_shared_per_base_url(self):
         """
-        Test de la méthode exec
+        Test que deux clients LLM du même fournisseur partagent la même connexion
         """
-        # Configurer le mock
-        mock_check_output.return_value = "Task: Test task"
+        client1 = LLMClient(api_key="key1", provider="openai")
+        client2 = LLMClient(api_key="key2", provider="openai")
+        other = LLMClient(api_key="key3", provider="gemini")
         
-        # Appeler la méthode
-        node = GitCommitNode()
-        result = node.exec({})
+        self.assertIs(client1._http_client(), client2._http_client())
+        self.assertIsNot(client1._http_client(), other._http_client())
+        self.assertEqual(transport.pool_stats()["clients"], 2)
+    
+    def test_close_all(self):
+        """
+        Test de la fermeture du pool
+        """
+        http_client = transport.get_client("http://127.0.0.1:1")
+        transport.close_all()
+        self.assertTrue(http_client.is_closed)
+        self.assertEqual(transport.pool_stats()["clients"], 0)
+    
+    def test_configure_pool_rejects_unknown_settings(self):
+        """
+        Test que les réglages inconnus sont refusés
+        """
+        with self.assertRaises(ValueError):
+            transport.configure_pool(maxSockets=3)
+    
+    def test_full_flow_shares_llm_client(self):
+        """
+        Test que tous les nodes LLM du flow complet partagent le même client
+        """
+        flow = create_full_update_flow(test_mode=True, use_cache=False)
+        self.assertEqual(flow.max_workers, 4)
+        clients = {id(node.llm) for node in flow.nodes if hasattr(node, "llm")}
+        self.assertEqual(len(clients), 1)
+        self.assertIs(flow.llm_client, flow.nodes[2].llm)
+    
+    def test_run_keeps_pool_open_by_default(self):
+        """
+        Test que la fin d'un run ne ferme pas les connexions d'un autre flow du processus
+        """
+        http_client = transport.get_client("http://127.0.0.1:1")
+        with patch('builtins.print'):
+            Flow([]).run()
+        self.assertFalse(http_client.is_closed)
+        self.assertIs(transport.get_client("http://127.0.0.1:1"), http_client)
+    
+    def test_run_closes_pool_when_requested(self):
+        """
+        Test que Flow.run ferme le pool à la fin de l'exécution avec close_transport=True
+        """
+        http_client = transport.get_client("http://127.0.0.1:1")
+        flow = Flow([], close_transport=True)
+        with patch('builtins.print'):
+            flow.run()
+        self.assertTrue(http_client.is_closed)
+
+class TestLLMCache(unittest.TestCase):
+    """
+    Tests pour le cache disque des réponses LLM
+    """
+    
+    def test_key_depends_on_all_inputs(self):
+        """
+        Test que la clé change avec le fournisseur, le modèle, la température et le prompt
+        """
+        base = cache_key("openai", "gpt", 0.2, "prompt")
+        self.assertEqual(base, cache_key("openai", "gpt", 0.2, "prompt"))
+        self.assertNotEqual(base, cache_key("gemini", "gpt", 0.2, "prompt"))
+        self.assertNotEqual(base, cache_key("openai", "gpt-4", 0.2, "prompt"))
+        self.assertNotEqual(base, cache_key("openai", "gpt", 0.3, "prompt"))
+        self.assertNotEqual(base, cache_key("openai", "gpt", 0.2, "prompt!"))
+    
+    def test_hit_and_miss_counters(self):
+        """
+        Test des compteurs de succès et d'échecs
+        """
+        cache = LLMCache(":memory:")
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "réponse")
+        self.assertEqual(cache.get("k"), "réponse")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+    
+    def test_lru_eviction_by_size(self):
+        """
+        Test que l'entrée la moins récemment utilisée est évincée quand la taille maximale est dépassée
+        """
+        payload = os.urandom(600).hex()
+        entry_size = len(zlib.compress(payload.encode("utf8")))
+        cache = LLMCache(":memory:", max_bytes=entry_size * 2 + entry_size // 2)
+        now = time.time()
+        with patch('time.time', side_effect=[now - 4, now - 3, now - 2, now - 1]):
+            cache.put("old", payload)
+            cache.put("recent", payload)
+            cache.get("old")
+            cache.put("new", payload)
+        self.assertIsNone(cache.get("recent"))
+        self.assertIsNotNone(cache.get("old"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_expired_entries_are_misses(self):
+        """
+        Test que les entrées trop anciennes ne sont plus servies
+        """
+        cache = LLMCache(":memory:", max_age_days=1)
+        with patch('time.time', return_value=0.0):
+            cache.put("k", "réponse")
+        with patch('time.time', return_value=2 * 86400.0):
+            self.assertIsNone(cache.get("k"))
+    
+    @patch('httpx.Client.post')
+    def test_client_uses_cache(self, mock_post):
+        """
+        Test qu'un prompt identique n'est envoyé qu'une fois, sauf si le cache est contourné
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"choices": [{"message": {"content": "Texte"}}]}
+        mock_post.return_value = mock_response
         
-        # Vérifier le résultat
-        self.assertEqual(result["task_name"], "Test task")
-        self.assertIn("today", result)
-        self.assertIn("task_results", result)
-        self.assertIn("next_steps", result)
+        client = LLMClient(api_key="test_key", provider="openai", cache=LLMCache(":memory:"))
+        self.assertEqual(client.generate_text("Prompt"), "Texte")
+        self.assertEqual(client.generate_text("Prompt"), "Texte")
+        self.assertEqual(mock_post.call_count, 1)
+        
+        client.generate_text("Prompt", use_cache=False)
+        self.assertEqual(mock_post.call_count, 2)
+        transport.close_all()
+
+def sse_client(events, provider_check=None):
+    """
+    Crée un client httpx qui répond par un flux SSE simulé
+    """
+    def handler(request):
+        if provider_check:
+            provider_check(request)
+        body = "".join(f"data: {event}\n\n" for event in events)
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+    
+    return httpx.Client(transport=httpx.MockTransport(handler), base_url="https://stub")
+
+def async_sse_client(events):
+    """
+    Crée un client httpx asynchrone qui répond par un flux SSE simulé
+    """
+    def handler(request):
+        body = "".join(f"data: {event}\n\n" for event in events)
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+    
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://stub")
+
+class TestStreaming(unittest.TestCase):
+    """
+    Tests pour la génération en streaming
+    """
+    
+    OPENAI_EVENTS = [
+        '{"choices": [{"delta": {"content": "# Titre"}}]}',
+        '{"choices": [{"delta": {}}]}',
+        '{"choices": [{"delta": {"content": "\\nContenu"}}]}',
+        '[DONE]'
+    ]
+    
+    def test_openai_stream(self):
+        """
+        Test du streaming compatible OpenAI
+        """
+        def check(request):
+            self.assertIn(b'"stream":true', request.content.replace(b" ", b""))
+        
+        client = LLMClient(api_key="key", provider="openai")
+        with patch.object(LLMClient, '_http_client', return_value=sse_client(self.OPENAI_EVENTS, check)):
+            chunks = list(client.stream_text("prompt"))
+        self.assertEqual(chunks, ["# Titre", "\nContenu"])
+    
+    def test_gemini_stream(self):
+        """
+        Test du streaming Gemini (streamGenerateContent)
+        """
+        def check(request):
+            self.assertIn(":streamGenerateContent", request.url.path)
+        
+        events = ['{"candidates": [{"content": {"parts": [{"text": "Bonjour"}]}}]}']
+        client = LLMClient(api_key="key", provider="gemini")
+        with patch.object(LLMClient, '_http_client', return_value=sse_client(events, check)):
+            self.assertEqual("".join(client.stream_text("prompt")), "Bonjour")
+    
+    def test_node_streams_to_document(self):
+        """
+        Test que le node écrit le flux dans le document via un renommage atomique
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write("# Ancien")
+            client = LLMClient(api_key="key", provider="openai")
+            node = TasksUpdateNode(path=path, llm_client=client, stream=True)
+            context = {}
+            with patch.object(LLMClient, '_http_client', return_value=sse_client(self.OPENAI_EVENTS)):
+                node.exec(context)
+            
+            with open(path, 'r', encoding='utf8') as f:
+                self.assertEqual(f.read(), "# Titre\nContenu")
+            self.assertEqual(context["modified_files"], [path])
+            self.assertEqual(os.listdir(tmp), ["tasks.md"])
+    
+    def test_node_astreams_to_document(self):
+        """
+        Test que aexec écrit aussi le flux dans le document quand stream=True
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write("# Ancien")
+            client = LLMClient(api_key="key", provider="openai")
+            node = TasksUpdateNode(path=path, llm_client=client, stream=True)
+            context = {}
+            with patch.object(LLMClient, '_async_http_client', return_value=async_sse_client(self.OPENAI_EVENTS)), \
+                 patch.object(LLMClient, 'agenerate_text') as agenerate_text:
+                asyncio.run(node.aexec(context))
+            
+            agenerate_text.assert_not_called()
+            with open(path, 'r', encoding='utf8') as f:
+                self.assertEqual(f.read(), "# Titre\nContenu")
+            self.assertEqual(context["modified_files"], [path])
+            self.assertEqual(os.listdir(tmp), ["tasks.md"])
+    
+    def test_node_abort_keeps_document(self):
+        """
+        Test qu'une interruption laisse le document d'origine intact
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write("# Ancien")
+            abort_event = threading.Event()
+            abort_event.set()
+            client = LLMClient(api_key="key", provider="openai")
+            node = TasksUpdateNode(path=path, llm_client=client, stream=True)
+            with patch.object(LLMClient, '_http_client', return_value=sse_client(self.OPENAI_EVENTS)):
+                with self.assertRaises(Exception):
+                    node.exec({"abort_event": abort_event})
+            
+            with open(path, 'r', encoding='utf8') as f:
+                self.assertEqual(f.read(), "# Ancien")
+            self.assertEqual(os.listdir(tmp), ["tasks.md"])
+
+def scripted_client(responses):
+    """
+    Crée un client httpx qui renvoie successivement les réponses données
+    """
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        return responses[min(len(calls), len(responses)) - 1]
+    
+    client = httpx.Client(transport=httpx.MockTransport(handler), base_url="https://stub")
+    return client, calls
+
+class TestResilience(unittest.TestCase):
+    """
+    Tests pour les nouvelles tentatives et le disjoncteur
+    """
+    
+    OK = httpx.Response(200, json={"choices": [{"message": {"content": "OK"}}]})
+    
+    def setUp(self):
+        resilience.reset()
+    
+    def tearDown(self):
+        resilience.reset()
+    
+    def test_retry_honors_retry_after(self):
+        """
+        Test qu'une réponse 429 est réessayée après le délai Retry-After
+        """
+        client_http, calls = scripted_client([
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            self.OK
+        ])
+        client = LLMClient(api_key="key", provider="openai", retry_policy=RetryPolicy(max_attempts=3))
+        with patch.object(LLMClient, '_http_client', return_value=client_http), \
+             patch('time.sleep') as mock_sleep, patch('builtins.print'):
+            self.assertEqual(client.generate_text("prompt"), "OK")
+        
+        mock_sleep.assert_called_once_with(2.0)
+        self.assertEqual(len(calls), 2)
+        stats = client.retry_stats()
+        self.assertEqual((stats["attempts"], stats["retries"], stats["wait_seconds"]), (2, 1, 2.0))
+    
+    def test_retry_after_beyond_max_delay_gives_up(self):
+        """
+        Test qu'un Retry-After supérieur à max_delay n'est ni raccourci ni attendu
+        """
+        self.assertEqual(RetryPolicy(max_delay=5.0).delay(1, retry_after=8.0), 8.0)
+        client_http, calls = scripted_client([
+            httpx.Response(429, headers={"Retry-After": "120"}),
+            self.OK
+        ])
+        client = LLMClient(api_key="key", provider="openai", retry_policy=RetryPolicy(max_attempts=3, max_delay=30.0))
+        with patch.object(LLMClient, '_http_client', return_value=client_http), \
+             patch('time.sleep') as mock_sleep, patch('builtins.print'):
+            with self.assertRaises(LLMHTTPError) as error:
+                client.generate_text("prompt")
+        
+        self.assertEqual(error.exception.status_code, 429)
+        mock_sleep.assert_not_called()
+        self.assertEqual(len(calls), 1)
+    
+    def test_client_errors_are_not_retried(self):
+        """
+        Test qu'une erreur 400 n'est pas réessayée et lève une LLMHTTPError
+        """
+        client_http, calls = scripted_client([httpx.Response(400)])
+        client = LLMClient(api_key="key", provider="openai", retry_policy=RetryPolicy(max_attempts=3))
+        with patch.object(LLMClient, '_http_client', return_value=client_http), patch('builtins.print'):
+            with self.assertRaises(LLMHTTPError) as error:
+                client.generate_text("prompt")
+        
+        self.assertEqual(error.exception.status_code, 400)
+        self.assertEqual(len(calls), 1)
+    
+    def test_backoff_is_bounded(self):
+        """
+        Test du backoff exponentiel plafonné
+        """
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=False)
+        self.assertEqual([policy.delay(attempt) for attempt in range(1, 5)], [1.0, 2.0, 4.0, 5.0])
+        jittered = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        self.assertTrue(0 <= jittered.delay(3) <= 4.0)
+    
+    def test_circuit_breaker_opens(self):
+        """
+        Test que le disjoncteur s'ouvre après des échecs répétés puis refuse les appels
+        """
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        
+        def failing():
+            raise httpx.ConnectError("refused")
+        
+        with self.assertRaises(httpx.ConnectError):
+            resilience.call_with_retry(failing, "stub", RetryPolicy(max_attempts=2), breaker, sleep=lambda _: None)
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            resilience.call_with_retry(lambda: "OK", "stub", RetryPolicy(), breaker)
+        
+        breaker.opened_at -= 60
+        self.assertEqual(resilience.call_with_retry(lambda: "OK", "stub", RetryPolicy(), breaker), "OK")
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(resilience.get_counters("stub")["rejected"], 1)
+    
+    def test_half_open_admits_a_single_probe(self):
+        """
+        Test qu'un seul appel d'essai passe en "half_open", et qu'une erreur non transitoire le libère
+        """
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        breaker.release()
+        
+        def rejected():
+            raise ValueError("requête invalide")
+        
+        with self.assertRaises(ValueError):
+            resilience.call_with_retry(rejected, "stub", RetryPolicy(), breaker)
+        self.assertEqual(resilience.call_with_retry(lambda: "OK", "stub", RetryPolicy(), breaker), "OK")
+        self.assertEqual(breaker.state, "closed")
+
+class TestTracing(unittest.TestCase):
+    """
+    Tests pour les traces d'exécution
+    """
+    
+    def setUp(self):
+        resilience.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.md")
+        with open(self.path, 'w', encoding='utf8') as f:
+            f.write("# Ancien")
+    
+    def tearDown(self):
+        resilience.reset()
+        self.tmp.cleanup()
+    
+    def run_traced_flow(self):
+        client_http, calls = scripted_client([
+            httpx.Response(503),
+            httpx.Response(200, json={"choices": [{"message": {"content": "# Tâches"}}]})
+        ])
+        client = LLMClient(api_key="key", provider="openai", retry_policy=RetryPolicy(max_attempts=3))
+        tracer = tracing.Tracer()
+        flow = Flow([TasksUpdateNode(path=self.path, llm_client=client)], tracer=tracer)
+        with patch.object(LLMClient, '_http_client', return_value=client_http), \
+             patch.object(flow, '_generate_ascii_footer', return_value=""), \
+             patch('time.sleep'), patch('builtins.print'):
+            flow.run({})
+        return tracer
+    
+    def test_spans_cover_node_llm_and_files(self):
+        """
+        Test qu'un run produit des spans imbriqués pour le node, l'appel LLM et les fichiers
+        """
+        tracer = self.run_traced_flow()
+        spans = {span.name: span for span in tracer.spans}
+        
+        self.assertEqual(spans["tasks_update"].parent_id, spans["PocketFlow Update Flow"].span_id)
+        self.assertEqual(spans["tasks_update"].attributes["status"], "success")
+        llm = spans["llm.generate"]
+        self.assertEqual(llm.parent_id, spans["tasks_update"].span_id)
+        self.assertEqual(llm.attributes["provider"], "openai")
+        self.assertEqual(llm.attributes["model"], "gpt-3.5-turbo")
+        self.assertEqual(llm.attributes["retries"], 1)
+        self.assertEqual(llm.attributes["response_bytes"], len("# Tâches".encode("utf8")))
+        self.assertGreater(llm.attributes["prompt_bytes"], 0)
+        self.assertEqual(spans["llm.retry_wait"].parent_id, llm.span_id)
+        self.assertEqual(spans["file.read"].attributes["bytes"], len("# Ancien"))
+        self.assertEqual(spans["file.write"].attributes["path"], self.path)
+    
+    def test_exports(self):
+        """
+        Test des exports JSON lines et Chrome trace_event
+        """
+        tracer = self.run_traced_flow()
+        jsonl_path = os.path.join(self.tmp.name, "trace.jsonl")
+        chrome_path = os.path.join(self.tmp.name, "trace.json")
+        tracer.export(jsonl_path)
+        tracer.export(chrome_path)
+        
+        with open(jsonl_path, 'r', encoding='utf8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), len(tracer.spans))
+        self.assertIn("attributes", records[0])
+        with open(chrome_path, 'r', encoding='utf8') as f:
+            events = json.load(f)["traceEvents"]
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in events))
+        self.assertIn("node", {event["cat"] for event in events})
+    
+    def test_no_tracer_is_noop(self):
+        """
+        Test que les spans ne font rien sans traceur actif
+        """
+        with tracing.span("llm.generate", "llm") as span:
+            tracing.annotate(ignored=True)
+        self.assertIsNone(span)
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Tests pour le limiteur de débit
+    """
+    
+    def tearDown(self):
+        ratelimit.reset()
+    
+    def test_bucket_reservation(self):
+        """
+        Test que le seau fait attendre au-delà de sa capacité puis se remplit
+        """
+        with patch('time.monotonic', return_value=100.0):
+            bucket = TokenBucket(capacity=2, refill_per_second=1)
+            self.assertEqual(bucket.reserve(1), 0.0)
+            self.assertEqual(bucket.reserve(1), 0.0)
+            self.assertEqual(bucket.reserve(1), 1.0)
+            self.assertEqual(bucket.reserve(1), 2.0)
+        with patch('time.monotonic', return_value=104.0):
+            self.assertEqual(bucket.reserve(2), 0.0)
+    
+    def test_limits_requests_and_tokens(self):
+        """
+        Test que la limite la plus contraignante (requêtes ou tokens) détermine l'attente
+        """
+        with patch('time.monotonic', return_value=0.0), patch('time.sleep') as mock_sleep:
+            limiter = RateLimiter(rpm=60, tpm=600)
+            limiter.acquire(600)
+            limiter.acquire(60)
+        mock_sleep.assert_called_once_with(6.0)
+        self.assertEqual(limiter.stats(), {"waits": 1, "wait_seconds": 6.0})
+    
+    def test_shared_per_provider_and_key(self):
+        """
+        Test que les clients de même fournisseur et même clé partagent le limiteur
+        """
+        with patch('pocketflow_agent.ratelimit.get_setting', return_value={"rpm": 10}):
+            client1 = LLMClient(api_key="key", provider="openai")
+            client2 = LLMClient(api_key="key", provider="openai")
+            other = LLMClient(api_key="other", provider="openai")
+        self.assertIsNotNone(client1.rate_limiter)
+        self.assertIs(client1.rate_limiter, client2.rate_limiter)
+        self.assertIsNot(client1.rate_limiter, other.rate_limiter)
+    
+    def test_unconfigured_provider_is_unlimited(self):
+        """
+        Test qu'aucun limiteur n'est créé sans limites configurées
+        """
+        with patch('pocketflow_agent.ratelimit.get_setting', return_value={}):
+            self.assertIsNone(LLMClient(api_key="key", provider="openai").rate_limiter)
+    
+    def test_shared_bucket_across_processes(self):
+        """
+        Test que les réservations d'un autre processus consomment le même seau
+        """
+        context = multiprocessing.get_context("spawn")
+        bucket = SharedTokenBucket(capacity=10, refill_per_second=0.001, context=context)
+        process = context.Process(target=bucket.reserve, args=(4,))
+        process.start()
+        process.join(timeout=30)
+        self.assertEqual(process.exitcode, 0)
+        self.assertAlmostEqual(bucket.tokens, 6, delta=0.1)
+        
+        ratelimit.install_shared_buckets({"openai": (bucket, None)})
+        limiter = LLMClient(api_key="key", provider="openai").rate_limiter
+        self.assertIs(limiter.requests, bucket)
+        self.assertIs(LLMClient(api_key="other", provider="openai").rate_limiter.requests, bucket)
+
+class TestDocumentWrites(unittest.TestCase):
+    """
+    Tests des écritures de documents et du commit des seuls fichiers modifiés
+    """
+    
+    def test_write_document_skips_identical_content(self):
+        """
+        Test qu'un contenu identique n'est pas réécrit
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.md")
+            self.assertTrue(write_document(path, "# Doc\n"))
+            inode = os.stat(path).st_ino
+            self.assertFalse(write_document(path, "# Doc\n"))
+            self.assertEqual(os.stat(path).st_ino, inode)
+            self.assertTrue(write_document(path, "# Doc v2\n"))
+            with open(path, 'r', encoding='utf8') as f:
+                self.assertEqual(f.read(), "# Doc v2\n")
+            self.assertEqual(os.listdir(tmp), ["doc.md"])
+    
+    def test_atomic_writes_sync_before_replace(self):
+        """
+        Test que le fichier temporaire est écrit sur le disque avant le renommage, puis le répertoire
+        """
+        calls = []
+        real_fsync, real_replace = os.fsync, os.replace
+        
+        def fsync(fd):
+            calls.append("dir" if stat.S_ISDIR(os.fstat(fd).st_mode) else "file")
+            real_fsync(fd)
+        
+        def replace(src, dst):
+            calls.append("replace")
+            real_replace(src, dst)
+        
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch('os.fsync', side_effect=fsync), patch('os.replace', side_effect=replace):
+            write_document(os.path.join(tmp, "doc.md"), "# Doc\n")
+            write_json_atomic(os.path.join(tmp, "state.json"), {"a": 1})
+        expected = ["file", "replace", "dir"] if os.name == "posix" else ["file", "replace"]
+        self.assertEqual(calls, expected * 2)
+    
+    def test_unchanged_document_is_not_marked_modified(self):
+        """
+        Test qu'une réponse LLM identique au document ne l'ajoute pas aux fichiers modifiés
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write("# Tâches")
+            node = TasksUpdateNode(path=path, llm_client=LLMClient(api_key="key", provider="openai"))
+            context = {}
+            with patch.object(LLMClient, 'generate_text', return_value="# Tâches"):
+                self.assertTrue(node.exec(context))
+            self.assertNotIn("modified_files", context)
+    
+    @patch('subprocess.call', return_value=1)
+    @patch('subprocess.check_call')
+    def test_git_push_stages_only_modified_files(self, mock_check_call, mock_call):
+        """
+        Test que GitPushNode ne committe que les fichiers modifiés, et rien sans modification
+        """
+        node = GitPushNode(files=["docs/tasks.md", "docs/requirements.md"])
+        self.assertTrue(node.exec({"modified_files": []}))
+        mock_check_call.assert_not_called()
+        
+        node.exec({"modified_files": ["docs/tasks.md"], "today": "2026-01-01"})
+        commands = [call[0][0] for call in mock_check_call.call_args_list]
+        self.assertEqual(commands, [["git", "add", "--", "docs/tasks.md"],
+                                    ["git", "commit", "-m", "Auto-update docs: 2026-01-01"],
+                                    ["git", "push"]])
+        
+        mock_check_call.reset_mock()
+        mock_call.return_value = 0
+        node.exec({"modified_files": ["docs/tasks.md"]})
+        self.assertEqual([call[0][0][1] for call in mock_check_call.call_args_list], ["add"])
+    
+    @patch('subprocess.call', return_value=1)
+    @patch('subprocess.check_call')
+    def test_git_push_adds_files_in_one_call(self, mock_check_call, mock_call):
+        """
+        Test que tous les fichiers sont indexés par un seul appel et que les opérations sont chronométrées
+        """
+        git.reset_stats()
+        files = ["docs/tasks.md", "docs/requirements.md", "docs/dm-log.md"]
+        GitPushNode(files=files).exec({"modified_files": files, "today": "2026-01-01"})
+        self.assertEqual(mock_check_call.call_args_list[0][0][0], ["git", "add", "--"] + files)
+        self.assertEqual(mock_check_call.call_count, 3)
+        self.assertEqual({operation: entry["count"] for operation, entry in git.stats().items()},
+                         {"add": 1, "diff": 1, "commit": 1, "push": 1})
+    
+    def test_tree_read_through_batch_process(self):
+        """
+        Test que les arbres sont lus par un unique processus git cat-file --batch
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            def run(*args):
+                subprocess.check_call(["git", *args], cwd=tmp, stdout=subprocess.DEVNULL)
+            run("init", "-q")
+            for name in ["a.txt", "b.txt"]:
+                with open(os.path.join(tmp, name), 'w', encoding='utf8') as f:
+                    f.write(name)
+            run("add", ".")
+            run("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+            
+            repo = git.GitRepo(tmp)
+            try:
+                with patch('subprocess.Popen', wraps=subprocess.Popen) as popen:
+                    first = repo.tree("HEAD")
+                    second = repo.tree("HEAD")
+                self.assertEqual(popen.call_count, 1)
+                self.assertEqual([entry[1] for entry in first], ["a.txt", "b.txt"])
+                self.assertEqual(first, second)
+                self.assertIsNone(repo.read_object("unknown-ref"))
+            finally:
+                repo.close()
+
+class TestProjectScanner(unittest.TestCase):
+    """
+    Tests de l'inventaire des fichiers du projet
+    """
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        files = {
+            ".gitignore": "*.log\n/build/\ndocs/*.tmp\n",
+            "app.py": "", "debug.log": "", "build/out.js": "",
+            "docs/a.md": "", "docs/b.tmp": "", "node_modules/lib/index.js": "",
+            "frontend/.gitignore": "dist/\n!keep.log\n",
+            "frontend/src/main.js": "", "frontend/dist/bundle.js": "", "frontend/keep.log": "",
+            "frontend/build/x.js": ""
+        }
+        for name, content in files.items():
+            path = os.path.join(self.root, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(content)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_scan_respects_gitignore(self):
+        """
+        Test que les .gitignore (racine et sous-répertoires) et node_modules sont respectés
+        """
+        snapshot = ProjectScanner(self.root).scan()
+        self.assertEqual(snapshot.paths, [".gitignore", "app.py", "docs/a.md", "frontend/.gitignore",
+                                          "frontend/build/x.js", "frontend/keep.log", "frontend/src/main.js"])
+    
+    def test_cache_rescans_only_changed_directories(self):
+        """
+        Test qu'un nouveau scan ne relit que les répertoires modifiés
+        """
+        os.makedirs(os.path.join(self.root, ".pocketflow"))
+        cache_path = os.path.join(self.root, ".pocketflow", "scan.json")
+        first = ProjectScanner(self.root, cache_path=cache_path).scan()
+        self.assertEqual(first.reused, 0)
+        
+        with open(os.path.join(self.root, "frontend", "src", "new.js"), 'w', encoding='utf8') as f:
+            f.write("")
+        scanned = []
+        real_scandir = os.scandir
+        
+        def scandir(path):
+            scanned.append(os.path.relpath(path, self.root))
+            return real_scandir(path)
+        
+        with patch('os.scandir', side_effect=scandir):
+            second = ProjectScanner(self.root, cache_path=cache_path).scan()
+        self.assertEqual(scanned, [os.path.join("frontend", "src")])
+        self.assertEqual(second.scanned, 1)
+        self.assertIn("frontend/src/new.js", second.paths)
+        self.assertEqual(len(second.files), len(first.files) + 1)
+    
+    def test_scan_node_shares_listing(self):
+        """
+        Test que ProjectScanNode partage la liste des fichiers et qu'elle est ajoutée aux prompts
+        """
+        context = {}
+        ProjectScanNode(root=self.root, max_files=2).exec(context)
+        self.assertEqual(context["project_files"], ".gitignore\napp.py\n... (5 autres fichiers)")
+        
+        path = os.path.join(self.root, "docs", "a.md")
+        llm = LLMClient(api_key="key", provider="openai")
+        with patch.object(LLMClient, 'generate_text', return_value="# Tâches") as generate:
+            TasksUpdateNode(path=path, llm_client=llm).exec(context)
+            ModelConceptUpdateNode(path=path, llm_client=llm).exec(context)
+        self.assertIn("... (5 autres fichiers)", generate.call_args_list[0][0][0])
+        self.assertNotIn("app.py", generate.call_args_list[1][0][0])
+
+class TestChangeImpact(unittest.TestCase):
+    """
+    Tests du routage des documents selon les fichiers modifiés
+    """
+    
+    DOCUMENTS = ["model_concept_update", "project_structure_update", "tasks_update", "requirements_update"]
+    
+    def plan(self, output):
+        return ImpactRules.from_config().plan(parse_name_status(output), self.DOCUMENTS)
+    
+    def test_plan_from_config(self):
+        """
+        Test que seuls les documents concernés par les fichiers modifiés sont retenus
+        """
+        self.assertEqual(self.plan("M\tfrontend/src/styles/app.css\nM\tdocs/tasks.md\n")["run"], [])
+        self.assertEqual(self.plan("M\tbackend/services/userService.js\n")["run"],
+                         ["model_concept_update", "tasks_update"])
+        self.assertEqual(self.plan("A\tfrontend/src/pages/New.jsx\n")["run"],
+                         ["project_structure_update", "tasks_update"])
+        plan = self.plan("R087\tsrc/old.js\tsrc/new.js\n")
+        self.assertEqual(plan["reasons"]["project_structure_update"], ["src/new.js"])
+        self.assertIn("requirements_update", plan["skip"])
+    
+    def test_unrouted_modification_falls_back_to_default(self):
+        """
+        Test qu'un fichier modifié couvert seulement par une règle d'autres statuts touche les documents par défaut
+        """
+        for path in ["lib/foo.py", "setup.py", "requirements.txt", "Makefile"]:
+            self.assertEqual(self.plan(f"M\t{path}\n")["run"], ["tasks_update"], path)
+        self.assertEqual(self.plan("A\tlib/foo.py\n")["run"], ["project_structure_update"])
+    
+    @patch('subprocess.check_output', return_value="M\tfrontend/src/App.css\n")
+    def test_flow_prunes_untouched_documents(self, mock_check_output):
+        """
+        Test que le flow saute les nodes écartés par le plan sans bloquer leurs dépendants
+        """
+        document = MagicMock(spec=BaseNode)
+        document.name = "tasks_update"
+        join = MagicMock(spec=BaseNode)
+        join.name = "join"
+        impact = ChangeImpactNode(documents=["tasks_update"])
+        flow = Flow([impact, document, join], reporter=SilentReporter(),
+                    dependencies={"tasks_update": ["change_impact"], "join": ["tasks_update"]})
+        
+        result = flow.run({"commits": [{"commit": "bbb"}, {"commit": "ccc"}]})
+        self.assertEqual(mock_check_output.call_args[0][0], ["git", "diff", "--name-status", "-M", "bbb^", "ccc"])
+        document.exec.assert_not_called()
+        join.exec.assert_called_once()
+        entries = {entry["name"]: entry for entry in result["flow"]["completed_nodes"]}
+        self.assertTrue(entries["tasks_update"]["pruned"])
+        self.assertEqual(result["flow"]["status"], "completed")
+
+class TestWatchMode(unittest.TestCase):
+    """
+    Tests du mode surveillance
+    """
+    
+    def test_burst_is_debounced(self):
+        """
+        Test qu'une rafale de modifications ne produit qu'un réveil, avec tous les chemins modifiés
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "docs"))
+            watcher = PollingWatcher(("docs",), root=tmp, interval=0.01, debounce=0.1)
+            
+            def burst():
+                for name in ["a.md", "b.md"]:
+                    with open(os.path.join(tmp, "docs", name), 'w', encoding='utf8') as f:
+                        f.write(name)
+                    time.sleep(0.03)
+            
+            writer = threading.Thread(target=burst)
+            writer.start()
+            changes = watcher.wait()
+            writer.join()
+            self.assertEqual(changes, ["docs/a.md", "docs/b.md"])
+            
+            stop = threading.Event()
+            stop.set()
+            self.assertEqual(watcher.wait(stop), [])
+    
+    def test_daemon_reuses_flow_and_ignores_own_writes(self):
+        """
+        Test que le même flow est relancé, sans fermer le pool, et que ses propres écritures ne le relancent pas
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "docs"))
+            
+            class WriteNode(BaseNode):
+                def exec(self, context):
+                    path = os.path.join(tmp, "docs", "out.md")
+                    with open(path, 'a', encoding='utf8') as f:
+                        f.write("x")
+                    context.setdefault("modified_files", []).append(path)
+                    return context.get("watch_changes")
+            
+            flow = Flow([WriteNode("write")], reporter=SilentReporter())
+            watcher = PollingWatcher(("docs",), root=tmp, interval=0.01, debounce=0.02)
+            stop = threading.Event()
+            results = []
+            
+            def on_result(context, changes, elapsed):
+                results.append(changes)
+                if len(results) == 1:
+                    with open(os.path.join(tmp, "docs", "in.md"), 'w', encoding='utf8') as f:
+                        f.write("edit")
+                else:
+                    stop.set()
+            
+            daemon = WatchDaemon(flow, watcher, on_result=on_result)
+            with patch.object(transport, 'close_all') as close_all:
+                thread = threading.Thread(target=daemon.serve, args=(stop,))
+                thread.start()
+                thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [[], ["docs/in.md"]])
+            self.assertFalse(flow.close_transport)
+            close_all.assert_called_once()
+    
+    def test_commit_during_run_triggers_next_run(self):
+        """
+        Test qu'un commit arrivé pendant un run déclenche un nouveau run, et qu'un run en échec n'arrête pas le daemon
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            def run_git(*args):
+                subprocess.check_call(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            
+            run_git("init", "-q")
+            run_git("commit", "-q", "--allow-empty", "-m", "init")
+            calls = []
+            
+            class CommitNode(BaseNode):
+                def exec(self, context):
+                    calls.append(context["watch_changes"])
+                    if len(calls) == 1:
+                        run_git("commit", "-q", "--allow-empty", "-m", "pendant le run")
+                        raise RuntimeError("échec du run")
+            
+            flow = Flow([CommitNode("commit")], reporter=SilentReporter())
+            watcher = PollingWatcher((".git/HEAD", ".git/refs"), root=tmp, interval=0.01, debounce=0.02)
+            errors = []
+            daemon = WatchDaemon(flow, watcher, on_error=errors.append)
+            
+            class FailingFlow:
+                close_transport = True
+                
+                def run(self, context, time_budget=None):
+                    result = flow.run(context)
+                    if result["flow"]["status"] == "error":
+                        raise OSError("verrou indisponible")
+                    return result
+            
+            daemon.flow = FailingFlow()
+            daemon._run_safely([])
+            self.assertEqual(daemon.errors, 1)
+            self.assertIsInstance(errors[0], OSError)
+            changes = watcher.wait()
+            self.assertTrue(any(path.startswith(".git/") for path in changes))
+            daemon._run_safely(changes)
+            self.assertEqual(daemon.runs, 1)
+            self.assertEqual(calls[1], changes)
+
+DM_LOG = """# Journal
+
+## Résultats des étapes
+
+### 2025-07-21 - Tâche B
+
+B
+
+### 2025-06-01 - Tâche A
+
+A
+
+## Audits
+
+### 2025-01-01 - Audit
+"""
+
+class TestJobQueue(unittest.TestCase):
+    """
+    Tests de la file de jobs des hooks Git
+    """
+    
+    def test_pending_jobs_of_a_repo_are_coalesced(self):
+        """
+        Test que les jobs en attente d'un dépôt forment un seul lot, avec les options du plus récent
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(os.path.join(tmp, "jobs.sqlite"))
+            first = queue.enqueue("/repo/a", {"type": "full", "force": False})
+            queue.enqueue("/repo/b", {"type": "full"})
+            last = queue.enqueue("/repo/a", {"type": "full", "force": True})
+            self.assertEqual(queue.depth(), 3)
+            
+            batch = queue.claim(worker=1)
+            self.assertEqual(batch["repo"], os.path.abspath("/repo/a"))
+            self.assertEqual(batch["jobs"], [first, last])
+            self.assertEqual(batch["args"], {"type": "full", "force": True})
+            self.assertEqual(queue.depth(), 1)
+            
+            # Un job arrivé pendant le run attend la fin du lot en cours
+            queue.enqueue("/repo/a", {"type": "full"})
+            self.assertEqual(queue.claim(worker=2)["repo"], os.path.abspath("/repo/b"))
+            self.assertIsNone(queue.claim(worker=2))
+            queue.finish(batch["batch"])
+            self.assertEqual(queue.claim(worker=2)["repo"], os.path.abspath("/repo/a"))
+            queue.close()
+    
+    def test_worker_drains_and_reports(self):
+        """
+        Test que le worker exécute un run par dépôt et rapporte attente, durée et profondeur
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(os.path.join(tmp, "jobs.sqlite"))
+            for _ in range(3):
+                queue.enqueue("/repo/a", {"type": "full"})
+            queue.enqueue("/repo/b", {"type": "dm-log"})
+            runs = []
+            
+            def runner(repo, args):
+                runs.append((repo, args["type"]))
+                if args["type"] == "dm-log":
+                    raise RuntimeError("run terminé avec le code 1")
+            
+            reports = QueueWorker(queue, runner).drain()
+            self.assertEqual(runs, [(os.path.abspath("/repo/a"), "full"), (os.path.abspath("/repo/b"), "dm-log")])
+            self.assertEqual([report["jobs"] for report in reports], [3, 1])
+            self.assertEqual([report["depth"] for report in reports], [1, 0])
+            self.assertIsNone(reports[0]["error"])
+            self.assertIn("code 1", reports[1]["error"])
+            self.assertGreaterEqual(reports[0]["wait"], 0)
+            
+            stats = queue.stats()
+            self.assertEqual((stats["pending"], stats["done"], stats["error"], stats["runs"]), (0, 3, 1, 2))
+            self.assertTrue(queue.worker_alive())
+            queue.close()
+    
+    def test_stale_running_jobs_are_requeued(self):
+        """
+        Test que les jobs d'un worker arrêté brutalement sont remis en attente, pas ceux d'un run long
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(os.path.join(tmp, "jobs.sqlite"))
+            queue.enqueue("/repo/a", {})
+            queue.heartbeat(1)
+            with patch('time.time', return_value=time.time() - 7200):
+                queue.claim(worker=1)
+            self.assertEqual(queue.requeue_stale(60), 0)
+            queue.unregister(1)
+            self.assertEqual(queue.requeue_stale(60), 1)
+            self.assertEqual(queue.depth(), 1)
+            queue.close()
+
+
+@unittest.skipIf(runlock.fcntl is None, "fcntl.flock indisponible")
+class TestRunLock(unittest.TestCase):
+    """
+    Tests du verrou d'exécution par dépôt
+    """
+    
+    def _wait_pending(self, lock, tokens):
+        waiting = threading.Event()
+        thread = threading.Thread(target=lambda: tokens.append(lock.acquire(on_wait=waiting.set)))
+        thread.start()
+        self.assertTrue(waiting.wait(5))
+        return thread
+    
+    def test_one_running_one_pending(self):
+        """
+        Test qu'un run attend la fin du run en cours et que le suivant est regroupé avec lui
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, ".git"))
+            lock = RunLock.for_repo(tmp)
+            self.assertEqual(lock.directory, os.path.join(tmp, ".git", "pocketflow"))
+            
+            running = lock.acquire()
+            self.assertIsNotNone(running)
+            tokens = []
+            pending = self._wait_pending(lock, tokens)
+            self.assertIsNone(lock.acquire())
+            self.assertEqual(tokens, [])
+            
+            lock.release(running)
+            pending.join(timeout=5)
+            self.assertIsNotNone(tokens[0])
+            # Le run en attente a démarré : un nouveau run peut attendre à son tour
+            waiter = []
+            thread = self._wait_pending(lock, waiter)
+            lock.release(tokens[0])
+            thread.join(timeout=5)
+            lock.release(waiter[0])
+    
+    def test_flow_coalesced_with_pending_run(self):
+        """
+        Test qu'un flow regroupé n'exécute aucun node et rend le verrou utilisable ensuite
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, ".git"))
+            lock = RunLock.for_repo(tmp)
+            runs = []
+            
+            class CountNode(BaseNode):
+                def exec(self, context):
+                    runs.append(1)
+            
+            flow = Flow([CountNode("count")], reporter=SilentReporter(), run_lock=lock)
+            
+            running = lock.acquire()
+            tokens = []
+            pending = self._wait_pending(lock, tokens)
+            context = flow.run({})
+            self.assertEqual(context["flow"]["status"], "coalesced")
+            self.assertEqual(runs, [])
+            lock.release(running)
+            pending.join(timeout=5)
+            lock.release(tokens[0])
+            
+            self.assertEqual(flow.run({})["flow"]["status"], "completed")
+            self.assertEqual(runs, [1])
+
+
+class TestBatchRunner(unittest.TestCase):
+    """
+    Tests du batch multi-dépôts
+    """
+    
+    def test_load_manifest(self):
+        """
+        Test la lecture des manifestes texte et JSON, chemins relatifs au manifeste
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            text = os.path.join(tmp, "repos.txt")
+            with open(text, 'w', encoding='utf8') as f:
+                f.write("# Projets\nprojets/a\n\n/srv/b\n")
+            repos = load_manifest(text)
+            self.assertEqual([(repo["name"], repo["path"]) for repo in repos],
+                             [("a", os.path.join(tmp, "projets", "a")), ("b", "/srv/b")])
+            
+            manifest = os.path.join(tmp, "repos.json")
+            with open(manifest, 'w', encoding='utf8') as f:
+                json.dump({"repos": ["a", {"path": "x/a", "name": "a2", "options": {"impact": False}}]}, f)
+            repos = load_manifest(manifest)
+            self.assertEqual(repos[1], {"name": "a2", "path": os.path.join(tmp, "x", "a"), "options": {"impact": False}})
+            
+            with open(manifest, 'w', encoding='utf8') as f:
+                json.dump(["a", "x/a"], f)
+            with self.assertRaises(ValueError):
+                load_manifest(manifest)
+    
+    def test_failures_are_reported_without_stopping_the_batch(self):
+        """
+        Test que chaque dépôt est exécuté dans le pool et que les erreurs sont regroupées dans le rapport
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            repos = [{"name": name, "path": os.path.join(tmp, name), "options": {}} for name in ["a", "b", "c"]]
+            finished = []
+            report = BatchRunner(max_workers=2, options={"test_mode": True}).run(
+                repos, on_result=lambda result: finished.append(result["name"]))
+        
+        self.assertEqual(report["workers"], 2)
+        self.assertEqual(sorted(finished), ["a", "b", "c"])
+        self.assertEqual([result["name"] for result in report["repos"]], ["a", "b", "c"])
+        self.assertTrue(all(result["status"] == "error" for result in report["repos"]))
+        self.assertIn("FileNotFoundError", report["repos"][0]["errors"][0])
+        self.assertEqual(report["summary"]["error"], 3)
+        self.assertGreaterEqual(report["summary"]["repo_seconds"], 0)
+    
+    def test_broken_pool_resubmits_unfinished_repos(self):
+        """
+        Test qu'après la mort d'un processus les dépôts inachevés sont relancés dans un nouveau pool
+        """
+        pools = []
+        
+        class FlakyPool:
+            """
+            Pool en processus dont le premier meurt avec tous ses dépôts, et où "c" tue toujours le sien
+            """
+            def __init__(self, **kwargs):
+                pools.append(self)
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                return False
+            
+            def submit(self, fn, repo, *args):
+                future = Future()
+                if len(pools) == 1 or repo["name"] == "c":
+                    future.set_exception(BrokenProcessPool("processus tué"))
+                else:
+                    future.set_result({"name": repo["name"], "path": repo["path"], "status": "completed",
+                                       "elapsed": 0.0, "nodes": {}, "errors": [], "llm": {}})
+                return future
+        
+        repos = [{"name": name, "path": f"/srv/{name}", "options": {}} for name in ["a", "b", "c"]]
+        finished = []
+        with patch('pocketflow_agent.batch.ProcessPoolExecutor', FlakyPool), \
+             patch('pocketflow_agent.ratelimit.create_shared_buckets', return_value={}):
+            report = BatchRunner(max_workers=2, max_restarts=2).run(
+                repos, on_result=lambda result: finished.append(result["name"]))
+        
+        self.assertEqual(len(pools), 3)
+        self.assertEqual(sorted(finished), ["a", "b", "c"])
+        self.assertEqual([result["status"] for result in report["repos"]], ["completed", "completed", "error"])
+        self.assertIn("Processus interrompu", report["repos"][2]["errors"][0])
+        self.assertEqual(report["restarts"], 4)
+
+
+class TestDMLogStore(unittest.TestCase):
+    """
+    Tests du stockage segmenté du DM-Log
+    """
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dm-log.md")
+        with open(self.path, 'w', encoding='utf8') as f:
+            f.write(DM_LOG)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_imports_existing_entries(self):
+        """
+        Test que les entrées de la vue existante sont importées, sans réécrire la vue
+        """
+        store = DMLogStore(self.path)
+        self.assertEqual([entry["task"] for entry in store.entries()], ["Tâche A", "Tâche B"])
+        self.assertEqual(store.entries()[0]["segment"], "2025-06.md")
+        self.assertEqual(store.last(1), ["### 2025-07-21 - Tâche B\n\nB\n"])
+        self.assertFalse(store.render())
+    
+    def test_append_and_lazy_render(self):
+        """
+        Test que les ajouts ne touchent pas la vue avant render, qui insère les entrées en attente
+        """
+        store = DMLogStore(self.path)
+        store.head()
+        before = os.stat(self.path).st_mtime_ns
+        with patch('pocketflow_agent.dmlog.write_document') as mock_write:
+            store.append("### 2026-01-01 - Tâche C\n\nC")
+            store.append("### 2026-01-02 - Tâche D\n\nD")
+        mock_write.assert_not_called()
+        self.assertEqual(os.stat(self.path).st_mtime_ns, before)
+        with open(self.path, 'r', encoding='utf8') as f:
+            self.assertEqual(f.read(), DM_LOG)
+        self.assertEqual(store.pending(), 2)
+        self.assertEqual(store.last(2), ["### 2026-01-01 - Tâche C\n\nC\n", "### 2026-01-02 - Tâche D\n\nD\n"])
+        
+        self.assertTrue(store.render())
+        self.assertEqual(store.pending(), 0)
+        with open(self.path, 'r', encoding='utf8') as f:
+            content = f.read()
+        self.assertIn("## Résultats des étapes\n\n### 2026-01-02 - Tâche D\n\nD\n\n### 2026-01-01 - Tâche C\n\nC\n\n"
+                      "### 2025-07-21 - Tâche B", content)
+        self.assertEqual(DMLogStore(self.path).head()["seq"], 4)
+    
+    def test_update_node_uses_store(self):
+        """
+        Test que DMLogUpdateNode ajoute l'entrée au stockage et ne régénère la vue que toutes les render_every entrées
+        """
+        store = DMLogStore(self.path)
+        parser = DMLogParserNode(path=self.path, store=store, recent_entries=1)
+        node = DMLogUpdateNode(path=self.path, store=store, render_every=2)
+        context = {"dm_entry": "### 2026-01-01 - Tâche C\n\nC\n"}
+        self.assertEqual(parser.exec(context), ["### 2025-07-21 - Tâche B\n\nB\n"])
+        self.assertTrue(node.exec(context))
+        self.assertEqual(context["modified_files"], [store.directory])
+        self.assertEqual(store.pending(), 1)
+        self.assertEqual(parser.exec(context), ["### 2026-01-01 - Tâche C\n\nC\n"])
+        
+        context = {"dm_entry": "### 2026-01-02 - Tâche D\n\nD\n"}
+        self.assertTrue(node.exec(context))
+        self.assertEqual(context["modified_files"], [self.path, store.directory])
+        self.assertEqual(store.pending(), 0)
+    
+    def test_rolling_summary(self):
+        """
+        Test que le résumé n'est régénéré que pour les entrées sorties de la fenêtre
+        """
+        store = DMLogStore(self.path)
+        client = LLMClient(api_key="key", provider="openai")
+        node = DMLogSummaryNode(store, window=2, llm_client=client)
+        with patch.object(LLMClient, 'generate_text', return_value="Résumé 1") as mock_generate:
+            context = {}
+            self.assertEqual(node.exec(context), "")
+            store.append("### 2026-01-01 - Tâche C\n\nC")
+            self.assertEqual(node.exec(context), "Résumé 1")
+            self.assertIn("### 2025-06-01 - Tâche A", mock_generate.call_args[0][0])
+            self.assertNotIn("Tâche B", mock_generate.call_args[0][0])
+            self.assertEqual(node.exec(context), "Résumé 1")
+            mock_generate.assert_called_once()
+        
+        store.append("### 2026-01-02 - Tâche D\n\nD")
+        with patch.object(LLMClient, 'generate_text', return_value="Résumé 2") as mock_generate:
+            self.assertEqual(node.exec(context), "Résumé 2")
+            prompt = mock_generate.call_args[0][0]
+        self.assertIn("Résumé 1", prompt)
+        self.assertIn("Tâche B", prompt)
+        self.assertNotIn("Tâche A", prompt)
+        self.assertEqual(store.load_summary(), {"upto": 2, "text": "Résumé 2"})
+        
+        context.update(today="2026-01-03", task_name="Tâche E", task_results=["ok"], next_steps=["suite"],
+                       dm_recent_entries=store.last(2))
+        prompt = DMLogLLMNode(llm_client=client)._build_prompt(context)
+        self.assertIn("Résumé 2", prompt)
+        self.assertIn("### 2026-01-02 - Tâche D", prompt)
+
+class TestGitCommitNode(unittest.TestCase):
+    """
+    Tests pour la classe GitCommitNode
+    """
+    
+    @patch('subprocess.check_output')
+    def test_exec(self, mock_check_output):
+        """
+        Test de la méthode exec
+        """
+        # Configurer le mock
+        mock_check_output.return_value = "\x1eabc123\0Task: Test task\0"
+        
+        # Appeler la méthode
+        node = GitCommitNode()
+        result = node.exec({})
+        
+        # Vérifier le résultat
+        self.assertEqual(result["task_name"], "Test task")
+        self.assertIn("today", result)
+        self.assertIn("task_results", result)
+        self.assertIn("next_steps", result)
+    
+    @patch('subprocess.check_output')
+    def test_exec_changed_files(self, mock_check_output):
+        """
+        Test que les fichiers modifiés du commit sont ajoutés au contexte
+        """
+        mock_check_output.return_value = "\x1eabc123\0Task: Test task\n\n\0\nsrc/app.py\ndocs/tasks.md\n"
+        result = GitCommitNode().exec({})
+        self.assertEqual(result["task_name"], "Test task")
+        self.assertEqual(result["changed_files"], ["src/app.py", "docs/tasks.md"])
+        self.assertEqual(result["head_commit"], "abc123")
+    
+    @patch('subprocess.check_output')
+    def test_exec_commit_range(self, mock_check_output):
+        """
+        Test que tous les commits depuis le dernier traité sont lus en un appel et consolidés
+        """
+        mock_check_output.return_value = ("\x1eccc\0Fix\n\nTask: B\0\nsrc/b.py\n"
+                                          "\n\x1ebbb\0Task: A\nTask: B\0\nsrc/a.py\nsrc/b.py\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            cursor = CommitCursor(os.path.join(tmp, "commits.json"))
+            cursor.set("aaa")
+            result = GitCommitNode(cursor=cursor).exec({})
+            args = mock_check_output.call_args[0][0]
+            self.assertEqual(mock_check_output.call_count, 1)
+            self.assertEqual(args[-1], "aaa..HEAD")
+            self.assertEqual([commit["commit"] for commit in result["commits"]], ["bbb", "ccc"])
+            self.assertEqual(result["task_name"], "A, B")
+            self.assertEqual(result["changed_files"], ["src/a.py", "src/b.py"])
+            
+            llm = DMLogLLMNode(llm_client=LLMClient(api_key="key", provider="openai"))
+            self.assertIn("les 2 commits suivants", llm._build_prompt(result))
+            
+            # Le curseur n'avance qu'une fois l'entrée enregistrée
+            self.assertEqual(cursor.get(), "aaa")
+            path = os.path.join(tmp, "dm-log.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(DM_LOG)
+            result["dm_entry"] = "### 2026-01-01 - A, B\n"
+            DMLogUpdateNode(path=path, store=DMLogStore(path), cursor=cursor).exec(result)
+            self.assertEqual(cursor.get(), "ccc")
+            
+            # Sans nouveau commit, aucune entrée n'est générée
+            mock_check_output.return_value = ""
+            context = GitCommitNode(cursor=cursor).exec({})
+            self.assertEqual(context["commits"], [])
+            self.assertEqual(llm.exec(context), "")
+    
+    @patch('subprocess.check_output')
+    def test_exec_commit_overflow_keeps_oldest(self, mock_check_output):
+        """
+        Test qu'au-delà de max_commits les plus anciens sont traités et le curseur s'arrête au dernier d'entre eux
+        """
+        mock_check_output.return_value = "".join(f"\x1ec{i}\0Task: T{i}\0\nf{i}.py\n" for i in range(5, 0, -1))
+        with tempfile.TemporaryDirectory() as tmp:
+            cursor = CommitCursor(os.path.join(tmp, "commits.json"))
+            cursor.set("c0")
+            result = GitCommitNode(cursor=cursor, max_commits=2).exec({})
+        self.assertNotIn("--max-count", " ".join(mock_check_output.call_args[0][0]))
+        self.assertEqual([commit["commit"] for commit in result["commits"]], ["c1", "c2"])
+        self.assertEqual(result["head_commit"], "c2")
+    
+    def test_own_commit_is_not_documented(self):
+        """
+        Test qu'un second run sans nouveau commit ne voit pas le commit de mise à jour du premier
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            def run_git(*args):
+                subprocess.check_call(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            
+            run_git("init", "-q")
+            run_git("commit", "-q", "--allow-empty", "-m", "init")
+            run_git("commit", "-q", "--allow-empty", "-m", "Task: A")
+            os.makedirs(os.path.join(tmp, "docs"))
+            path = os.path.join(tmp, "docs", "dm-log.md")
+            with open(path, 'w', encoding='utf8') as f:
+                f.write(DM_LOG)
+            run_git("add", "docs")
+            run_git("commit", "-q", "-m", "docs")
+            cursor = CommitCursor(os.path.join(tmp, ".pocketflow", "commits.json"))
+            cursor.set(subprocess.check_output(["git", "rev-parse", "HEAD~1"], cwd=tmp, text=True).strip())
+            
+            context = GitCommitNode(cwd=tmp, cursor=cursor).exec({})
+            self.assertEqual(len(context["commits"]), 1)
+            context["dm_entry"] = "### 2026-01-01 - docs\n"
+            context["dm_content"] = DM_LOG
+            DMLogUpdateNode(path=path, cursor=cursor).exec(context)
+            push = GitPushNode(files=["docs/dm-log.md"], cwd=tmp, cursor=cursor)
+            with patch.dict(os.environ, {"GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@t",
+                                         "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@t"}), \
+                 patch.object(git.GitRepo, 'push'):
+                push.exec(context)
+            self.assertEqual(context["committed_files"], ["docs/dm-log.md"])
+            
+            context = GitCommitNode(cwd=tmp, cursor=cursor).exec({})
+            git.close_all()
+            self.assertEqual(context["commits"], [])
+            self.assertIsNone(context["head_commit"])
+    
+    def test_prompt_includes_single_commit_id(self):
+        """
+        Test que deux commits au même message donnent des prompts différents
+        """
+        llm = DMLogLLMNode(llm_client=LLMClient(api_key="key", provider="openai"))
+        context = {"today": "2026-01-01", "task_name": "A", "task_results": ["ok"], "next_steps": ["suite"]}
+        first = llm._build_prompt({**context, "commits": [{"commit": "aaaaaaa1", "message": "Task: A", "tasks": ["A"]}]})
+        second = llm._build_prompt({**context, "commits": [{"commit": "bbbbbbb2", "message": "Task: A", "tasks": ["A"]}]})
+        self.assertIn("aaaaaaa", first)
+        self.assertNotEqual(first, second)
 
 if __name__ == '__main__':
     unittest.main()